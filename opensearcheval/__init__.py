@@ -15,36 +15,75 @@ __license__ = "MIT"
 __description__ = "A comprehensive search evaluation platform with agent architecture"
 __url__ = "https://github.com/llamasearchai/OpenSearchEval"
 
-# Core imports
-from opensearcheval.core.config import get_settings
-from opensearcheval.core.experiment import ExperimentManager, Experiment, ExperimentType, ExperimentStatus
-from opensearcheval.core.agent import AgentManager, SearchEvaluationAgent, ABTestAgent, UserBehaviorAgent
-from opensearcheval.core.metrics import (
-    mean_reciprocal_rank, 
-    precision_at_k, 
-    ndcg_at_k, 
-    click_through_rate,
-    time_to_first_click,
-    abandoned_search_rate,
-    llm_judge_score,
-    average_dwell_time
-)
+import importlib
+
+# Public names and the modules providing them. They are imported on first
+# attribute access (PEP 562) so that importing the package, e.g. for the
+# API server, does not load sklearn, scipy, matplotlib or MLX up front.
+_LAZY_ATTRIBUTES = {
+    # Core
+    'get_settings': 'opensearcheval.core.config',
+    'ExperimentManager': 'opensearcheval.core.experiment',
+    'Experiment': 'opensearcheval.core.experiment',
+    'ExperimentType': 'opensearcheval.core.experiment',
+    'ExperimentStatus': 'opensearcheval.core.experiment',
+    'AgentManager': 'opensearcheval.core.agent',
+    'SearchEvaluationAgent': 'opensearcheval.core.agent',
+    'ABTestAgent': 'opensearcheval.core.agent',
+    'UserBehaviorAgent': 'opensearcheval.core.agent',
+    'mean_reciprocal_rank': 'opensearcheval.core.metrics',
+    'precision_at_k': 'opensearcheval.core.metrics',
+    'ndcg_at_k': 'opensearcheval.core.metrics',
+    'click_through_rate': 'opensearcheval.core.metrics',
+    'time_to_first_click': 'opensearcheval.core.metrics',
+    'abandoned_search_rate': 'opensearcheval.core.metrics',
+    'llm_judge_score': 'opensearcheval.core.metrics',
+    'average_dwell_time': 'opensearcheval.core.metrics',
+    'batch_search_metrics': 'opensearcheval.core.metrics',
+    
+    # ML
+    'LLMJudge': 'opensearcheval.ml.llm_judge',
+    'evaluate_search_results': 'opensearcheval.ml.llm_judge',
+    'EmbeddingModel': 'opensearcheval.ml.embeddings',
+    'MLXEmbeddingModel': 'opensearcheval.ml.embeddings',
+    'ApiEmbeddingModel': 'opensearcheval.ml.embeddings',
+    'create_embedding_model': 'opensearcheval.ml.embeddings',
+    'SearchRankingModel': 'opensearcheval.ml.models',
+    'ClickThroughRatePredictor': 'opensearcheval.ml.models',
+    'extract_features': 'opensearcheval.ml.models',
+    'train_ctr_model': 'opensearcheval.ml.models',
+    
+    # Utilities
+    't_test': 'opensearcheval.utils.stats',
+    'mann_whitney_u_test': 'opensearcheval.utils.stats',
+    'bootstrap_test': 'opensearcheval.utils.stats',
+    'permutation_test': 'opensearcheval.utils.stats',
+    'power_analysis': 'opensearcheval.utils.stats',
+    'sample_size_grid': 'opensearcheval.utils.stats',
+    'ratio_metric_std': 'opensearcheval.utils.stats',
+    'adjust_p_values': 'opensearcheval.utils.stats',
+    'multi_arm_analysis': 'opensearcheval.utils.stats',
+    'metrics_time_series': 'opensearcheval.utils.visualization',
+    'ab_test_results_plot': 'opensearcheval.utils.visualization',
+    'user_behavior_heatmap': 'opensearcheval.utils.visualization',
+    'metric_comparison_radar': 'opensearcheval.utils.visualization',
+    'figure_to_base64': 'opensearcheval.utils.visualization',
+    'save_figure': 'opensearcheval.utils.visualization',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
 
-# ML imports
-from opensearcheval.ml.llm_judge import LLMJudge, evaluate_search_results
-from opensearcheval.ml.embeddings import EmbeddingModel, MLXEmbeddingModel, ApiEmbeddingModel, create_embedding_model
-from opensearcheval.ml.models import SearchRankingModel, ClickThroughRatePredictor, extract_features, train_ctr_model
 
-# Utility imports
-from opensearcheval.utils.stats import t_test, mann_whitney_u_test, bootstrap_test, power_analysis
-from opensearcheval.utils.visualization import (
-    metrics_time_series, 
-    ab_test_results_plot, 
-    user_behavior_heatmap, 
-    metric_comparison_radar,
-    figure_to_base64,
-    save_figure
-)
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
 
 # Make key classes and functions available at package level
 __all__ = [
@@ -68,6 +107,7 @@ __all__ = [
     'abandoned_search_rate',
     'llm_judge_score',
     'average_dwell_time',
+    'batch_search_metrics',
     
     # ML components
     'LLMJudge',
@@ -85,7 +125,12 @@ __all__ = [
     't_test',
     'mann_whitney_u_test',
     'bootstrap_test',
+    'permutation_test',
     'power_analysis',
+    'sample_size_grid',
+    'ratio_metric_std',
+    'adjust_p_values',
+    'multi_arm_analysis',
     'metrics_time_series',
     'ab_test_results_plot',
     'user_behavior_heatmap',
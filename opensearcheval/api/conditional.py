@@ -0,0 +1,88 @@
+import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from opensearcheval.core.experiment import Experiment
+
+
+def _as_utc(value: datetime.datetime) -> datetime.datetime:
+    # Experiment timestamps are naive local times
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(datetime.timezone.utc)
+
+
+def experiment_validators(experiments: Iterable[Experiment], revision: int = 0,
+                          changed_at: Optional[datetime.datetime] = None) -> Tuple[str, Optional[datetime.datetime]]:
+    """
+    Compute an ETag and Last-Modified time for a set of experiments
+
+    The ETag covers the manager revision (bumped on every create, change and
+    delete), the number of experiments and their newest updated_at, so any
+    change yields a new tag without serializing the experiments.
+
+    Args:
+        experiments: Experiments included in the response
+        revision: ExperimentManager revision counter
+        changed_at: Time of the manager's last change; collections pass it so
+            removals also advance Last-Modified
+
+    Returns:
+        Tuple of (weak ETag, latest updated_at or None)
+    """
+    count = 0
+    last_modified = changed_at
+    for experiment in experiments:
+        count += 1
+        if last_modified is None or experiment.updated_at > last_modified:
+            last_modified = experiment.updated_at
+    stamp = int(last_modified.timestamp() * 1_000_000) if last_modified else 0
+    return f'W/"{revision:x}-{count:x}-{stamp:x}"', last_modified
+
+
+def conditional_headers(etag: str, last_modified: Optional[datetime.datetime]) -> Dict[str, str]:
+    """Validator headers for a response; clients must revalidate before reuse"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime.datetime]) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against the current validators
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when
+    the client sent no ETag (RFC 7232, section 6).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: ignore the W/ prefix on either side
+        current = etag[2:] if etag.startswith("W/") else etag
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if (tag[2:] if tag.startswith("W/") else tag) == current:
+                return True
+        return False
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=datetime.timezone.utc)
+        # HTTP dates have one-second resolution
+        return _as_utc(last_modified).replace(microsecond=0) <= since
+
+    return False
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    """Empty 304 response carrying the current validators"""
+    return Response(status_code=304, headers=headers)
@@ -1,33 +1,63 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+import time
+
+# Cold-start measurement: time spent importing the API module and its dependencies
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Depends, Request, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, List, Any, Optional
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, List, Any, Optional, AsyncIterator
+from functools import partial
 import asyncio
+from enum import Enum
 import logging
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError, confloat
 import os
 import sys
-import time
+import importlib
+import httpx
 
 # Import from project
 from opensearcheval.core.agent import AgentManager, SearchEvaluationAgent, ABTestAgent, UserBehaviorAgent
 from opensearcheval.core.metrics import (
     mean_reciprocal_rank, precision_at_k, ndcg_at_k, 
     click_through_rate, time_to_first_click, abandoned_search_rate, 
-    llm_judge_score, average_dwell_time
+    llm_judge_score, average_dwell_time, batch_search_metrics,
+    RunningMetricAggregates
 )
 from opensearcheval.core.config import get_settings
 from opensearcheval.core.experiment import ExperimentManager, ExperimentType, ExperimentStatus
-from opensearcheval.ml.llm_judge import LLMJudge, evaluate_search_results
+from opensearcheval.ml.llm_judge import (
+    PairwiseJudge, evaluate_search_results, stream_search_results, close_llm_judge, get_judgment_cache
+)
+from opensearcheval.ml.cascade import get_cascade_judge
+from opensearcheval.ml.usage import usage_scope, usage_tracker
+from opensearcheval.utils.monitoring import PrometheusMiddleware, render_metrics
+from opensearcheval.api.middleware import AdmissionControlMiddleware, CompressionMiddleware
+from opensearcheval.api.serialization import FastJSONResponse, FastJSONRoute, cached_json_response, dumps, loads
+from opensearcheval.utils.cache import create_response_cache
+from opensearcheval.api.conditional import (
+    experiment_validators, conditional_headers, is_not_modified, not_modified_response
+)
 
 # Initialize FastAPI app
 settings = get_settings()
 app = FastAPI(
     title=settings.APP_NAME,
     description="A comprehensive search evaluation platform with agent architecture",
-    version=settings.APP_VERSION
+    version=settings.APP_VERSION,
+    default_response_class=FastJSONResponse
 )
+# Decode request bodies with orjson when available
+app.router.route_class = FastJSONRoute
+
+# Per-route concurrency limits and load shedding
+app.add_middleware(AdmissionControlMiddleware)
 
-# Configure CORS
+# Configure CORS. Middleware added later wraps what came before, so CORS
+# headers also reach admission control's 429/503 responses
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -36,6 +66,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for complete bodies above COMPRESSION_MINIMUM_SIZE
+app.add_middleware(CompressionMiddleware)
+
+# Request latency and status metrics per route
+app.add_middleware(PrometheusMiddleware)
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -43,6 +79,23 @@ logger = logging.getLogger(__name__)
 agent_manager = AgentManager()
 experiment_manager = ExperimentManager()
 
+# Response cache; experiment responses are dropped whenever any experiment changes
+response_cache = create_response_cache()
+
+def _invalidate_experiment_responses(experiment):
+    """Experiment listener; runs inside request handlers, so Redis round trips go to the executor"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is not None and response_cache.backend.blocking:
+        # Cached experiment responses are keyed by ETag, so none is served stale meanwhile
+        loop.run_in_executor(None, response_cache.invalidate, "experiments")
+    else:
+        response_cache.invalidate("experiments")
+
+experiment_manager.add_listener(_invalidate_experiment_responses)
+
 # Models for API requests and responses
 class SearchResult(BaseModel):
     doc_id: str
@@ -66,12 +119,31 @@ class SearchEvaluationRequest(BaseModel):
     user_interactions: Optional[List[UserInteraction]] = []
     relevance_judgments: Optional[Dict[str, int]] = {}
     llm_judgments: Optional[Dict[str, float]] = {}
+    callback_url: Optional[str] = None
+
+class EvaluationMode(str, Enum):
+    SYNC = "sync"
+    ASYNC = "async"
+
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    SSE = "sse"
 
 class SearchEvaluationResponse(BaseModel):
     id: str
     metrics: Dict[str, float]
     status: str = "success"
 
+class BulkEvaluationRequest(BaseModel):
+    items: List[SearchEvaluationRequest]
+    k: int = 10
+
+class BulkEvaluationResponse(BaseModel):
+    count: int
+    results: List[SearchEvaluationResponse]
+    aggregates: Dict[str, Dict[str, float]]
+    status: str = "success"
+
 class ExperimentGroup(BaseModel):
     group_id: str
     metrics: Dict[str, List[float]]
@@ -81,6 +153,7 @@ class ABTestRequest(BaseModel):
     experiment_id: str
     control_group: ExperimentGroup
     treatment_group: ExperimentGroup
+    treatment_groups: Optional[List[ExperimentGroup]] = None
     confidence_level: float = 0.95
 
 class ABTestResponse(BaseModel):
@@ -108,62 +181,201 @@ class ExperimentResponse(BaseModel):
     started_at: Optional[str] = None
     ended_at: Optional[str] = None
 
+class MetricBaseline(BaseModel):
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    # Ratio metrics (e.g. clicks per query) are described by numerator and denominator
+    numerator_mean: Optional[float] = None
+    numerator_std: Optional[float] = None
+    denominator_mean: Optional[float] = None
+    denominator_std: Optional[float] = None
+    covariance: float = 0.0
+
+class SampleSizeRequest(BaseModel):
+    metrics: Dict[str, MetricBaseline]
+    min_detectable_effects: List[float]
+    # Probabilities strictly between 0 and 1; the boundaries need infinite samples
+    powers: List[confloat(gt=0, lt=1)] = [0.8]
+    alphas: Optional[List[confloat(gt=0, lt=1)]] = None
+
 class LLMJudgeRequest(BaseModel):
     query: str
     documents: List[Dict[str, Any]]
     evaluation_criteria: Optional[List[str]] = None
+    # Serve only cached judgments (e.g. for dashboards); uncached documents get an error entry
+    cache_only: bool = False
+    # Judge several documents per LLM call
+    listwise: bool = False
+    # Decide clear matches and misses locally; only the uncertain band goes to the LLM
+    cascade: bool = False
+    # Experiment to charge token usage and cost to
+    experiment_id: Optional[str] = None
 
-# Startup event to initialize agents
-@app.on_event("startup")
-async def startup_event():
-    # Initialize search evaluation agent
+class LLMPairwiseRequest(BaseModel):
+    query: str
+    # Documents in their current ranked order, which also breaks ties
+    documents: List[Dict[str, Any]]
+    evaluation_criteria: Optional[List[str]] = None
+    # Ask for every pair in both orders to cancel out position bias (twice the calls)
+    both_orders: bool = False
+    # Experiment to charge token usage and cost to
+    experiment_id: Optional[str] = None
+
+DEFAULT_LLM_JUDGE_CRITERIA = ["relevance", "factuality", "completeness"]
+
+# Where finished results are stored for each kind of push subscription
+RESULT_SOURCES = {
+    "evaluation": ("search_evaluator", "results"),
+    "ab_test": ("ab_tester", "experiment_results")
+}
+SSE_KEEPALIVE_SECONDS = 15.0
+
+# Webhook URLs for evaluations that have not finished yet, keyed by evaluation ID
+pending_webhooks: Dict[str, str] = {}
+_webhook_tasks = set()
+
+async def _post_webhook(url: str, payload: Dict[str, Any]):
+    try:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.post(url, json=payload)
+            if response.status_code >= 400:
+                logger.warning(f"Webhook {url} returned {response.status_code}")
+    except Exception as e:
+        logger.error(f"Error delivering webhook to {url}: {str(e)}")
+
+async def deliver_evaluation_webhook(evaluation_id: str, evaluation: Dict[str, Any]):
+    """SearchEvaluationAgent callback: POST finished results to the requested webhook"""
+    url = pending_webhooks.pop(evaluation_id, None)
+    if not url:
+        return
+    payload = SearchEvaluationResponse(id=evaluation_id, metrics=evaluation, status="complete").dict()
+    task = asyncio.create_task(_post_webhook(url, payload))
+    _webhook_tasks.add(task)
+    task.add_done_callback(_webhook_tasks.discard)
+
+def _result_payload(kind: str, key: str, result: Any) -> Dict[str, Any]:
+    if kind == "evaluation":
+        return SearchEvaluationResponse(id=key, metrics=result, status="complete").dict()
+    return ABTestResponse(experiment_id=key, results=result, status="complete").dict()
+
+async def _wait_for_result(kind: str, key: str, timeout: float) -> Optional[Any]:
+    """Return a stored result or wait for the agent to publish it; None on timeout"""
+    agent_name, attribute = RESULT_SOURCES[kind]
+    agent = agent_manager.get_agent(agent_name)
+    if not agent:
+        return None
+    
+    result = getattr(agent, attribute).get(key)
+    if result:
+        return result
+    try:
+        return await agent_manager.notifier.wait_for(agent_name, key, timeout)
+    except asyncio.TimeoutError:
+        return None
+
+def _result_event_stream(kind: str, key: str, timeout: float) -> StreamingResponse:
+    """Server-Sent Events response that emits the result once the agent finishes"""
+    agent_name, _ = RESULT_SOURCES[kind]
+    if agent_name not in agent_manager.agent_names:
+        raise HTTPException(status_code=404, detail=f"Agent not found: {agent_name}")
+    
+    async def events() -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                yield f"event: timeout\ndata: {dumps({'id': key}).decode()}\n\n"
+                return
+            result = await _wait_for_result(kind, key, min(remaining, SSE_KEEPALIVE_SECONDS))
+            if result is not None:
+                yield f"event: result\ndata: {dumps(_result_payload(kind, key, result)).decode()}\n\n"
+                return
+            if deadline > loop.time():
+                yield ": keepalive\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Modules only needed once requests arrive; imported by the background warm-up
+WARM_UP_IMPORTS = ("sklearn.metrics", "opensearcheval.utils.stats")
+
+# Startup progress for the readiness probe: "ready" once requests can be served,
+# "warm" once lazy agents are built and heavy modules imported
+startup_state: Dict[str, Any] = {
+    "ready": False,
+    "warm": False,
+    "import_seconds": round(time.perf_counter() - _import_started, 3),
+    "startup_seconds": None,
+    "warm_up_seconds": None
+}
+_warm_up_task: Optional[asyncio.Task] = None
+
+def create_search_evaluation_agent() -> SearchEvaluationAgent:
     search_metrics = [
         mean_reciprocal_rank,
-        lambda q, r, u: precision_at_k(q, r, u, k=10),
-        lambda q, r, u: ndcg_at_k(q, r, u, k=10),
+        partial(precision_at_k, k=10),
+        partial(ndcg_at_k, k=10),
         click_through_rate,
         time_to_first_click,
         abandoned_search_rate,
         average_dwell_time
     ]
-    
-    search_eval_agent = SearchEvaluationAgent(
+    return SearchEvaluationAgent(
         name="search_evaluator",
         config={"metrics_k": 10},
-        metrics=search_metrics
+        metrics=search_metrics,
+        callback=deliver_evaluation_webhook,
+        cache=response_cache
     )
-    agent_manager.register_agent(search_eval_agent)
-    
-    # Initialize A/B test agent
-    from opensearcheval.utils.stats import t_test, mann_whitney_u_test, bootstrap_test
+
+def create_ab_test_agent() -> ABTestAgent:
+    # scipy is only imported when the first A/B analysis needs it
+    from opensearcheval.utils.stats import t_test, mann_whitney_u_test, bootstrap_test, permutation_test
     
-    ab_test_agent = ABTestAgent(
+    return ABTestAgent(
         name="ab_tester",
-        config={"confidence_level": 0.95},
-        statistical_tests=[t_test, mann_whitney_u_test, bootstrap_test]
+        config={"confidence_level": 0.95, "correction": "holm"},
+        statistical_tests=[t_test, mann_whitney_u_test, bootstrap_test, permutation_test]
     )
-    agent_manager.register_agent(ab_test_agent)
-    
-    # Initialize user behavior agent
-    user_behavior_agent = UserBehaviorAgent(
+
+def create_user_behavior_agent() -> UserBehaviorAgent:
+    return UserBehaviorAgent(
         name="user_behavior_analyzer",
         config={}
     )
-    agent_manager.register_agent(user_behavior_agent)
-    
-    # Initialize LLM judge
-    llm_judge = LLMJudge(
-        model_name=settings.LLM_MODEL, 
-        config={
-            "temperature": 0.1,
-            "endpoint": settings.LLM_ENDPOINT,
-            "api_key": settings.LLM_API_KEY
-        }
-    )
+
+async def warm_up():
+    """Build lazy agents and import heavy modules without blocking requests"""
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        for module in WARM_UP_IMPORTS:
+            await loop.run_in_executor(None, importlib.import_module, module)
+        await agent_manager.warm_up()
+    except Exception as e:
+        # Subsystems are still built on first use; only the head start is lost
+        logger.error(f"Warm-up failed: {str(e)}")
+        return
+    startup_state["warm"] = True
+    startup_state["warm_up_seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Warm-up complete in {startup_state['warm_up_seconds']}s")
+
+@app.on_event("startup")
+async def startup_event():
+    global _warm_up_task
+    started = time.perf_counter()
+    
+    # Agents are built on first use (or by the warm-up) rather than here
+    agent_manager.register_factory("search_evaluator", create_search_evaluation_agent)
+    agent_manager.register_factory("ab_tester", create_ab_test_agent)
+    agent_manager.register_factory("user_behavior_analyzer", create_user_behavior_agent)
     
-    # Start all agents
     await agent_manager.start_all()
-    logger.info("All agents started successfully")
+    logger.info("Agent manager started")
     
     # Create some default experiments
     experiment_manager.create_experiment(
@@ -172,13 +384,26 @@ async def startup_event():
         metrics=["mean_reciprocal_rank", "click_through_rate", "time_to_first_click"]
     )
     
-    logger.info("Application startup complete")
+    startup_state["ready"] = True
+    startup_state["startup_seconds"] = round(time.perf_counter() - started, 3)
+    if settings.WARM_UP_ON_STARTUP:
+        _warm_up_task = asyncio.create_task(warm_up())
+    
+    logger.info(
+        f"Application startup complete (imports {startup_state['import_seconds']}s, "
+        f"startup {startup_state['startup_seconds']}s)"
+    )
 
 # Shutdown event to clean up resources
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
+    startup_state["ready"] = False
+    if _warm_up_task is not None and not _warm_up_task.done():
+        _warm_up_task.cancel()
     agent_manager.stop_all()
     logger.info("All agents stopped")
+    # The LLM judge's pooled client is created on first use and bound to this event loop
+    await close_llm_judge()
 
 # Health check endpoint
 @app.get("/health")
@@ -186,48 +411,266 @@ async def health_check():
     return {
         "status": "healthy", 
         "version": settings.APP_VERSION,
-        "agents": list(agent_manager.agents.keys()),
+        "agents": agent_manager.agent_names,
         "experiments": len(experiment_manager.experiments)
     }
 
+# Readiness probe
+@app.get("/ready")
+async def readiness_check(warm: bool = Query(False, description="Also require lazy subsystems to be loaded")):
+    """
+    Report whether the service can take traffic
+    
+    Returns 200 once startup has finished ("ready"); "warm" additionally
+    means lazy agents are built and heavy modules imported, so first requests
+    pay no initialization cost. With warm=true the probe fails until then.
+    """
+    body = dict(
+        startup_state,
+        status="warm" if startup_state["warm"] else ("ready" if startup_state["ready"] else "starting"),
+        pending_agents=agent_manager.pending
+    )
+    if not startup_state["ready"] or (warm and not startup_state["warm"]):
+        return FastJSONResponse(body, status_code=503)
+    return body
+
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    if not settings.ENABLE_METRICS:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # Search evaluation endpoint
 @app.post("/api/v1/evaluate", response_model=SearchEvaluationResponse)
-async def evaluate_search(request: SearchEvaluationRequest, background_tasks: BackgroundTasks):
+async def evaluate_search(request: SearchEvaluationRequest, mode: EvaluationMode = EvaluationMode.ASYNC):
+    """
+    Evaluate a single search
+    
+    In "sync" mode the search evaluation agent computes the metrics inline and
+    the final metrics are returned (and stored for the results endpoint); in
+    "async" mode the evaluation is only enqueued and the results are fetched
+    later from /api/v1/evaluation-results/{id}.
+    """
     try:
-        # Convert Pydantic models to dictionaries
+        search_eval_agent = agent_manager.get_agent("search_evaluator")
+        if not search_eval_agent:
+            raise HTTPException(status_code=503, detail="Search evaluation agent not available")
+        
+        # The only model-to-dict conversion for this request
         eval_data = request.dict()
         
-        # Dispatch evaluation task to the agent
-        await agent_manager.dispatch_task("search_evaluator", eval_data)
+        if request.callback_url:
+            pending_webhooks[request.id] = request.callback_url
         
-        # For demo purposes, calculate some metrics synchronously
-        quick_metrics = {
-            "mrr": mean_reciprocal_rank(
-                request.query, 
-                [r.dict() for r in request.results], 
-                request.relevance_judgments or {}
-            ),
-            "ctr": click_through_rate(
-                request.query, 
-                [r.dict() for r in request.results], 
-                [i.dict() for i in request.user_interactions]
-            )
-        }
+        if mode == EvaluationMode.SYNC:
+            metrics = await search_eval_agent.process(eval_data)
+            return SearchEvaluationResponse(id=request.id, metrics=metrics, status="complete")
         
-        return SearchEvaluationResponse(
-            id=request.id,
-            metrics=quick_metrics,
-            status="processing"
-        )
+        await agent_manager.dispatch_task("search_evaluator", eval_data)
+        return SearchEvaluationResponse(id=request.id, metrics={}, status="processing")
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error evaluating search: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error evaluating search: {str(e)}")
 
+# Bulk search evaluation endpoint
+@app.post("/api/v1/evaluate/bulk", response_model=BulkEvaluationResponse)
+async def evaluate_search_bulk(request: Request):
+    """
+    Evaluate many queries in one request
+    
+    Accepts either a JSON body ({"items": [...], "k": 10}) or an NDJSON body
+    (Content-Type: application/x-ndjson) with one SearchEvaluationRequest per
+    line. All items are scored together with array-based metric computation.
+    """
+    try:
+        content_length = request.headers.get("content-length")
+        if content_length:
+            try:
+                declared_length = int(content_length)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+            if declared_length > settings.MAX_BULK_REQUEST_BYTES:
+                raise HTTPException(status_code=413, detail="Request body too large")
+        
+        # Chunked uploads declare no length, so count while reading and stop at the limit
+        chunks = []
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > settings.MAX_BULK_REQUEST_BYTES:
+                raise HTTPException(status_code=413, detail="Request body too large")
+            chunks.append(chunk)
+        body = b"".join(chunks)
+        
+        try:
+            k = int(request.query_params.get("k", 10))
+        except ValueError:
+            raise HTTPException(status_code=422, detail="k must be an integer")
+        try:
+            if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+                items = [
+                    SearchEvaluationRequest.parse_obj(loads(line))
+                    for line in body.splitlines() if line.strip()
+                ]
+            else:
+                bulk_request = BulkEvaluationRequest.parse_obj(loads(body))
+                items = bulk_request.items
+                k = bulk_request.k
+        except (ValidationError, ValueError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid bulk evaluation request: {str(e)}")
+        
+        if len(items) > settings.MAX_BULK_ITEMS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Too many items: {len(items)} (maximum {settings.MAX_BULK_ITEMS})"
+            )
+        
+        metrics = batch_search_metrics([item.dict() for item in items], k=k)
+        
+        # Plain dicts matching BulkEvaluationResponse, serialized without
+        # building and re-encoding one model per item
+        columns = {name: values.tolist() for name, values in metrics.items()}
+        results = [
+            {
+                "id": item.id,
+                "metrics": {name: values[i] for name, values in columns.items()},
+                "status": "complete"
+            }
+            for i, item in enumerate(items)
+        ]
+        
+        aggregates = RunningMetricAggregates()
+        aggregates.update(metrics)
+        
+        return FastJSONResponse({
+            "count": len(items),
+            "results": results,
+            "aggregates": aggregates.summary(),
+            "status": "success"
+        })
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in bulk evaluation: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error in bulk evaluation: {str(e)}")
+
+class IncrementalStreamingResponse(StreamingResponse):
+    """
+    Streaming response that can be produced while the request body is still being read
+    
+    StreamingResponse listens for client disconnects by consuming receive(),
+    which would swallow request body chunks; here the body iterator itself
+    raises ClientDisconnect, so the listener is not needed.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+async def _iter_ndjson_lines(request: Request, max_line_bytes: int) -> AsyncIterator[bytes]:
+    """Yield complete NDJSON lines from the request body as chunks arrive"""
+    # Only the unfinished line is carried between chunks, in a bytearray, so
+    # a line split over many small chunks is not re-copied for each one
+    remainder = bytearray()
+    async for chunk in request.stream():
+        start = 0
+        end = chunk.find(b"\n")
+        while end != -1:
+            if remainder:
+                remainder += chunk[start:end]
+                line = bytes(remainder)
+                remainder.clear()
+            else:
+                line = chunk[start:end]
+            if len(line) > max_line_bytes:
+                raise ValueError("NDJSON line too long")
+            if line.strip():
+                yield line
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        remainder += chunk[start:]
+        if len(remainder) > max_line_bytes:
+            raise ValueError("NDJSON line too long")
+    if remainder.strip():
+        yield bytes(remainder)
+
+# Streaming search evaluation endpoint
+@app.post("/api/v1/evaluate/stream")
+async def evaluate_search_stream(request: Request, k: int = 10, chunk_size: int = 500):
+    """
+    Evaluate an NDJSON stream of SearchEvaluationRequest items
+    
+    Lines are parsed incrementally as the body arrives and evaluated in chunks
+    of chunk_size; each chunk's results are streamed back as NDJSON before the
+    next chunk is read, so memory stays flat regardless of payload size.
+    Invalid lines produce an error record instead of failing the stream, and
+    the final line carries the aggregates over all evaluated items.
+    """
+    chunk_size = max(1, min(chunk_size, settings.BATCH_SIZE))
+    
+    def evaluate_chunk(items: List[SearchEvaluationRequest], aggregates: RunningMetricAggregates) -> bytes:
+        metrics = batch_search_metrics([item.dict() for item in items], k=k)
+        aggregates.update(metrics)
+        columns = {name: values.tolist() for name, values in metrics.items()}
+        return b"".join(
+            dumps({
+                "id": item.id,
+                "metrics": {name: values[i] for name, values in columns.items()},
+                "status": "complete"
+            }) + b"\n"
+            for i, item in enumerate(items)
+        )
+    
+    async def stream_results() -> AsyncIterator[bytes]:
+        aggregates = RunningMetricAggregates()
+        pending: List[SearchEvaluationRequest] = []
+        line_number = 0
+        errors = 0
+        try:
+            async for line in _iter_ndjson_lines(request, settings.MAX_NDJSON_LINE_BYTES):
+                line_number += 1
+                try:
+                    pending.append(SearchEvaluationRequest.parse_obj(loads(line)))
+                except (ValidationError, ValueError) as e:
+                    errors += 1
+                    yield dumps({"line": line_number, "status": "error", "error": str(e)}) + b"\n"
+                    continue
+                if len(pending) >= chunk_size:
+                    # Metric computation is CPU-bound; keep it off the event loop
+                    yield await run_in_threadpool(evaluate_chunk, pending, aggregates)
+                    pending = []
+            if pending:
+                yield await run_in_threadpool(evaluate_chunk, pending, aggregates)
+        except Exception as e:
+            logger.error(f"Error in streaming evaluation: {str(e)}")
+            yield dumps({"status": "error", "error": str(e)}) + b"\n"
+            return
+        
+        yield dumps({
+            "status": "summary",
+            "count": aggregates.count,
+            "errors": errors,
+            "aggregates": aggregates.summary()
+        }) + b"\n"
+    
+    return IncrementalStreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 # A/B test analysis endpoint
 @app.post("/api/v1/analyze-ab-test", response_model=ABTestResponse)
 async def analyze_ab_test(request: ABTestRequest):
     try:
+        group_ids = [request.control_group.group_id, request.treatment_group.group_id]
+        group_ids += [group.group_id for group in request.treatment_groups or []]
+        if len(set(group_ids)) < len(group_ids):
+            raise HTTPException(status_code=422, detail="Experiment groups must have distinct group_id values")
+        
         # Convert request to dictionary
         test_data = request.dict()
         
@@ -242,6 +685,8 @@ async def analyze_ab_test(request: ABTestRequest):
             status="accepted"
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing A/B test: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error analyzing A/B test: {str(e)}")
@@ -251,7 +696,7 @@ async def analyze_ab_test(request: ABTestRequest):
 async def get_evaluation_results(evaluation_id: str):
     try:
         # Get results from the agent
-        search_eval_agent = agent_manager.agents.get("search_evaluator")
+        search_eval_agent = agent_manager.get_agent("search_evaluator")
         if not search_eval_agent:
             raise HTTPException(status_code=404, detail="Search evaluation agent not found")
         
@@ -276,7 +721,7 @@ async def get_evaluation_results(evaluation_id: str):
 async def get_ab_test_results(experiment_id: str):
     try:
         # Get results from the agent
-        ab_test_agent = agent_manager.agents.get("ab_tester")
+        ab_test_agent = agent_manager.get_agent("ab_tester")
         if not ab_test_agent:
             raise HTTPException(status_code=404, detail="A/B test agent not found")
         
@@ -296,20 +741,93 @@ async def get_ab_test_results(experiment_id: str):
         logger.error(f"Error retrieving A/B test results: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving A/B test results: {str(e)}")
 
+# Push delivery of results (replaces polling the results endpoints)
+@app.get("/api/v1/evaluation-results/{evaluation_id}/events")
+async def stream_evaluation_results(evaluation_id: str, timeout: float = 60.0):
+    return _result_event_stream("evaluation", evaluation_id, min(timeout, settings.AGENT_TIMEOUT))
+
+@app.get("/api/v1/ab-test-results/{experiment_id}/events")
+async def stream_ab_test_results(experiment_id: str, timeout: float = 60.0):
+    return _result_event_stream("ab_test", experiment_id, min(timeout, settings.AGENT_TIMEOUT))
+
+@app.websocket("/api/v1/ws/results")
+async def results_websocket(websocket: WebSocket):
+    """
+    Multiplexed result subscriptions over a single WebSocket
+    
+    Clients send {"kind": "evaluation" | "ab_test", "id": "...", "timeout": 60}
+    and receive {"kind", "id", "status", "result"} once each result is ready.
+    """
+    await websocket.accept()
+    watchers = set()
+    
+    async def deliver(kind: str, key: str, timeout: float):
+        result = await _wait_for_result(kind, key, timeout)
+        await websocket.send_json({
+            "kind": kind,
+            "id": key,
+            "status": "complete" if result is not None else "timeout",
+            "result": _result_payload(kind, key, result) if result is not None else None
+        })
+    
+    try:
+        while True:
+            text = await websocket.receive_text()
+            # A malformed message gets an error frame; the socket and its other subscriptions stay open
+            try:
+                message = loads(text)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await websocket.send_json({"status": "error", "error": "Subscription must be a JSON object"})
+                continue
+            kind, key = message.get("kind"), message.get("id")
+            if kind not in RESULT_SOURCES or not key or not isinstance(key, str):
+                await websocket.send_json({"status": "error", "error": f"Invalid subscription: {message}"})
+                continue
+            try:
+                timeout = float(message.get("timeout", 60.0))
+            except (TypeError, ValueError):
+                timeout = float("nan")
+            # Also rejects NaN
+            if not timeout > 0:
+                await websocket.send_json({"status": "error", "error": f"Invalid timeout: {message.get('timeout')}"})
+                continue
+            timeout = min(timeout, settings.AGENT_TIMEOUT)
+            task = asyncio.create_task(deliver(kind, key, timeout))
+            watchers.add(task)
+            task.add_done_callback(watchers.discard)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in watchers:
+            task.cancel()
+
 # LLM Judge endpoint
 @app.post("/api/v1/llm-judge")
 async def llm_judge_evaluation(request: LLMJudgeRequest):
     try:
         # Default evaluation criteria if none provided
         if not request.evaluation_criteria:
-            request.evaluation_criteria = ["relevance", "factuality", "completeness"]
+            request.evaluation_criteria = DEFAULT_LLM_JUDGE_CRITERIA
         
         # Evaluate the search results using LLM
-        judgments = await evaluate_search_results(
-            request.query, 
-            request.documents, 
-            request.evaluation_criteria
-        )
+        with usage_scope(request.experiment_id):
+            if request.cascade:
+                judgments = await get_cascade_judge().evaluate(
+                    request.query,
+                    request.documents,
+                    request.evaluation_criteria,
+                    listwise=request.listwise
+                )
+            else:
+                judgments = await evaluate_search_results(
+                    request.query, 
+                    request.documents, 
+                    request.evaluation_criteria,
+                    cache_only=request.cache_only,
+                    listwise=request.listwise
+                )
         
         # Calculate average score
         avg_score = 0
@@ -317,22 +835,140 @@ async def llm_judge_evaluation(request: LLMJudgeRequest):
             total = 0
             count = 0
             for j in judgments:
-                if "overall_score" in j:
+                # Failed and uncached (cache_only) judgments carry a placeholder score of 0
+                if "overall_score" in j and "error" not in j:
                     total += j["overall_score"]
                     count += 1
             if count > 0:
                 avg_score = total / count
         
-        return {
+        return FastJSONResponse({
             "query": request.query,
             "judgments": judgments,
             "average_score": avg_score
-        }
+        })
     
     except Exception as e:
         logger.error(f"Error in LLM judge evaluation: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error in LLM judge evaluation: {str(e)}")
 
+# Streaming LLM Judge endpoint
+@app.post("/api/v1/llm-judge/stream")
+async def llm_judge_stream(request: LLMJudgeRequest, format: StreamFormat = StreamFormat.NDJSON):
+    """
+    Stream LLM judgments as each one completes
+    
+    Takes the same body as /api/v1/llm-judge. Every judgment is sent as soon
+    as its call returns (cached ones first), with its document index and the
+    running average score, so one slow call does not hold back the rest. The
+    last record is a summary. format=ndjson sends one JSON object per line;
+    format=sse sends "judgment", "summary" and "error" events, with
+    keepalive comments while calls are outstanding.
+    """
+    if request.cascade:
+        raise HTTPException(status_code=400, detail="Cascaded judging cannot be streamed; use /api/v1/llm-judge")
+    criteria = request.evaluation_criteria or DEFAULT_LLM_JUDGE_CRITERIA
+    sse = format == StreamFormat.SSE
+    
+    def encode(event: str, payload: Dict[str, Any]) -> bytes:
+        if sse:
+            return b"event: " + event.encode() + b"\ndata: " + dumps(payload) + b"\n\n"
+        return dumps(payload) + b"\n"
+    
+    async def events() -> AsyncIterator[bytes]:
+        completed = scored = errors = 0
+        total = 0.0
+        with usage_scope(request.experiment_id):
+            try:
+                async for item in stream_search_results(
+                    request.query,
+                    request.documents,
+                    criteria,
+                    cache_only=request.cache_only,
+                    listwise=request.listwise,
+                    heartbeat=SSE_KEEPALIVE_SECONDS if sse else None
+                ):
+                    if item is None:
+                        yield b": keepalive\n\n"
+                        continue
+                    index, judgment = item
+                    completed += 1
+                    # Failed and uncached judgments are reported but not averaged
+                    if "error" in judgment:
+                        errors += 1
+                    else:
+                        total += judgment.get("overall_score", 0)
+                        scored += 1
+                    yield encode("judgment", {
+                        "status": "complete",
+                        "index": index,
+                        "judgment": judgment,
+                        "completed": completed,
+                        "total": len(request.documents),
+                        "average_score": total / scored if scored else 0
+                    })
+            except Exception as e:
+                logger.error(f"Error in streaming LLM judge evaluation: {str(e)}")
+                yield encode("error", {"status": "error", "error": str(e)})
+                return
+        
+        yield encode("summary", {
+            "status": "summary",
+            "query": request.query,
+            "count": completed,
+            "errors": errors,
+            "average_score": total / scored if scored else 0
+        })
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Pairwise LLM ranking endpoint
+@app.post("/api/v1/llm-judge/pairwise")
+async def llm_judge_pairwise(request: LLMPairwiseRequest):
+    """
+    Rank documents by pairwise LLM preference
+    
+    Uses a merge sort with the LLM as the comparator, so n documents cost
+    at most about n log2 n comparisons. The response has the ranked doc_ids,
+    their indices into the request's documents, and comparison counts
+    next to the all-pairs count for reference.
+    """
+    criteria = request.evaluation_criteria or DEFAULT_LLM_JUDGE_CRITERIA
+    try:
+        with usage_scope(request.experiment_id):
+            result = await PairwiseJudge(both_orders=request.both_orders).rank(
+                request.query, request.documents, criteria
+            )
+    except Exception as e:
+        logger.error(f"Error in pairwise LLM judge ranking: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error in pairwise LLM judge ranking: {str(e)}")
+    
+    n = len(request.documents)
+    return FastJSONResponse(dict(result, query=request.query, all_pairs=n * (n - 1) // 2))
+
+@app.get("/api/v1/llm-judge/cache-stats")
+async def llm_judge_cache_stats():
+    cache = get_judgment_cache()
+    if cache is None:
+        raise HTTPException(status_code=404, detail="LLM judgment cache is disabled")
+    # Counting entries waits for queued writes and reads SQLite
+    return await asyncio.get_running_loop().run_in_executor(None, cache.stats)
+
+@app.get("/api/v1/llm-judge/usage")
+async def llm_judge_usage(model: Optional[str] = None, experiment_id: Optional[str] = None):
+    return {
+        "usage": usage_tracker.summary(model, experiment_id),
+        "total": usage_tracker.totals(model, experiment_id)
+    }
+
+@app.get("/api/v1/llm-judge/cascade-stats")
+async def llm_judge_cascade_stats():
+    return get_cascade_judge().stats.to_dict()
+
 # Experiment endpoints
 @app.post("/api/v1/experiments", response_model=ExperimentResponse)
 async def create_experiment(request: CreateExperimentRequest):
@@ -355,25 +991,72 @@ async def create_experiment(request: CreateExperimentRequest):
 
 @app.get("/api/v1/experiments", response_model=List[ExperimentResponse])
 async def list_experiments(
+    request: Request,
     status: Optional[ExperimentStatus] = None,
-    owner: Optional[str] = None
+    owner: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None
 ):
+    """
+    List experiments, newest first
+    
+    With limit set, the response holds one page and the cursor for the next
+    page is returned in the X-Next-Cursor header (and a Link rel="next").
+    """
     try:
-        experiments = experiment_manager.list_experiments(status=status, owner=owner)
-        return [ExperimentResponse(**exp.to_dict()) for exp in experiments]
+        try:
+            experiments, next_cursor = experiment_manager.page_experiments(
+                status=status, owner=owner, limit=limit, cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # Unchanged collections are answered before anything is serialized
+        etag, last_modified = experiment_validators(
+            experiments, experiment_manager.revision, experiment_manager.changed_at
+        )
+        headers = conditional_headers(etag, last_modified)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(headers)
+        
+        # Project straight to the ExperimentResponse fields; to_dict() already
+        # yields JSON-ready values, so the response model pass is skipped
+        fields = list(ExperimentResponse.__fields__)
+        return await cached_json_response(
+            response_cache, "experiments", f"list:{status}:{owner}:{limit}:{cursor}:{etag}",
+            lambda: [
+                {name: data.get(name) for name in fields}
+                for data in (exp.to_dict() for exp in experiments)
+            ],
+            headers
+        )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing experiments: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error listing experiments: {str(e)}")
 
 @app.get("/api/v1/experiments/{experiment_id}", response_model=ExperimentResponse)
-async def get_experiment(experiment_id: str):
+async def get_experiment(experiment_id: str, request: Request):
     try:
         experiment = experiment_manager.get_experiment(experiment_id)
         if not experiment:
             raise HTTPException(status_code=404, detail=f"Experiment not found: {experiment_id}")
         
-        return ExperimentResponse(**experiment.to_dict())
+        etag, last_modified = experiment_validators([experiment])
+        headers = conditional_headers(etag, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(headers)
+        
+        return await cached_json_response(
+            response_cache, "experiments", f"{experiment_id}:{etag}",
+            lambda: jsonable_encoder(ExperimentResponse(**experiment.to_dict())),
+            headers
+        )
     
     except HTTPException:
         raise
@@ -381,6 +1064,50 @@ async def get_experiment(experiment_id: str):
         logger.error(f"Error getting experiment: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting experiment: {str(e)}")
 
+@app.post("/api/v1/experiments/{experiment_id}/sample-size")
+async def plan_experiment_sample_size(experiment_id: str, request: SampleSizeRequest):
+    try:
+        experiment = experiment_manager.get_experiment(experiment_id)
+        if not experiment:
+            raise HTTPException(status_code=404, detail=f"Experiment not found: {experiment_id}")
+        
+        from opensearcheval.utils.stats import ratio_metric_std, sample_size_grid
+        
+        metric_names = list(request.metrics)
+        means, stds = [], []
+        for name in metric_names:
+            baseline = request.metrics[name]
+            if baseline.numerator_mean is not None and baseline.denominator_mean is not None:
+                mean, std = ratio_metric_std(
+                    baseline.numerator_mean, baseline.numerator_std or 0.0,
+                    baseline.denominator_mean, baseline.denominator_std or 0.0,
+                    baseline.covariance
+                )
+            elif baseline.mean is not None and baseline.std is not None:
+                mean, std = baseline.mean, baseline.std
+            else:
+                raise HTTPException(status_code=422, detail=f"Incomplete baseline for metric: {name}")
+            means.append(mean)
+            stds.append(std)
+        
+        plan = sample_size_grid(
+            means, stds, request.min_detectable_effects,
+            alpha=request.alphas or [round(1 - experiment.confidence_level, 10)],
+            power=request.powers,
+            traffic_split=experiment.traffic_split
+        )
+        if "error" in plan:
+            raise HTTPException(status_code=422, detail=plan["error"])
+        
+        plan["axes"]["metric"] = metric_names
+        return {"experiment_id": experiment_id, "plan": plan}
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error planning sample size: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error planning sample size: {str(e)}")
+
 @app.post("/api/v1/experiments/{experiment_id}/start")
 async def start_experiment(experiment_id: str):
     try:
@@ -457,7 +1184,7 @@ async def analyze_user_behavior(
 @app.get("/api/v1/user-behavior/{session_id}")
 async def get_user_behavior_analysis(session_id: str):
     try:
-        user_behavior_agent = agent_manager.agents.get("user_behavior_analyzer")
+        user_behavior_agent = agent_manager.get_agent("user_behavior_analyzer")
         if not user_behavior_agent:
             raise HTTPException(status_code=404, detail="User behavior agent not found")
         
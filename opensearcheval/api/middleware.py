@@ -0,0 +1,314 @@
+import asyncio
+import gzip
+import json
+import math
+import logging
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from opensearcheval.core.config import get_settings
+from opensearcheval.utils.monitoring import ADMISSION_IN_FLIGHT, ADMISSION_WAITING, ADMISSION_REJECTED
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Route classes as (name, path prefixes, share of MAX_CONCURRENT_REQUESTS).
+# Every class gets its own slots and wait queue, so a burst of heavy LLM judge
+# or A/B analysis calls can never take the slots of cheap endpoints.
+ROUTE_BUDGETS: Tuple[Tuple[str, Tuple[str, ...], float], ...] = (
+    ("llm_judge", ("/api/v1/llm-judge",), 0.2),
+    ("ab_test", ("/api/v1/analyze-ab-test",), 0.2),
+    ("bulk", ("/api/v1/evaluate/bulk", "/api/v1/evaluate/stream"), 0.1),
+)
+DEFAULT_ROUTE_CLASS = "default"
+
+# Never queued or shed: probes, metrics, docs and long-lived result
+# subscriptions, which only wait on an event
+EXEMPT_PATHS = frozenset({"/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json"})
+EXEMPT_SUFFIXES = ("/events",)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class ConcurrencyLimiter:
+    """
+    Limit on concurrent requests with a bounded FIFO wait queue
+
+    Requests are admitted immediately while slots are free. Otherwise they wait
+    in a queue of at most max_waiting entries; a full queue is rejected with
+    429 and a wait longer than the timeout with 503.
+    """
+
+    def __init__(self, name: str, limit: int, max_waiting: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_waiting = max(0, max_waiting)
+        self.active = 0
+        self._waiters = deque()
+        self._in_flight = ADMISSION_IN_FLIGHT.child(name)
+        self._waiting = ADMISSION_WAITING.child(name)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float):
+        """
+        Wait for a slot
+
+        Raises:
+            AdmissionRejected: If the wait queue is full or the timeout expires
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._in_flight.set(self.active)
+            return
+
+        if len(self._waiters) >= self.max_waiting:
+            raise AdmissionRejected(429, f"Too many concurrent {self.name} requests")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._waiting.set(len(self._waiters))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            # A slot may have been handed over just as the timeout fired
+            if future.done() and not future.cancelled():
+                return
+            raise AdmissionRejected(503, f"Timed out waiting for a {self.name} request slot")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            if future in self._waiters:
+                self._waiters.remove(future)
+            self._waiting.set(len(self._waiters))
+
+    def release(self):
+        """Free a slot, handing it straight to the oldest waiter if there is one"""
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+        self._in_flight.set(self.active)
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying per-route-class concurrency limits
+
+    MAX_CONCURRENT_REQUESTS is split between the route classes in ROUTE_BUDGETS,
+    with the remainder going to all other routes. ADMISSION_QUEUE_SIZE is split
+    the same way. Shed requests get 429 (queue full) or 503 (queue timeout),
+    both with a Retry-After header.
+    """
+
+    def __init__(self, app, max_concurrent: Optional[int] = None, queue_size: Optional[int] = None,
+                 queue_timeout: Optional[float] = None,
+                 budgets: Tuple[Tuple[str, Tuple[str, ...], float], ...] = ROUTE_BUDGETS):
+        self.app = app
+        max_concurrent = max_concurrent or settings.MAX_CONCURRENT_REQUESTS
+        queue_size = settings.ADMISSION_QUEUE_SIZE if queue_size is None else queue_size
+        self.queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+
+        self.prefixes = []
+        self.limiters: Dict[str, ConcurrencyLimiter] = {}
+        remaining_share = 1.0
+        for name, prefixes, share in budgets:
+            self.limiters[name] = ConcurrencyLimiter(
+                name, int(max_concurrent * share), int(queue_size * share)
+            )
+            self.prefixes.extend((prefix, name) for prefix in prefixes)
+            remaining_share -= share
+        self.limiters[DEFAULT_ROUTE_CLASS] = ConcurrencyLimiter(
+            DEFAULT_ROUTE_CLASS,
+            int(max_concurrent * remaining_share),
+            int(queue_size * remaining_share)
+        )
+
+        # Longest prefix first so /api/v1/evaluate/bulk is not matched as /api/v1/evaluate
+        self.prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+        self._rejected = {
+            (name, status): ADMISSION_REJECTED.child(name, str(status))
+            for name in self.limiters for status in (429, 503)
+        }
+
+    def route_class(self, path: str) -> Optional[str]:
+        """Route class for a request path, or None if the path is exempt"""
+        if path in EXEMPT_PATHS or path.endswith(EXEMPT_SUFFIXES):
+            return None
+        for prefix, name in self.prefixes:
+            if path.startswith(prefix):
+                return name
+        return DEFAULT_ROUTE_CLASS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        name = self.route_class(scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[name]
+        try:
+            await limiter.acquire(self.queue_timeout)
+        except AdmissionRejected as e:
+            self._rejected[(name, e.status_code)].inc()
+            logger.warning(f"Admission control rejected {scope['path']}: {e.detail}")
+            await self._reject(send, e)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    async def _reject(self, send, error: AdmissionRejected):
+        retry_after = 1 if error.status_code == 429 else max(1, math.ceil(self.queue_timeout))
+        body = json.dumps({"detail": error.detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": error.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# Streams are left alone: compressing them would buffer events until a
+# compressor block fills up
+UNCOMPRESSED_MEDIA_TYPES = ("text/event-stream", "application/x-ndjson")
+COMPRESSIBLE_MEDIA_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Content codings the client accepts (q > 0)"""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _vary_with_accept_encoding(headers) -> bytes:
+    """Merge the response's Vary headers (e.g. Origin from CORS) and add Accept-Encoding"""
+    fields = []
+    for name, value in headers:
+        if name == b"vary":
+            fields.extend(field.strip() for field in value.decode("latin-1").split(",") if field.strip())
+    if "*" not in fields and "accept-encoding" not in (field.lower() for field in fields):
+        fields.append("Accept-Encoding")
+    return ", ".join(fields).encode("latin-1")
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete response bodies with brotli or gzip
+
+    Only single-message bodies of at least minimum_size bytes and a
+    compressible media type are compressed; brotli is preferred when the
+    optional brotli package is installed and the client accepts it.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None, gzip_level: int = 5, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        accepted = _accepted_encodings(accept_encoding)
+        if brotli is not None and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            passthrough = True
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._should_compress(start_message, body):
+                await send(start_message)
+                await send(message)
+                return
+
+            if encoding == "br":
+                compressed = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+            headers = [
+                (name, value) for name, value in start_message["headers"]
+                if name not in (b"content-length", b"vary")
+            ]
+            headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"content-length", str(len(compressed)).encode()))
+            headers.append((b"vary", _vary_with_accept_encoding(start_message["headers"])))
+            await send(dict(start_message, headers=headers))
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, start_message, body: bytes) -> bool:
+        if len(body) < self.minimum_size or start_message["status"] in (204, 304):
+            return False
+        content_type = ""
+        for name, value in start_message["headers"]:
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value.decode("latin-1").lower()
+        if content_type.startswith(UNCOMPRESSED_MEDIA_TYPES):
+            return False
+        return content_type.startswith(COMPRESSIBLE_MEDIA_TYPES)
@@ -3,8 +3,14 @@ from typing import List, Dict, Any, Optional
 import time
 
 from opensearcheval.core.agent import AgentManager
+from opensearcheval.api.serialization import FastJSONResponse, FastJSONRoute
 
-router = APIRouter(prefix="/api/v1", tags=["analytics"])
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["analytics"],
+    route_class=FastJSONRoute,
+    default_response_class=FastJSONResponse
+)
 
 # Get AgentManager instance
 def get_agent_manager():
@@ -38,7 +44,7 @@ async def get_user_behavior_analysis(
     session_id: str,
     agent_manager: AgentManager = Depends(get_agent_manager)
 ):
-    user_behavior_agent = agent_manager.agents.get("user_behavior_analyzer")
+    user_behavior_agent = agent_manager.get_agent("user_behavior_analyzer")
     if not user_behavior_agent:
         raise HTTPException(status_code=404, detail="User behavior agent not found")
     
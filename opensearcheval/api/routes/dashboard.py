@@ -1,9 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import List, Dict, Any, Optional
+import datetime
 
 from opensearcheval.core.experiment import ExperimentManager
+from opensearcheval.utils.cache import ResponseCache
+from opensearcheval.api.serialization import FastJSONResponse, FastJSONRoute, cached_json_response
+from opensearcheval.api.conditional import (
+    experiment_validators, conditional_headers, is_not_modified, not_modified_response
+)
 
-router = APIRouter(prefix="/api/v1/dashboard", tags=["dashboard"])
+router = APIRouter(
+    prefix="/api/v1/dashboard",
+    tags=["dashboard"],
+    route_class=FastJSONRoute,
+    default_response_class=FastJSONResponse
+)
 
 # Get ExperimentManager instance
 def get_experiment_manager():
@@ -11,54 +22,81 @@ def get_experiment_manager():
     from opensearcheval.api.main import experiment_manager
     return experiment_manager
 
+def get_response_cache():
+    from opensearcheval.api.main import response_cache
+    return response_cache
+
 @router.get("/summary")
 async def get_dashboard_summary(
-    manager: ExperimentManager = Depends(get_experiment_manager)
+    request: Request,
+    manager: ExperimentManager = Depends(get_experiment_manager),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """Get a summary of system metrics for the dashboard"""
     # List all experiments
     all_experiments = manager.list_experiments()
-    running_experiments = [e for e in all_experiments if e.status == "running"]
-    completed_experiments = [e for e in all_experiments if e.status == "completed"]
     
-    # Prepare summary data
-    return {
-        "experiments": {
-            "total": len(all_experiments),
-            "running": len(running_experiments),
-            "completed": len(completed_experiments)
-        },
-        "latest_experiments": [
-            {
-                "id": e.id,
-                "name": e.name,
-                "status": e.status,
-                "created_at": e.created_at.isoformat()
-            } 
-            for e in sorted(all_experiments, key=lambda x: x.created_at, reverse=True)[:5]
-        ]
-    }
+    etag, last_modified = experiment_validators(all_experiments, manager.revision, manager.changed_at)
+    headers = conditional_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+    
+    def build_summary():
+        running_experiments = [e for e in all_experiments if e.status == "running"]
+        completed_experiments = [e for e in all_experiments if e.status == "completed"]
+        
+        # Prepare summary data
+        return {
+            "experiments": {
+                "total": len(all_experiments),
+                "running": len(running_experiments),
+                "completed": len(completed_experiments)
+            },
+            "latest_experiments": [
+                {
+                    "id": e.id,
+                    "name": e.name,
+                    "status": e.status,
+                    "created_at": e.created_at.isoformat()
+                } 
+                for e in sorted(all_experiments, key=lambda x: x.created_at, reverse=True)[:5]
+            ]
+        }
+    
+    return await cached_json_response(cache, "experiments", f"dashboard:summary:{etag}", build_summary, headers)
 
 @router.get("/metrics-over-time/{experiment_id}")
 async def get_metrics_over_time(
     experiment_id: str,
     metric: str,
-    manager: ExperimentManager = Depends(get_experiment_manager)
+    request: Request,
+    manager: ExperimentManager = Depends(get_experiment_manager),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """Get metrics over time for a specific experiment"""
     experiment = manager.get_experiment(experiment_id)
     if not experiment:
         raise HTTPException(status_code=404, detail=f"Experiment not found: {experiment_id}")
     
+    etag, last_modified = experiment_validators([experiment])
+    headers = conditional_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+    
     # This is a mock implementation - in a real system you'd fetch time series data
     # For now, we'll return some dummy data
-    return {
-        "experiment_id": experiment_id,
-        "metric": metric,
-        "timestamps": [
-            (experiment.created_at + datetime.timedelta(hours=i)).isoformat()
-            for i in range(24)
-        ],
-        "control_values": [0.5 + (i * 0.01) for i in range(24)],
-        "treatment_values": [0.5 + (i * 0.015) for i in range(24)]
-    }
\ No newline at end of file
+    def build_metrics():
+        return {
+            "experiment_id": experiment_id,
+            "metric": metric,
+            "timestamps": [
+                (experiment.created_at + datetime.timedelta(hours=i)).isoformat()
+                for i in range(24)
+            ],
+            "control_values": [0.5 + (i * 0.01) for i in range(24)],
+            "treatment_values": [0.5 + (i * 0.015) for i in range(24)]
+        }
+    
+    return await cached_json_response(
+        cache, "experiments", f"dashboard:metrics:{experiment_id}:{metric}:{etag}", build_metrics, headers
+    )
@@ -0,0 +1,118 @@
+import json
+import math
+from typing import Any, Callable, Dict, Optional, Union
+
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.requests import Request
+
+from opensearcheval.utils.cache import ResponseCache
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Integer dict keys (e.g. relevance levels) and numpy values are common in results
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson is not None else 0
+
+
+def _default(obj: Any) -> Any:
+    """Encode types that neither json nor orjson handle natively"""
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    if hasattr(obj, "tolist"):
+        # numpy arrays and scalars on the stdlib path
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj: Any) -> Any:
+    """Replace NaN and infinities with None, as orjson does"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+def _stdlib_dumps(obj: Any, default: Callable[[Any], Any]) -> str:
+    return json.dumps(obj, default=default, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize to compact UTF-8 JSON, using orjson when it is installed
+
+    NaN and infinities become null on both paths (JSON has no literal for them).
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+    try:
+        return _stdlib_dumps(obj, _default).encode("utf-8")
+    except ValueError:
+        # Rare: only payloads with non-finite floats pay for the extra pass
+        return _stdlib_dumps(_finite(obj), lambda value: _finite(_default(value))).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when available
+
+    Endpoints returning large payloads can return this directly with plain
+    dicts/lists to also skip FastAPI's jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class FastJSONRequest(Request):
+    """Request whose JSON body is decoded with orjson when available"""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = loads(await self.body())
+        return self._json
+
+
+class FastJSONRoute(APIRoute):
+    """API route that decodes request bodies through FastJSONRequest"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def fast_json_handler(request: Request):
+            return await handler(FastJSONRequest(request.scope, request.receive))
+
+        return fast_json_handler
+
+
+async def cached_json_response(cache: Optional[ResponseCache], namespace: str, key: str,
+                               build: Callable[[], Any], headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serve a JSON body from the response cache, building and storing it on a miss
+
+    Args:
+        cache: Response cache (None disables caching)
+        namespace: Cache namespace, invalidated as a whole
+        key: Cache key within the namespace
+        build: Callable producing the JSON-compatible content
+        headers: Extra response headers
+    """
+    body = await cache.aget(namespace, key) if cache is not None else None
+    if body is None:
+        body = dumps(build())
+        if cache is not None:
+            await cache.aset(namespace, key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
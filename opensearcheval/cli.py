@@ -62,6 +62,36 @@ async def make_api_request(endpoint: str, method: str = "get", data: Optional[Di
         
         return response.json()
 
+async def wait_for_result_event(endpoint: str, timeout: float = 60.0) -> Optional[Dict[str, Any]]:
+    """
+    Wait for a result pushed over a Server-Sent Events endpoint
+    
+    Args:
+        endpoint: API events endpoint
+        timeout: Seconds to wait before giving up
+        
+    Returns:
+        Result data, or None if the server timed out
+    """
+    url = f"{API_BASE_URL}/{endpoint}"
+    
+    async with httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None)) as client:
+        async with client.stream("GET", url, params={"timeout": timeout}) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise Exception(f"API error: {response.status_code} - {response.text}")
+            
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:") and event == "result":
+                    return json.loads(line[len("data:"):])
+                elif line.startswith("data:") and event == "timeout":
+                    return None
+    
+    return None
+
 def evaluate_command(args):
     """Handle 'evaluate' command"""
     # Load search data from JSON file
@@ -83,39 +113,27 @@ def evaluate_command(args):
     print(f"Evaluation submitted with ID: {response['id']}")
     print(f"Initial metrics: {json.dumps(response['metrics'], indent=2)}")
     
-    # Poll for complete results if requested
+    # Wait for complete results if requested
     if args.wait:
         print("Waiting for complete results...")
-        complete = False
-        max_attempts = 10
-        attempt = 0
+        try:
+            complete_response = asyncio.run(wait_for_result_event(
+                f"api/v1/evaluation-results/{response['id']}/events"
+            ))
+        except Exception as e:
+            print(f"\nError waiting for results: {str(e)}")
+            return
         
-        while not complete and attempt < max_attempts:
-            try:
-                complete_response = asyncio.run(make_api_request(
-                    f"api/v1/evaluation-results/{response['id']}"
-                ))
-                
-                if complete_response.get("status") == "complete":
-                    complete = True
-                    print("\nComplete evaluation results:")
-                    print(json.dumps(complete_response['metrics'], indent=2))
-                    
-                    # Save results if output file specified
-                    if args.output_file:
-                        with open(args.output_file, 'w') as f:
-                            json.dump(complete_response, f, indent=2)
-                        print(f"Results saved to {args.output_file}")
-                else:
-                    print(".", end="", flush=True)
-                    asyncio.run(asyncio.sleep(1))
-            except Exception as e:
-                print(f"\nError polling for results: {str(e)}")
-                break
+        if complete_response:
+            print("\nComplete evaluation results:")
+            print(json.dumps(complete_response['metrics'], indent=2))
             
-            attempt += 1
-        
-        if not complete:
+            # Save results if output file specified
+            if args.output_file:
+                with open(args.output_file, 'w') as f:
+                    json.dump(complete_response, f, indent=2)
+                print(f"Results saved to {args.output_file}")
+        else:
             print("\nTimeout waiting for complete results. Try retrieving them later with:")
             print(f"opensearcheval results {response['id']}")
 
@@ -218,36 +236,24 @@ def experiment_command(args):
         # Wait for results if requested
         if args.wait:
             print("Waiting for analysis results...")
-            complete = False
-            max_attempts = 10
-            attempt = 0
+            try:
+                complete_response = asyncio.run(wait_for_result_event(
+                    f"api/v1/ab-test-results/{response['experiment_id']}/events"
+                ))
+            except Exception as e:
+                print(f"\nError waiting for results: {str(e)}")
+                return
             
-            while not complete and attempt < max_attempts:
-                try:
-                    complete_response = asyncio.run(make_api_request(
-                        f"api/v1/ab-test-results/{response['experiment_id']}"
-                    ))
-                    
-                    if complete_response.get("status") == "complete":
-                        complete = True
-                        print("\nAnalysis results:")
-                        print(json.dumps(complete_response['results'], indent=2))
-                        
-                        # Save results if output file specified
-                        if args.output_file:
-                            with open(args.output_file, 'w') as f:
-                                json.dump(complete_response, f, indent=2)
-                            print(f"Results saved to {args.output_file}")
-                    else:
-                        print(".", end="", flush=True)
-                        asyncio.run(asyncio.sleep(1))
-                except Exception as e:
-                    print(f"\nError polling for results: {str(e)}")
-                    break
+            if complete_response:
+                print("\nAnalysis results:")
+                print(json.dumps(complete_response['results'], indent=2))
                 
-                attempt += 1
-            
-            if not complete:
+                # Save results if output file specified
+                if args.output_file:
+                    with open(args.output_file, 'w') as f:
+                        json.dump(complete_response, f, indent=2)
+                    print(f"Results saved to {args.output_file}")
+            else:
                 print("\nTimeout waiting for analysis results. Try retrieving them later.")
 
 def llm_judge_command(args):
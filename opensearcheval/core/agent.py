@@ -1,10 +1,59 @@
 import asyncio
-from typing import Dict, List, Any, Callable, Optional
+import inspect
+import json
+import time
+from typing import Dict, List, Any, Callable, Optional, Tuple
 import logging
 from abc import ABC, abstractmethod
 
+from opensearcheval.utils.cache import ResponseCache, payload_hash
+from opensearcheval.utils.monitoring import (
+    AGENT_QUEUE_DEPTH, AGENT_QUEUE_WAIT, AGENT_TASK_DURATION, METRIC_COMPUTE_DURATION
+)
+
 logger = logging.getLogger(__name__)
 
+def metric_name(metric_func: Callable) -> str:
+    """Get the reporting name of a metric function (unwrapping functools.partial)"""
+    return getattr(metric_func, "__name__", None) or metric_name(metric_func.func)
+
+class ResultNotifier:
+    """Pushes finished agent results to subscribers waiting on them"""
+    
+    def __init__(self):
+        self._waiters: Dict[Tuple[str, Any], List[asyncio.Future]] = {}
+    
+    def publish(self, channel: str, key: Any, result: Any):
+        """Deliver a result to everyone waiting on (channel, key)"""
+        for future in self._waiters.pop((channel, key), []):
+            if not future.done():
+                future.set_result(result)
+    
+    async def wait_for(self, channel: str, key: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Wait until a result is published for (channel, key)
+        
+        Raises:
+            asyncio.TimeoutError: If no result is published within timeout seconds
+        """
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._waiters.setdefault((channel, key), [])
+        waiters.append(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        finally:
+            if not future.done():
+                future.cancel()
+                if future in waiters:
+                    waiters.remove(future)
+                if not waiters:
+                    self._waiters.pop((channel, key), None)
+    
+    def subscriber_count(self, channel: str, key: Any) -> int:
+        """Number of subscribers currently waiting on (channel, key)"""
+        return len(self._waiters.get((channel, key), []))
+
+
 class Agent(ABC):
     """Base agent class for search evaluation tasks."""
     
@@ -13,6 +62,10 @@ class Agent(ABC):
         self.config = config
         self.tasks = []
         self.running = False
+        self.notifier: Optional[ResultNotifier] = None
+        self._queue_depth = AGENT_QUEUE_DEPTH.child(name)
+        self._queue_wait = AGENT_QUEUE_WAIT.child(name)
+        self._task_duration = AGENT_TASK_DURATION.child(name)
         logger.info(f"Agent {name} initialized with config: {config}")
     
     @abstractmethod
@@ -26,8 +79,12 @@ class Agent(ABC):
         logger.info(f"Agent {self.name} started")
         while self.running:
             if self.tasks:
-                task = self.tasks.pop(0)
+                enqueued_at, task = self.tasks.pop(0)
+                self._queue_depth.set(len(self.tasks))
+                started = time.perf_counter()
+                self._queue_wait.observe(started - enqueued_at)
                 await self.process(task)
+                self._task_duration.observe(time.perf_counter() - started)
             else:
                 await asyncio.sleep(0.1)
     
@@ -36,9 +93,15 @@ class Agent(ABC):
         self.running = False
         logger.info(f"Agent {self.name} stopped")
     
+    def publish_result(self, key: Any, result: Any):
+        """Push a finished result to subscribers, if the agent has a notifier"""
+        if self.notifier is not None:
+            self.notifier.publish(self.name, key, result)
+    
     def add_task(self, task: Any):
         """Add a task to the agent's queue"""
-        self.tasks.append(task)
+        self.tasks.append((time.perf_counter(), task))
+        self._queue_depth.set(len(self.tasks))
         logger.debug(f"Task added to {self.name}'s queue: {task}")
 
 
@@ -46,30 +109,92 @@ class SearchEvaluationAgent(Agent):
     """Agent specialized in search evaluation"""
     
     def __init__(self, name: str, config: Dict[str, Any], 
-                 metrics: List[Callable], callback: Optional[Callable] = None):
+                 metrics: List[Callable], callback: Optional[Callable] = None,
+                 cache: Optional[ResponseCache] = None):
         super().__init__(name, config)
         self.metrics = metrics
         self.callback = callback
+        self.cache = cache
         self.results = {}
+        
+        # Interaction-based metrics take user interactions as their third argument,
+        # relevance-based metrics take relevance judgments
+        self._metric_inputs = []
+        for metric_func in metrics:
+            parameters = list(inspect.signature(metric_func).parameters)
+            uses_interactions = len(parameters) > 2 and parameters[2] == "user_interactions"
+            name = metric_name(metric_func)
+            self._metric_inputs.append(
+                (name, metric_func, uses_interactions, METRIC_COMPUTE_DURATION.child(name))
+            )
+        
+        # Cached evaluations are only reused by agents computing the same metrics
+        self._cache_scope = payload_hash([
+            (metric_name(metric_func), getattr(metric_func, "keywords", {})) for metric_func in metrics
+        ])
     
-    async def process(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process search evaluation data"""
+    def _cache_key(self, data: Dict[str, Any]) -> Optional[str]:
+        # Metrics are deterministic in their inputs, so identical payloads
+        # (regardless of evaluation ID) are served from the cache
+        if self.cache is None:
+            return None
+        return f"{self._cache_scope}:" + payload_hash([
+            data.get("query"), data.get("results") or [], data.get("user_interactions") or [],
+            data.get("relevance_judgments") or {}
+        ])
+    
+    def _compute(self, data: Dict[str, Any]) -> Dict[str, float]:
         query = data.get("query")
-        results = data.get("results", [])
-        user_interactions = data.get("user_interactions", [])
-        relevance_judgments = data.get("relevance_judgments", {})
+        results = data.get("results") or []
+        user_interactions = data.get("user_interactions") or []
+        relevance_judgments = data.get("relevance_judgments") or {}
         
         evaluation = {}
-        for metric_func in self.metrics:
-            metric_name = metric_func.__name__
+        for name, metric_func, uses_interactions, compute_duration in self._metric_inputs:
+            started = time.perf_counter()
             try:
-                metric_value = metric_func(query, results, relevance_judgments)
-                evaluation[metric_name] = metric_value
+                evaluation[name] = float(metric_func(
+                    query, results, user_interactions if uses_interactions else relevance_judgments
+                ))
+                compute_duration.observe(time.perf_counter() - started)
             except Exception as e:
-                logger.error(f"Error calculating metric {metric_name}: {str(e)}")
-                evaluation[metric_name] = 0.0
+                logger.error(f"Error calculating metric {name}: {str(e)}")
+                evaluation[name] = 0.0
+        return evaluation
+    
+    def evaluate(self, data: Dict[str, Any]) -> Dict[str, float]:
+        """Calculate all configured metrics for one search evaluation"""
+        cache_key = self._cache_key(data)
+        if cache_key is not None:
+            cached = self.cache.get("evaluation", cache_key)
+            if cached is not None:
+                return json.loads(cached)
+        
+        evaluation = self._compute(data)
+        if cache_key is not None:
+            self.cache.set("evaluation", cache_key, json.dumps(evaluation).encode())
+        return evaluation
+    
+    async def aevaluate(self, data: Dict[str, Any]) -> Dict[str, float]:
+        """evaluate() with cache round trips kept off the event loop"""
+        cache_key = self._cache_key(data)
+        if cache_key is not None:
+            cached = await self.cache.aget("evaluation", cache_key)
+            if cached is not None:
+                return json.loads(cached)
+        
+        evaluation = self._compute(data)
+        if cache_key is not None:
+            await self.cache.aset("evaluation", cache_key, json.dumps(evaluation).encode())
+        return evaluation
+    
+    async def process(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Process search evaluation data"""
+        query = data.get("query")
+        evaluation = await self.aevaluate(data)
         
         self.results[data.get("id")] = evaluation
+        self.publish_result(data.get("id"), evaluation)
         
         if self.callback:
             await self.callback(data.get("id"), evaluation)
@@ -93,6 +218,16 @@ class ABTestAgent(Agent):
         control_group = data.get("control_group", {})
         treatment_group = data.get("treatment_group", {})
         
+        # More than one treatment arm: analyze the whole arm x metric grid in one batch
+        if data.get("treatment_groups"):
+            analysis_results = self._process_multi_arm(
+                control_group, [treatment_group] + list(data["treatment_groups"])
+            )
+            self.experiment_results[experiment_id] = analysis_results
+            self.publish_result(experiment_id, analysis_results)
+            logger.info(f"Processed multi-arm analysis for experiment: {experiment_id}")
+            return analysis_results
+        
         analysis_results = {}
         
         # Process each metric separately
@@ -124,9 +259,33 @@ class ABTestAgent(Agent):
             analysis_results[metric_name] = metric_results
         
         self.experiment_results[experiment_id] = analysis_results
+        self.publish_result(experiment_id, analysis_results)
         
         logger.info(f"Processed A/B test analysis for experiment: {experiment_id}")
         return analysis_results
+    
+    def _process_multi_arm(self, control_group: Dict[str, Any],
+                           treatment_groups: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run the batched multi-arm analysis with multiple-testing correction"""
+        from opensearcheval.utils.stats import multi_arm_analysis
+        
+        control_name = control_group.get("group_id", "control")
+        groups = {control_name: control_group.get("metrics", {})}
+        for i, group in enumerate(treatment_groups):
+            if group:
+                name = group.get("group_id", f"treatment_{i}")
+                # A repeated arm would silently replace the earlier one's data
+                if name in groups:
+                    return {"error": f"Duplicate group_id: {name}"}
+                groups[name] = group.get("metrics", {})
+        
+        alpha = 1 - self.config.get("confidence_level", 0.95)
+        return multi_arm_analysis(
+            groups,
+            control=control_name,
+            alpha=alpha,
+            correction=self.config.get("correction", "holm")
+        )
 
 
 class UserBehaviorAgent(Agent):
@@ -159,6 +318,7 @@ class UserBehaviorAgent(Agent):
         
         # Store the analysis
         self.behavior_patterns[session_id] = analysis
+        self.publish_result(session_id, analysis)
         
         logger.info(f"Processed user behavior for session: {session_id}")
         return analysis
@@ -257,37 +417,100 @@ class AgentManager:
     def __init__(self):
         self.agents = {}
         self.tasks = asyncio.Queue()
+        self.notifier = ResultNotifier()
+        self.factories: Dict[str, Callable[[], Agent]] = {}
+        self.started = False
+        self._runners: Dict[str, asyncio.Task] = {}
     
     def register_agent(self, agent: Agent):
         """Register an agent with the manager"""
+        agent.notifier = self.notifier
         self.agents[agent.name] = agent
         logger.info(f"Agent {agent.name} registered with manager")
     
+    def register_factory(self, name: str, factory: Callable[[], Agent]):
+        """
+        Register an agent that is only constructed on first use
+        
+        Args:
+            name: Agent name, used for dispatch and lookup
+            factory: Zero-argument callable building the agent; heavy imports
+                belong inside it so they are not paid at startup
+        """
+        self.factories[name] = factory
+        logger.info(f"Agent {name} registered with manager (lazy)")
+    
+    @property
+    def agent_names(self) -> List[str]:
+        """Names of all registered agents, constructed or not"""
+        return list(self.agents) + [name for name in self.factories if name not in self.agents]
+    
+    @property
+    def pending(self) -> List[str]:
+        """Lazily registered agents that have not been constructed yet"""
+        return [name for name in self.factories if name not in self.agents]
+    
+    def get_agent(self, name: str) -> Optional[Agent]:
+        """
+        Get an agent by name, constructing it if it was registered lazily
+        
+        An agent built after start_all() is started immediately.
+        """
+        agent = self.agents.get(name)
+        if agent is not None or name not in self.factories:
+            return agent
+        
+        started = time.perf_counter()
+        agent = self.factories[name]()
+        self.register_agent(agent)
+        logger.info(f"Agent {name} constructed in {time.perf_counter() - started:.3f}s")
+        if self.started:
+            self._start(agent)
+        return agent
+    
+    async def warm_up(self):
+        """Construct every lazily registered agent, off the event loop"""
+        loop = asyncio.get_running_loop()
+        for name in self.pending:
+            # Construction mostly means importing modules; run it in a thread so requests keep flowing
+            agent = await loop.run_in_executor(None, self.factories[name])
+            if name not in self.agents:
+                self.register_agent(agent)
+                if self.started:
+                    self._start(agent)
+    
     def unregister_agent(self, agent_name: str):
         """Unregister an agent from the manager"""
+        self.factories.pop(agent_name, None)
         if agent_name in self.agents:
             agent = self.agents.pop(agent_name)
             agent.stop()
             logger.info(f"Agent {agent_name} unregistered from manager")
     
+    def _start(self, agent: Agent) -> asyncio.Task:
+        task = asyncio.create_task(agent.run())
+        self._runners[agent.name] = task
+        return task
+    
     async def start_all(self):
-        """Start all registered agents"""
-        tasks = []
-        for agent in self.agents.values():
-            tasks.append(asyncio.create_task(agent.run()))
+        """Start all registered agents; lazily registered ones start when first used"""
+        self.started = True
+        tasks = [self._start(agent) for agent in self.agents.values()]
         logger.info(f"Started {len(tasks)} agents")
         return tasks
     
     def stop_all(self):
         """Stop all registered agents"""
+        self.started = False
         for agent in self.agents.values():
             agent.stop()
         logger.info("All agents stopped")
     
     async def dispatch_task(self, agent_name: str, task: Any):
         """Dispatch a task to a specific agent"""
-        if agent_name in self.agents:
-            self.agents[agent_name].add_task(task)
+        agent = self.get_agent(agent_name)
+        if agent is not None:
+            agent.add_task(task)
             logger.debug(f"Task dispatched to agent {agent_name}")
             return True
         logger.warning(f"Agent {agent_name} not found for task dispatch")
@@ -49,6 +49,21 @@ class Settings(BaseSettings):
     LLM_TEMPERATURE: float = Field(default=0.1, env="LLM_TEMPERATURE")
     LLM_MAX_TOKENS: int = Field(default=1000, env="LLM_MAX_TOKENS")
     LLM_TIMEOUT: int = Field(default=30, env="LLM_TIMEOUT")
+    LLM_MAX_CONCURRENCY: int = Field(default=16, env="LLM_MAX_CONCURRENCY")  # in-flight requests per judge
+    LLM_MAX_CONNECTIONS: int = Field(default=32, env="LLM_MAX_CONNECTIONS")
+    LLM_HTTP2: bool = Field(default=True, env="LLM_HTTP2")  # needs the h2 package
+    LLM_PROMPT_COST_PER_1K: float = Field(default=0.01, env="LLM_PROMPT_COST_PER_1K")  # price per 1000 tokens
+    LLM_COMPLETION_COST_PER_1K: float = Field(default=0.03, env="LLM_COMPLETION_COST_PER_1K")
+    LLM_REQUESTS_PER_MINUTE: int = Field(default=0, env="LLM_REQUESTS_PER_MINUTE")  # provider limits; 0 = unlimited
+    LLM_TOKENS_PER_MINUTE: int = Field(default=0, env="LLM_TOKENS_PER_MINUTE")
+    LLM_BATCH_MAX_DOCUMENTS: int = Field(default=10, env="LLM_BATCH_MAX_DOCUMENTS")  # listwise judging
+    LLM_BATCH_TOKEN_BUDGET: int = Field(default=3000, env="LLM_BATCH_TOKEN_BUDGET")  # estimated prompt tokens per call
+    LLM_CACHE_ENABLED: bool = Field(default=True, env="LLM_CACHE_ENABLED")
+    LLM_CACHE_PATH: Optional[str] = Field(default=None, env="LLM_CACHE_PATH")  # SQLite file; None keeps judgments in memory
+    LLM_CACHE_MAX_ENTRIES: int = Field(default=10000, env="LLM_CACHE_MAX_ENTRIES")
+    LLM_CASCADE_LOW: float = Field(default=0.1, env="LLM_CASCADE_LOW")  # local scores at or below are judged not relevant
+    LLM_CASCADE_HIGH: float = Field(default=0.9, env="LLM_CASCADE_HIGH")  # local scores at or above are judged relevant
+    LLM_CASCADE_AUDIT_RATE: float = Field(default=0.05, env="LLM_CASCADE_AUDIT_RATE")  # locally decided share re-judged by the LLM
     
     # MLX settings
     USE_MLX: bool = Field(default=True, env="USE_MLX")
@@ -90,6 +105,7 @@ class Settings(BaseSettings):
     AGENT_POOL_SIZE: int = Field(default=5, env="AGENT_POOL_SIZE")
     AGENT_TIMEOUT: int = Field(default=300, env="AGENT_TIMEOUT")
     AGENT_MAX_RETRIES: int = Field(default=3, env="AGENT_MAX_RETRIES")
+    WARM_UP_ON_STARTUP: bool = Field(default=True, env="WARM_UP_ON_STARTUP")
     
     # Metrics settings
     METRICS_RETENTION_DAYS: int = Field(default=90, env="METRICS_RETENTION_DAYS")
@@ -98,7 +114,15 @@ class Settings(BaseSettings):
     # Performance settings
     ENABLE_CACHING: bool = Field(default=True, env="ENABLE_CACHING")
     CACHE_TTL: int = Field(default=3600, env="CACHE_TTL")  # seconds
+    CACHE_BACKEND: str = Field(default="memory", env="CACHE_BACKEND")  # memory or redis
+    CACHE_MAX_ENTRIES: int = Field(default=10000, env="CACHE_MAX_ENTRIES")
     MAX_CONCURRENT_REQUESTS: int = Field(default=100, env="MAX_CONCURRENT_REQUESTS")
+    MAX_BULK_ITEMS: int = Field(default=10000, env="MAX_BULK_ITEMS")
+    MAX_BULK_REQUEST_BYTES: int = Field(default=64 * 1024 * 1024, env="MAX_BULK_REQUEST_BYTES")
+    MAX_NDJSON_LINE_BYTES: int = Field(default=1024 * 1024, env="MAX_NDJSON_LINE_BYTES")
+    ADMISSION_QUEUE_SIZE: int = Field(default=200, env="ADMISSION_QUEUE_SIZE")
+    ADMISSION_QUEUE_TIMEOUT: float = Field(default=10.0, env="ADMISSION_QUEUE_TIMEOUT")  # seconds
+    COMPRESSION_MINIMUM_SIZE: int = Field(default=1024, env="COMPRESSION_MINIMUM_SIZE")  # bytes
     
     # Monitoring settings
     ENABLE_METRICS: bool = Field(default=True, env="ENABLE_METRICS")
@@ -227,7 +251,10 @@ MIN_SAMPLE_SIZE=100
 # Performance
 ENABLE_CACHING=true
 CACHE_TTL=3600
+CACHE_BACKEND=memory
 MAX_CONCURRENT_REQUESTS=100
+ADMISSION_QUEUE_SIZE=200
+ADMISSION_QUEUE_TIMEOUT=10
 """
         
         with open(env_file_path, 'w') as f:
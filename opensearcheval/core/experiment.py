@@ -1,6 +1,9 @@
 import uuid
 import enum
-from typing import Dict, List, Any, Optional
+import base64
+import binascii
+from bisect import bisect_left, insort
+from typing import Dict, List, Any, Optional, Callable, Tuple
 import datetime
 import logging
 from dataclasses import dataclass, field, asdict
@@ -46,7 +49,7 @@ class Experiment:
             
         self.status = ExperimentStatus.RUNNING
         self.started_at = datetime.datetime.now()
-        self.updated_at = datetime.datetime.now()
+        self._touch()
         logger.info(f"Started experiment: {self.id}")
     
     def pause(self):
@@ -56,7 +59,7 @@ class Experiment:
             return
             
         self.status = ExperimentStatus.PAUSED
-        self.updated_at = datetime.datetime.now()
+        self._touch()
         logger.info(f"Paused experiment: {self.id}")
     
     def complete(self):
@@ -67,17 +70,24 @@ class Experiment:
             
         self.status = ExperimentStatus.COMPLETED
         self.ended_at = datetime.datetime.now()
-        self.updated_at = datetime.datetime.now()
+        self._touch()
         logger.info(f"Completed experiment: {self.id}")
     
     def fail(self, reason: str):
         """Mark the experiment as failed"""
         self.status = ExperimentStatus.FAILED
         self.ended_at = datetime.datetime.now()
-        self.updated_at = datetime.datetime.now()
         self.results["failure_reason"] = reason
+        self._touch()
         logger.error(f"Experiment {self.id} failed: {reason}")
     
+    def _touch(self):
+        """Record a modification and notify the owning manager, if any"""
+        self.updated_at = datetime.datetime.now()
+        on_change = getattr(self, "_on_change", None)
+        if on_change is not None:
+            on_change(self)
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert experiment to dictionary"""
         result = asdict(self)
@@ -90,13 +100,91 @@ class Experiment:
         return result
 
 
+def encode_cursor(key: Tuple[datetime.datetime, str]) -> str:
+    """Encode an experiment ordering key as an opaque pagination cursor"""
+    created_at, experiment_id = key
+    raw = f"{created_at.isoformat()}|{experiment_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, str]:
+    """
+    Decode a pagination cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, experiment_id = raw.split("|", 1)
+        return datetime.datetime.fromisoformat(created_at), experiment_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
 class ExperimentManager:
     """Manages experiments"""
     
     def __init__(self):
         self.experiments = {}
+        # Bumped on every create, change and delete so collection ETags change
+        # even when no remaining experiment's updated_at does
+        self.revision = 0
+        self.changed_at: Optional[datetime.datetime] = None
+        self._listeners: List[Callable[[Experiment], None]] = []
+        
+        # Secondary indexes: (created_at, id) keys kept sorted oldest first,
+        # for all experiments and per status and owner
+        self._order: List[Tuple[datetime.datetime, str]] = []
+        self._by_status: Dict[ExperimentStatus, List[Tuple[datetime.datetime, str]]] = {}
+        self._by_owner: Dict[str, List[Tuple[datetime.datetime, str]]] = {}
+        # Attribute values each experiment is currently indexed under
+        self._indexed: Dict[str, Tuple[ExperimentStatus, str]] = {}
         logger.info("Initialized ExperimentManager")
     
+    def add_listener(self, listener: Callable[[Experiment], None]):
+        """Register a callback invoked whenever an experiment is created, changed or deleted"""
+        self._listeners.append(listener)
+    
+    @staticmethod
+    def _index_key(experiment: Experiment) -> Tuple[datetime.datetime, str]:
+        return (experiment.created_at, experiment.id)
+    
+    @staticmethod
+    def _remove_key(keys: List[Tuple[datetime.datetime, str]], key: Tuple[datetime.datetime, str]):
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+    
+    def _reindex(self, experiment: Experiment):
+        """Bring the secondary indexes in line with an experiment's current state"""
+        key = self._index_key(experiment)
+        indexed = self._indexed.pop(experiment.id, None)
+        if indexed is not None:
+            status, owner = indexed
+            self._remove_key(self._by_status[status], key)
+            self._remove_key(self._by_owner[owner], key)
+        else:
+            insort(self._order, key)
+        
+        if experiment.id not in self.experiments:
+            self._remove_key(self._order, key)
+            return
+        
+        insort(self._by_status.setdefault(experiment.status, []), key)
+        insort(self._by_owner.setdefault(experiment.owner, []), key)
+        self._indexed[experiment.id] = (experiment.status, experiment.owner)
+    
+    def _notify(self, experiment: Experiment):
+        self._reindex(experiment)
+        self.revision += 1
+        self.changed_at = datetime.datetime.now()
+        for listener in self._listeners:
+            try:
+                listener(experiment)
+            except Exception as e:
+                logger.error(f"Experiment listener failed for {experiment.id}: {str(e)}")
+    
     def create_experiment(self, 
                          name: str, 
                          description: str = "", 
@@ -139,7 +227,10 @@ class ExperimentManager:
             confidence_level=confidence_level
         )
         
+        # Not a dataclass field, so it stays out of to_dict()
+        experiment._on_change = self._notify
         self.experiments[experiment_id] = experiment
+        self._notify(experiment)
         logger.info(f"Created experiment: {experiment_id}")
         
         return experiment
@@ -151,24 +242,70 @@ class ExperimentManager:
     def list_experiments(self, 
                         status: Optional[ExperimentStatus] = None, 
                         owner: Optional[str] = None) -> List[Experiment]:
-        """List experiments, optionally filtered by status or owner"""
-        result = list(self.experiments.values())
+        """List experiments, newest first, optionally filtered by status or owner"""
+        experiments, _ = self.page_experiments(status=status, owner=owner)
+        return experiments
+    
+    def page_experiments(self,
+                         status: Optional[ExperimentStatus] = None,
+                         owner: Optional[str] = None,
+                         limit: Optional[int] = None,
+                         cursor: Optional[str] = None) -> Tuple[List[Experiment], Optional[str]]:
+        """
+        List one page of experiments, newest first, using the secondary indexes
+        
+        Args:
+            status: Only experiments with this status
+            owner: Only experiments owned by this user
+            limit: Maximum number of experiments to return (None for all)
+            cursor: Cursor returned with the previous page
+            
+        Returns:
+            Tuple of (experiments, cursor for the next page or None)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        # Walk the smaller index and check the other filter per experiment
+        if status and owner:
+            by_status = self._by_status.get(status, [])
+            by_owner = self._by_owner.get(owner, [])
+            keys = by_status if len(by_status) <= len(by_owner) else by_owner
+        elif status:
+            keys = self._by_status.get(status, [])
+        elif owner:
+            keys = self._by_owner.get(owner, [])
+        else:
+            keys = self._order
         
-        if status:
-            result = [e for e in result if e.status == status]
+        end = bisect_left(keys, decode_cursor(cursor)) if cursor else len(keys)
         
-        if owner:
-            result = [e for e in result if e.owner == owner]
+        if not (status and owner):
+            # Every key in a single index matches, so the page is a plain slice
+            start = 0 if limit is None else max(0, end - limit)
+            page = [self.experiments[key[1]] for key in reversed(keys[start:end])]
+            next_cursor = encode_cursor(keys[start]) if page and start > 0 else None
+            return page, next_cursor
         
-        # Sort by created date, newest first
-        result.sort(key=lambda x: x.created_at, reverse=True)
+        page = []
+        position = end - 1
+        while position >= 0 and (limit is None or len(page) < limit):
+            experiment = self.experiments[keys[position][1]]
+            position -= 1
+            if experiment.status == status and experiment.owner == owner:
+                page.append(experiment)
         
-        return result
+        next_cursor = None
+        if page and position >= 0:
+            next_cursor = encode_cursor(self._index_key(page[-1]))
+        return page, next_cursor
     
     def delete_experiment(self, experiment_id: str) -> bool:
         """Delete an experiment"""
         if experiment_id in self.experiments:
-            del self.experiments[experiment_id]
+            experiment = self.experiments.pop(experiment_id)
+            experiment._on_change = None
+            self._notify(experiment)
             logger.info(f"Deleted experiment: {experiment_id}")
             return True
         return False
@@ -181,7 +318,7 @@ class ExperimentManager:
             return False
         
         experiment.results.update(results)
-        experiment.updated_at = datetime.datetime.now()
+        experiment._touch()
         logger.info(f"Updated results for experiment: {experiment_id}")
         
         return True
\ No newline at end of file
@@ -1,6 +1,5 @@
 from typing import List, Dict, Any, Tuple
 import numpy as np
-from sklearn.metrics import ndcg_score
 
 def mean_reciprocal_rank(query: str, results: List[Dict[str, Any]], 
                          relevance_judgments: Dict[str, int]) -> float:
@@ -67,9 +66,16 @@ def ndcg_at_k(query: str, results: List[Dict[str, Any]],
     # Get relevance scores for each result
     relevance = [relevance_judgments.get(r.get("doc_id"), 0) for r in results[:k]]
     
+    # sklearn refuses a single document; its NDCG is 1 if relevant, 0 otherwise
+    if k == 1:
+        return 1.0 if relevance[0] > 0 else 0.0
+    
     # Ideal ordering would be relevance scores sorted in descending order
     ideal_relevance = sorted(relevance, reverse=True)
     
+    # sklearn is imported on first use; it dominates the package import time
+    from sklearn.metrics import ndcg_score
+    
     # Convert to numpy arrays for ndcg_score function
     y_true = np.array([ideal_relevance])
     y_score = np.array([relevance])
@@ -381,4 +387,183 @@ def normalized_discounted_cumulative_gain(rankings: List[float], k: int = None)
     )
     
     # Return NDCG
-    return dcg / idcg if idcg > 0 else 0.0
\ No newline at end of file
+    return dcg / idcg if idcg > 0 else 0.0
+
+def _batch_ndcg(top_k: np.ndarray, in_cutoff: np.ndarray, cutoff: np.ndarray) -> np.ndarray:
+    """
+    ndcg_at_k for every row of a padded relevance matrix
+    
+    ndcg_at_k passes the ideal (sorted) relevance as sklearn's y_true and
+    the ranked relevance as y_score: results are ordered by relevance,
+    each position's gain is the ideal relevance at that result's index,
+    and tied results share the average of their gains. This reproduces
+    sklearn's tie-averaged DCG with one flattened group-by.
+    """
+    n, width = top_k.shape
+    if not n or not width:
+        return np.zeros(n)
+    
+    # Padding sorts last in its own group and gets no discount
+    scores = np.where(in_cutoff, top_k, -np.inf)
+    ideal = np.where(in_cutoff, -np.sort(-scores, axis=1), 0.0)
+    positions = np.arange(width)
+    discounts = np.where(positions[None, :] < cutoff[:, None], 1.0 / np.log2(positions + 2), 0.0)
+    
+    order = np.argsort(-scores, axis=1, kind="stable")
+    ranked_scores = np.take_along_axis(scores, order, axis=1)
+    ranked_gains = np.take_along_axis(ideal, order, axis=1)
+    
+    # Number tie groups across all rows, then average gains within each group
+    new_group = np.ones((n, width), dtype=bool)
+    new_group[:, 1:] = ranked_scores[:, 1:] != ranked_scores[:, :-1]
+    groups = np.cumsum(new_group.ravel()) - 1
+    group_gains = np.bincount(groups, weights=ranked_gains.ravel())
+    group_sizes = np.bincount(groups)
+    averaged = (group_gains / group_sizes)[groups].reshape(n, width)
+    
+    dcg = (averaged * discounts).sum(axis=1)
+    idcg = (ideal * discounts).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(idcg > 0, dcg / idcg, 0.0)
+
+def batch_search_metrics(evaluations: List[Dict[str, Any]], k: int = 10) -> Dict[str, np.ndarray]:
+    """
+    Calculate search metrics for many queries at once using array operations
+    
+    Each evaluation is a dictionary shaped like a search evaluation request
+    (query, results, user_interactions, relevance_judgments). Results and
+    interactions are flattened once into padded arrays, and every metric is
+    then computed for all queries together instead of one call per query.
+    Per-query values match the corresponding single-query metric functions,
+    including ndcg_at_k's tie-averaged NDCG.
+    
+    Args:
+        evaluations: List of evaluation dictionaries
+        k: Cutoff for precision@k and NDCG@k
+        
+    Returns:
+        Dictionary mapping metric name to an array with one value per evaluation
+    """
+    n = len(evaluations)
+    lengths = np.array([len(e.get("results") or []) for e in evaluations], dtype=np.int64)
+    width = int(lengths.max()) if n else 0
+    
+    # Relevance grades of each result in ranked order, zero-padded
+    relevance = np.zeros((n, width))
+    interaction_rows, interaction_types, interaction_hits = [], [], []
+    interaction_times, interaction_dwell, interaction_query_match = [], [], []
+    
+    for row, evaluation in enumerate(evaluations):
+        results = evaluation.get("results") or []
+        judgments = evaluation.get("relevance_judgments") or {}
+        doc_ids = [r.get("doc_id") for r in results]
+        if judgments:
+            relevance[row, :len(doc_ids)] = [judgments.get(doc_id, 0) for doc_id in doc_ids]
+        
+        result_ids = set(doc_ids)
+        query = evaluation.get("query")
+        for interaction in evaluation.get("user_interactions") or []:
+            interaction_type = interaction.get("type")
+            interaction_rows.append(row)
+            interaction_types.append(0 if interaction_type == "click" else 1 if interaction_type == "search" else 2)
+            interaction_hits.append(interaction.get("doc_id") in result_ids)
+            interaction_times.append(interaction.get("timestamp") or 0.0)
+            dwell_time = interaction.get("dwell_time")
+            interaction_dwell.append(np.nan if dwell_time is None else dwell_time)
+            interaction_query_match.append(interaction.get("query") == query)
+    
+    rows = np.asarray(interaction_rows, dtype=np.int64)
+    kinds = np.asarray(interaction_types, dtype=np.int8)
+    hits = np.asarray(interaction_hits, dtype=bool)
+    times = np.asarray(interaction_times, dtype=float)
+    dwell = np.asarray(interaction_dwell, dtype=float)
+    query_match = np.asarray(interaction_query_match, dtype=bool)
+    
+    is_click = kinds == 0
+    interaction_counts = np.bincount(rows, minlength=n)
+    click_counts = np.bincount(rows, weights=is_click, minlength=n)
+    has_data = (lengths > 0) & (interaction_counts > 0)
+    
+    # Relevance-based metrics
+    relevant = relevance > 0
+    first_relevant = np.argmax(relevant, axis=1) if width else np.zeros(n, dtype=np.int64)
+    any_relevant = relevant.any(axis=1) if width else np.zeros(n, dtype=bool)
+    mrr = np.where(any_relevant, 1.0 / (first_relevant + 1), 0.0)
+    
+    cutoff = np.minimum(lengths, k) if k > 0 else np.zeros(n, dtype=np.int64)
+    top_k = relevance[:, :max(k, 0)]
+    in_cutoff = np.arange(top_k.shape[1])[None, :] < cutoff[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(cutoff > 0, ((top_k > 0) & in_cutoff).sum(axis=1) / cutoff, 0.0)
+        
+        ndcg = _batch_ndcg(top_k, in_cutoff, cutoff)
+        
+        # Interaction-based metrics
+        clicks_on_results = np.bincount(rows, weights=is_click & hits, minlength=n)
+        ctr = np.where(has_data, clicks_on_results / np.maximum(lengths, 1), 0.0)
+        
+        abandoned = np.where(has_data, (click_counts == 0).astype(float), 1.0)
+        
+        dwell_clicks = is_click & ~np.isnan(dwell)
+        dwell_sums = np.bincount(rows, weights=np.where(dwell_clicks, dwell, 0.0), minlength=n)
+        dwell_counts = np.bincount(rows, weights=dwell_clicks, minlength=n)
+        avg_dwell = np.where(has_data & (dwell_counts > 0), dwell_sums / np.maximum(dwell_counts, 1), 0.0)
+    
+    # First matching search event and earliest click per query
+    positions = np.arange(len(rows))
+    first_search = np.full(n, len(rows))
+    search_mask = (kinds == 1) & query_match
+    np.minimum.at(first_search, rows[search_mask], positions[search_mask])
+    search_time = np.zeros(n)
+    found = first_search < len(rows)
+    search_time[found] = times[first_search[found]]
+    first_click = np.full(n, np.inf)
+    np.minimum.at(first_click, rows[is_click], times[is_click])
+    valid_ttfc = has_data & (search_time != 0) & np.isfinite(first_click)
+    ttfc = np.where(valid_ttfc, first_click - search_time, 0.0)
+    
+    return {
+        "mean_reciprocal_rank": mrr,
+        "precision_at_k": precision,
+        "ndcg_at_k": ndcg,
+        "click_through_rate": ctr,
+        "time_to_first_click": ttfc,
+        "abandoned_search_rate": abandoned,
+        "average_dwell_time": avg_dwell
+    }
+
+class RunningMetricAggregates:
+    """Streaming mean/std/min/max of batch metrics with constant memory"""
+    
+    def __init__(self):
+        self.count = 0
+        self._sums = {}
+        self._sums_sq = {}
+        self._mins = {}
+        self._maxs = {}
+    
+    def update(self, metrics: Dict[str, np.ndarray]):
+        """Fold a batch of per-query metric arrays into the running aggregates"""
+        for name, values in metrics.items():
+            if not len(values):
+                continue
+            self._sums[name] = self._sums.get(name, 0.0) + float(values.sum())
+            self._sums_sq[name] = self._sums_sq.get(name, 0.0) + float(np.square(values).sum())
+            self._mins[name] = min(self._mins.get(name, np.inf), float(values.min()))
+            self._maxs[name] = max(self._maxs.get(name, -np.inf), float(values.max()))
+        if metrics:
+            self.count += len(next(iter(metrics.values())))
+    
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Get mean, population std, min and max for every metric seen so far"""
+        result = {}
+        for name, total in self._sums.items():
+            mean = total / self.count
+            variance = max(self._sums_sq[name] / self.count - mean ** 2, 0.0)
+            result[name] = {
+                "mean": mean,
+                "std": float(np.sqrt(variance)),
+                "min": self._mins[name],
+                "max": self._maxs[name]
+            }
+        return result
@@ -1,8 +1,11 @@
 import logging
+import time
 from typing import Dict, List, Any, Optional
 import pandas as pd
 import os
 
+from opensearcheval.utils.monitoring import DB_QUERY_DURATION
+
 logger = logging.getLogger(__name__)
 
 class DatabricksConnector:
@@ -95,6 +98,7 @@ class DatabricksConnector:
         Returns:
             Pandas DataFrame with query results
         """
+        started = time.perf_counter()
         try:
             # If params are provided, replace them in the query
             # This is a simple implementation, in practice you would use proper parameterization
@@ -118,6 +122,8 @@ class DatabricksConnector:
         except Exception as e:
             logger.error(f"Error executing query: {str(e)}")
             raise
+        finally:
+            DB_QUERY_DURATION.child("databricks").observe(time.perf_counter() - started)
     
     def load_table(self, table_name: str, limit: Optional[int] = None) -> pd.DataFrame:
         """
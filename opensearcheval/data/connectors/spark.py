@@ -1,8 +1,11 @@
 import logging
+import time
 from typing import Dict, List, Any, Optional
 import pandas as pd
 import os
 
+from opensearcheval.utils.monitoring import DB_QUERY_DURATION
+
 logger = logging.getLogger(__name__)
 
 class SparkConnector:
@@ -93,6 +96,7 @@ class SparkConnector:
         Returns:
             Pandas DataFrame with query results
         """
+        started = time.perf_counter()
         try:
             result = self.spark.sql(query)
             pandas_df = result.toPandas()
@@ -101,6 +105,8 @@ class SparkConnector:
         except Exception as e:
             logger.error(f"Error executing Spark SQL query: {str(e)}")
             raise
+        finally:
+            DB_QUERY_DURATION.child("spark").observe(time.perf_counter() - started)
     
     def process_search_logs(self, input_path: str, output_path: str) -> pd.DataFrame:
         """
@@ -1,9 +1,12 @@
 import logging
+import time
 from typing import Dict, List, Any, Optional
 import pandas as pd
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 
+from opensearcheval.utils.monitoring import DB_QUERY_DURATION
+
 logger = logging.getLogger(__name__)
 
 class SQLConnector:
@@ -17,6 +20,7 @@ class SQLConnector:
             connection_string: SQLAlchemy connection string
         """
         self.connection_string = connection_string
+        self._query_duration = DB_QUERY_DURATION.child("sql")
         try:
             self.engine = create_engine(connection_string)
             logger.info(f"Initialized SQL connector with engine: {self.engine.name}")
@@ -35,6 +39,7 @@ class SQLConnector:
         Returns:
             DataFrame with query results
         """
+        started = time.perf_counter()
         try:
             if params is None:
                 params = {}
@@ -53,6 +58,8 @@ class SQLConnector:
         except Exception as e:
             logger.error(f"Error executing query: {str(e)}")
             raise
+        finally:
+            self._query_duration.observe(time.perf_counter() - started)
     
     def load_search_logs(self, start_date: str, end_date: str) -> pd.DataFrame:
         """
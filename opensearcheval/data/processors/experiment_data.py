@@ -2,11 +2,15 @@
 Experiment data processor for OpenSearchEval
 """
 
+import numpy as np
 import pandas as pd
 import json
 import logging
 from typing import Dict, List, Any, Optional, Union
 from datetime import datetime
+from scipy import stats
+
+from opensearcheval.utils.stats import adjust_p_values, summary_statistics, t_test_from_summary
 
 logger = logging.getLogger(__name__)
 
@@ -198,45 +202,65 @@ class ExperimentDataProcessor:
         logger.info(f"Experiment results exported to {output_file}")
     
     def identify_significant_differences(self, df: pd.DataFrame, 
-                                       metric: str = "dwell_time") -> Dict[str, Any]:
+                                       metric: str = "dwell_time",
+                                       correction: str = "holm") -> Dict[str, Any]:
         """Identify significant differences between groups"""
-        from scipy import stats
-        
         groups = df["group"].unique()
         if len(groups) < 2:
             return {"error": "Need at least 2 groups for comparison"}
         
-        # Calculate metric by session for each group
-        group_data = {}
-        for group in groups:
-            group_df = df[df["group"] == group]
-            session_metrics = group_df.groupby("session_id")[metric].mean()
-            group_data[group] = session_metrics.dropna().values
+        # Calculate metric by session for all groups in one groupby pass
+        session_metrics = df.groupby(["group", "session_id"])[metric].mean().dropna()
+        group_data = {group: np.array([]) for group in groups}
+        for group, values in session_metrics.groupby(level="group"):
+            group_data[group] = values.values
+        group_names = list(group_data.keys())
+        
+        # Per-group summary statistics computed once, then all pairs tested as arrays
+        n, mean, var = summary_statistics([group_data[g] for g in group_names])
+        first, second = np.triu_indices(len(group_names), k=1)
+        pairs = [(i, j) for i, j in zip(first, second) if n[i] > 0 and n[j] > 0]
+        if not pairs:
+            return {}
+        first = np.array([i for i, _ in pairs])
+        second = np.array([j for _, j in pairs])
+        
+        t_tests = t_test_from_summary(
+            n[second], mean[second], var[second],
+            n[first], mean[first], var[first],
+            equal_var=True
+        )
+        # Mann-Whitney ranks depend on both samples of a pair, so it stays one scipy call per pair
+        u_results = [
+            stats.mannwhitneyu(group_data[group_names[i]], group_data[group_names[j]], alternative='two-sided')
+            for i, j in pairs
+        ]
+        u_p_values = np.array([u.pvalue for u in u_results])
+        
+        t_adjusted = adjust_p_values(t_tests["p_value"], method=correction)
+        u_adjusted = adjust_p_values(u_p_values, method=correction)
+        # Population standard deviation, matching numpy's default
+        std = np.sqrt(np.where(n > 1, var * (n - 1) / np.maximum(n, 1), 0.0))
         
-        # Perform statistical tests
         results = {}
-        group_names = list(group_data.keys())
+        for k, (i, j) in enumerate(pairs):
+            group1, group2 = group_names[i], group_names[j]
+            results[f"{group1}_vs_{group2}"] = {
+                "t_test": {
+                    "statistic": float(t_tests["t_statistic"][k]),
+                    "p_value": float(t_tests["p_value"][k]),
+                    "p_value_adjusted": float(t_adjusted[k])
+                },
+                "mann_whitney": {
+                    "statistic": float(u_results[k].statistic),
+                    "p_value": float(u_p_values[k]),
+                    "p_value_adjusted": float(u_adjusted[k])
+                },
+                "effect_size": (mean[j] - mean[i]) / std[i] if std[i] > 0 else 0,
+                "group1_mean": mean[i],
+                "group2_mean": mean[j],
+                "group1_std": std[i],
+                "group2_std": std[j]
+            }
         
-        for i in range(len(group_names)):
-            for j in range(i + 1, len(group_names)):
-                group1, group2 = group_names[i], group_names[j]
-                data1, data2 = group_data[group1], group_data[group2]
-                
-                if len(data1) > 0 and len(data2) > 0:
-                    # T-test
-                    t_stat, t_p_value = stats.ttest_ind(data1, data2)
-                    
-                    # Mann-Whitney U test
-                    u_stat, u_p_value = stats.mannwhitneyu(data1, data2, alternative='two-sided')
-                    
-                    results[f"{group1}_vs_{group2}"] = {
-                        "t_test": {"statistic": t_stat, "p_value": t_p_value},
-                        "mann_whitney": {"statistic": u_stat, "p_value": u_p_value},
-                        "effect_size": (data2.mean() - data1.mean()) / data1.std() if data1.std() > 0 else 0,
-                        "group1_mean": data1.mean(),
-                        "group2_mean": data2.mean(),
-                        "group1_std": data1.std(),
-                        "group2_std": data2.std()
-                    }
-        
-        return results 
\ No newline at end of file
+        return results
@@ -41,7 +41,10 @@ class RelevanceJudgmentProcessor:
         # Required fields
         query = judgment.get("query")
         doc_id = judgment.get("doc_id") or judgment.get("document_id")
-        relevance = judgment.get("relevance") or judgment.get("relevance_score")
+        relevance = judgment.get("relevance")
+        if relevance is None:
+            # A grade of 0 is a judgment, not a missing value
+            relevance = judgment.get("relevance_score")
         
         if not query or not doc_id or relevance is None:
             logger.warning(f"Missing required fields in judgment: {judgment}")
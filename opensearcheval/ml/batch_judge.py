@@ -0,0 +1,369 @@
+"""
+Offline bulk LLM judging with checkpointing and resume
+
+Reads query-document pairs from a JSON Lines file, one object per line
+with at least "query" and "doc_id" (plus title/snippet/url, and optionally
+"query_id"). Completed judgments are appended to an output directory in
+numbered chunk files, so an interrupted job can be rerun with the same
+arguments and only judges the pairs that are missing. When the input is
+exhausted the chunks are compiled into TREC qrels and into JSON Lines
+records for RelevanceJudgmentProcessor.
+
+Usage:
+    python -m opensearcheval.ml.batch_judge pairs.jsonl judgments/ --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from opensearcheval.core.config import get_settings
+from opensearcheval.ml.llm_judge import LISTWISE_PROMPT_VERSION, LLMJudge, PROMPT_VERSION, get_judgment_cache
+from opensearcheval.ml.rate_limiter import LLMRateLimiter, Priority
+from opensearcheval.ml.usage import usage_tracker
+from opensearcheval.utils.cache import payload_hash
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+CHUNK_PREFIX = "chunk-"
+QRELS_FILE = "qrels.txt"
+JUDGMENTS_FILE = "judgments.jsonl"
+# Judge scores (0-5) are mapped onto the 0-4 grades RelevanceJudgmentProcessor expects
+MAX_GRADE = 4
+
+
+@dataclass
+class BatchJudgeStats:
+    """Progress of one run of a batch judging job"""
+    read: int = 0
+    resumed: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    judged: int = 0
+    failed: int = 0
+    chunks_written: int = 0
+    elapsed_seconds: float = 0.0
+
+
+def pair_key(record: Dict[str, Any]) -> Tuple[str, str]:
+    return record["query"], str(record["doc_id"])
+
+
+def query_id(record: Dict[str, Any]) -> str:
+    """Query ID for qrels: the record's query_id, or a stable hash of the query text"""
+    if record.get("query_id") is not None:
+        return str(record["query_id"])
+    return "q" + payload_hash(record["query"])[:12]
+
+
+def relevance_grade(overall_score: float) -> int:
+    """Map a 0-5 judge score onto a 0-4 relevance grade"""
+    return max(0, min(MAX_GRADE, int(round(overall_score * MAX_GRADE / 5.0))))
+
+
+def iter_checkpoint(output_dir: str) -> Iterator[Dict[str, Any]]:
+    """Judgments stored in the completed chunks of an output directory, in chunk order"""
+    if not os.path.isdir(output_dir):
+        return
+    for name in sorted(os.listdir(output_dir)):
+        # Temporary files of a chunk being written when the job died are ignored
+        if name.startswith(CHUNK_PREFIX) and name.endswith(".jsonl"):
+            with open(os.path.join(output_dir, name), "r") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+class BatchJudgeJob:
+    """
+    Resumable bulk judging of a query-document pair file
+
+    Pairs are streamed from the input and judged by a fixed number of
+    workers at bulk priority, so interactive judging in the same process
+    still goes first. Completed judgments are buffered and written as a new
+    chunk file (via a temporary file and rename) every chunk_size judgments
+    or checkpoint_interval seconds; at most one buffer of LLM calls is lost
+    in a crash, none if the judge has a persistent judgment cache. Failed
+    judgments are not checkpointed, so a rerun retries them.
+    """
+
+    def __init__(self, input_path: str, output_dir: str, criteria: List[str],
+                 judge: Optional[LLMJudge] = None, concurrency: int = 16, chunk_size: int = 1000,
+                 checkpoint_interval: float = 30.0, listwise: bool = False):
+        """
+        Initialize the job
+
+        Args:
+            input_path: JSON Lines file of query-document pairs
+            output_dir: Directory for the manifest, chunks and final outputs
+            criteria: Evaluation criteria
+            judge: Judge to use (defaults to one configured from settings)
+            concurrency: Number of pairs (or listwise groups) in flight
+            chunk_size: Judgments per checkpoint chunk
+            checkpoint_interval: Maximum seconds between checkpoints
+            listwise: Judge consecutive pairs of the same query together
+        """
+        self.input_path = input_path
+        self.output_dir = output_dir
+        self.criteria = criteria
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.checkpoint_interval = checkpoint_interval
+        self.listwise = listwise
+        self.judge = judge or LLMJudge(
+            model_name=settings.LLM_MODEL,
+            config={
+                "temperature": 0.1,
+                "max_tokens": 1024,
+                "endpoint": settings.LLM_ENDPOINT,
+                "api_key": settings.LLM_API_KEY,
+                "max_concurrency": concurrency
+            },
+            cache=get_judgment_cache(),
+            rate_limiter=LLMRateLimiter(settings.LLM_REQUESTS_PER_MINUTE, settings.LLM_TOKENS_PER_MINUTE)
+        )
+        self.stats = BatchJudgeStats()
+        self._buffer: List[Dict[str, Any]] = []
+        self._last_checkpoint = time.monotonic()
+        self._next_chunk = 0
+
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        """Settings a resumed job must share with the run that wrote the checkpoint"""
+        return {
+            "model": self.judge.model_name,
+            "temperature": self.judge.temperature,
+            "prompt_version": PROMPT_VERSION,
+            # Listwise and pointwise judgments are not mixed in one checkpoint
+            "listwise": self.listwise,
+            "listwise_prompt_version": LISTWISE_PROMPT_VERSION if self.listwise else None,
+            "criteria": list(self.criteria)
+        }
+
+    def _check_manifest(self):
+        path = os.path.join(self.output_dir, MANIFEST_FILE)
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                existing = json.load(f)
+            if existing != self.manifest:
+                raise ValueError(
+                    f"{self.output_dir} holds judgments made with {existing}; "
+                    f"use a new output directory for {self.manifest}"
+                )
+        else:
+            with open(path, "w") as f:
+                json.dump(self.manifest, f, indent=2)
+
+    def _load_checkpoint(self) -> Set[Tuple[str, str]]:
+        done = {pair_key(record) for record in iter_checkpoint(self.output_dir)}
+        numbers = [int(name[len(CHUNK_PREFIX):-len(".jsonl")]) for name in os.listdir(self.output_dir)
+                   if name.startswith(CHUNK_PREFIX) and name.endswith(".jsonl")]
+        self._next_chunk = max(numbers, default=-1) + 1
+        return done
+
+    def iter_pairs(self, done: Set[Tuple[str, str]]) -> Iterator[Dict[str, Any]]:
+        """Stream valid pairs from the input, skipping those in done and repeated ones"""
+        seen: Set[Tuple[str, str]] = set()
+        with open(self.input_path, "r") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                self.stats.read += 1
+                try:
+                    record = json.loads(line)
+                    key = pair_key(record)
+                except (ValueError, KeyError, TypeError):
+                    self.stats.invalid += 1
+                    logger.warning(f"Skipping invalid pair on line {line_number} of {self.input_path}")
+                    continue
+                if key in done:
+                    self.stats.resumed += 1
+                    continue
+                if key in seen:
+                    self.stats.duplicates += 1
+                    continue
+                seen.add(key)
+                yield record
+
+    def iter_units(self, done: Set[Tuple[str, str]]) -> Iterator[List[Dict[str, Any]]]:
+        """Group pairs into units of work: single pairs, or same-query runs when listwise"""
+        group: List[Dict[str, Any]] = []
+        for record in self.iter_pairs(done):
+            if not self.listwise:
+                yield [record]
+                continue
+            if group and (record["query"] != group[0]["query"] or len(group) >= self.judge.batch_max_documents):
+                yield group
+                group = []
+            group.append(record)
+        if group:
+            yield group
+
+    def _checkpoint(self, force: bool = False):
+        if not self._buffer:
+            return
+        if not force and len(self._buffer) < self.chunk_size \
+                and time.monotonic() - self._last_checkpoint < self.checkpoint_interval:
+            return
+        path = os.path.join(self.output_dir, f"{CHUNK_PREFIX}{self._next_chunk:06d}.jsonl")
+        temporary = path + ".tmp"
+        with open(temporary, "w") as f:
+            for record in self._buffer:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+        self._next_chunk += 1
+        self._buffer = []
+        self._last_checkpoint = time.monotonic()
+        self.stats.chunks_written += 1
+        logger.info(f"Checkpointed {path} ({self.stats.judged} judged, {self.stats.failed} failed this run)")
+
+    async def _judge_unit(self, unit: List[Dict[str, Any]]):
+        query = unit[0]["query"]
+        if self.listwise:
+            judgments = await self.judge.evaluate_batch(query, unit, self.criteria, priority=Priority.BULK)
+        else:
+            judgments = [await self.judge.evaluate(query, unit[0], self.criteria, priority=Priority.BULK)]
+
+        judged_at = datetime.now().isoformat()
+        for record, judgment in zip(unit, judgments):
+            if "error" in judgment:
+                self.stats.failed += 1
+                continue
+            self.stats.judged += 1
+            self._buffer.append({
+                "query": record["query"],
+                "query_id": query_id(record),
+                "doc_id": str(record["doc_id"]),
+                "scores": judgment.get("scores", {}),
+                "overall_score": judgment.get("overall_score", 0),
+                "explanation": judgment.get("explanation", ""),
+                "model": self.judge.model_name,
+                "judged_at": judged_at
+            })
+        self._checkpoint()
+
+    async def run(self) -> BatchJudgeStats:
+        """Judge every pair not yet in the checkpoint, then write the final outputs"""
+        started = time.monotonic()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._check_manifest()
+        done = self._load_checkpoint()
+        if done:
+            logger.info(f"Resuming with {len(done)} judgments already in {self.output_dir}")
+
+        # Bounded so the input is read only as fast as it is judged
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def worker():
+            while True:
+                unit = await queue.get()
+                try:
+                    if unit is None:
+                        return
+                    await self._judge_unit(unit)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+
+        async def produce():
+            for unit in self.iter_units(done):
+                await queue.put(unit)
+            for _ in workers:
+                await queue.put(None)
+
+        tasks = [asyncio.create_task(produce())] + workers
+        try:
+            # A worker that dies fails the job, instead of leaving the producer blocked on a full queue
+            finished, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in finished:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Keep whatever finished, including on Ctrl-C
+            self._checkpoint(force=True)
+
+        self.write_outputs()
+        self.stats.elapsed_seconds = time.monotonic() - started
+        if self.stats.failed:
+            logger.warning(f"{self.stats.failed} judgments failed; rerun the job to retry them")
+        return self.stats
+
+    def write_outputs(self) -> Tuple[str, str]:
+        """
+        Compile the checkpoint into qrels.txt and judgments.jsonl
+
+        Returns:
+            Paths of the qrels file ("query_id 0 doc_id grade" lines) and of
+            the JSON Lines records accepted by RelevanceJudgmentProcessor
+        """
+        qrels_path = os.path.join(self.output_dir, QRELS_FILE)
+        judgments_path = os.path.join(self.output_dir, JUDGMENTS_FILE)
+        with open(qrels_path, "w") as qrels, open(judgments_path, "w") as judgments:
+            for record in iter_checkpoint(self.output_dir):
+                grade = relevance_grade(record["overall_score"])
+                qrels.write(f"{record['query_id']} 0 {record['doc_id']} {grade}\n")
+                judgments.write(json.dumps({
+                    "query": record["query"],
+                    "query_id": record["query_id"],
+                    "doc_id": record["doc_id"],
+                    "relevance": grade,
+                    "judge_id": record["model"],
+                    "judgment_time": record["judged_at"],
+                    "notes": record["explanation"]
+                }) + "\n")
+        return qrels_path, judgments_path
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Judge a file of query-document pairs with the LLM judge")
+    parser.add_argument("input_file", help="JSON Lines file with query, doc_id, title, snippet and url per line")
+    parser.add_argument("output_dir", help="Directory for checkpoints and outputs; rerun with the same one to resume")
+    parser.add_argument("--criteria", nargs="+", default=["relevance"], help="Evaluation criteria")
+    parser.add_argument("--concurrency", type=int, default=settings.LLM_MAX_CONCURRENCY,
+                        help="Pairs (or listwise groups) in flight")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Judgments per checkpoint chunk")
+    parser.add_argument("--checkpoint-seconds", type=float, default=30.0, help="Maximum seconds between checkpoints")
+    parser.add_argument("--listwise", action="store_true", help="Judge consecutive pairs of a query together")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    job = BatchJudgeJob(
+        args.input_file, args.output_dir, args.criteria,
+        concurrency=args.concurrency,
+        chunk_size=args.chunk_size,
+        checkpoint_interval=args.checkpoint_seconds,
+        listwise=args.listwise
+    )
+
+    async def run():
+        async with job.judge:
+            return await job.run()
+
+    stats = asyncio.run(run())
+    print(json.dumps(dict(asdict(stats), usage=usage_tracker.totals(job.judge.model_name)), indent=2))
+    print(f"Outputs written to {os.path.join(args.output_dir, QRELS_FILE)} "
+          f"and {os.path.join(args.output_dir, JUDGMENTS_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import random
+import re
+from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+import numpy as np
+
+from opensearcheval.core.config import get_settings
+from opensearcheval.ml.llm_judge import LLMJudge, get_llm_judge
+from opensearcheval.ml.rate_limiter import Priority
+
+if TYPE_CHECKING:
+    # Imports MLX, which the API must not need at import time
+    from opensearcheval.ml.embeddings import EmbeddingModel
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+# Judge scores are on a 0-5 scale; at or above this a document counts as relevant
+RELEVANCE_THRESHOLD = 2.5
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "the", "to", "what", "when", "where", "which", "who", "why", "with"
+})
+
+
+def _terms(text: str) -> set:
+    return {t for t in _TOKEN_PATTERN.findall(text.lower()) if t not in _STOPWORDS}
+
+
+def _document_text(document: Dict[str, Any]) -> str:
+    return " ".join(str(document.get(field) or "") for field in ("title", "snippet", "content"))
+
+
+def lexical_overlap(query: str, document: Dict[str, Any]) -> float:
+    """
+    Fraction of query terms (stopwords excluded) found in the document's title, snippet or content
+
+    Args:
+        query: Search query
+        document: Document with title/snippet/content fields
+
+    Returns:
+        Score between 0.0 and 1.0
+    """
+    query_terms = _terms(query)
+    if not query_terms:
+        return 0.0
+    return len(query_terms & _terms(_document_text(document))) / len(query_terms)
+
+
+@dataclass
+class CascadeStats:
+    """Counters for one or more cascaded judging runs"""
+    documents: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    llm_judged: int = 0
+    audited: int = 0
+    agreed: int = 0
+    audit_abs_error: float = 0.0
+
+    @property
+    def fraction_saved(self) -> float:
+        """Share of documents decided without an LLM call"""
+        return (self.accepted + self.rejected) / self.documents if self.documents else 0.0
+
+    @property
+    def agreement(self) -> Optional[float]:
+        """Share of audited local decisions the LLM agreed with, or None without audits"""
+        return self.agreed / self.audited if self.audited else None
+
+    def merge(self, other: "CascadeStats"):
+        for name in ("documents", "accepted", "rejected", "llm_judged", "audited", "agreed", "audit_abs_error"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            asdict(self),
+            fraction_saved=self.fraction_saved,
+            agreement=self.agreement,
+            audit_mean_abs_error=self.audit_abs_error / self.audited if self.audited else None
+        )
+
+
+class CascadeJudge:
+    """
+    LLM judging with a cheap local pre-filter
+
+    Every document first gets a local score in [0, 1]: cosine similarity
+    from an embedding model if one is given, lexical query-term overlap
+    otherwise. Documents scoring at least `high` are accepted and those at
+    most `low` rejected without an LLM call; only the uncertain band in
+    between is sent to the judge. A random audit_rate share of the locally
+    decided documents is also sent to the LLM to measure agreement.
+    """
+
+    def __init__(self, judge: Optional[LLMJudge] = None, low: float = 0.1, high: float = 0.9,
+                 embedding_model: Optional["EmbeddingModel"] = None, audit_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        """
+        Initialize the cascade
+
+        Args:
+            judge: LLM judge for the uncertain band and audits (defaults to the shared judge)
+            low: Local score at or below which a document is judged not relevant
+            high: Local score at or above which a document is judged relevant
+            embedding_model: Model for similarity scores (lexical overlap if None)
+            audit_rate: Fraction of locally decided documents also judged by the LLM
+            seed: Seed for audit sampling
+        """
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError("Cascade thresholds must satisfy 0 <= low <= high <= 1")
+        self.judge = judge
+        self.low = low
+        self.high = high
+        self.embedding_model = embedding_model
+        self.audit_rate = audit_rate
+        self.stats = CascadeStats()
+        self._random = random.Random(seed)
+
+    async def score(self, query: str, documents: List[Dict[str, Any]]) -> np.ndarray:
+        """Local relevance scores in [0, 1] for each document"""
+        if not documents:
+            return np.zeros(0)
+        if self.embedding_model is None:
+            return np.array([lexical_overlap(query, doc) for doc in documents])
+
+        texts = [query] + [_document_text(doc) for doc in documents]
+        if hasattr(self.embedding_model, "async_embed"):
+            embeddings = await self.embedding_model.async_embed(texts)
+        else:
+            # Local models are compute bound; keep them off the event loop
+            embeddings = await asyncio.get_running_loop().run_in_executor(None, self.embedding_model.embed, texts)
+        embeddings = np.asarray(embeddings, dtype=float)
+        similarities = self.embedding_model.batch_similarity(embeddings[0], embeddings[1:])
+        return np.clip(np.nan_to_num(similarities), 0.0, 1.0)
+
+    def _local_judgment(self, score: float, relevant: bool, criteria: List[str]) -> Dict[str, Any]:
+        value = round(5.0 * score, 3)
+        return {
+            "scores": {c: value for c in criteria},
+            "overall_score": value,
+            "explanation": (
+                f"Decided by the cascade pre-filter (local score {score:.2f}, "
+                f"{'above' if relevant else 'below'} the {'high' if relevant else 'low'} threshold)"
+            ),
+            "source": "cascade"
+        }
+
+    async def evaluate(self, query: str, documents: List[Dict[str, Any]], criteria: List[str],
+                       listwise: bool = False, priority: Priority = Priority.INTERACTIVE) -> List[Dict[str, Any]]:
+        """
+        Judge documents, calling the LLM only for the uncertain band
+
+        Args:
+            query: Search query
+            documents: Documents to judge
+            criteria: Evaluation criteria
+            listwise: Judge the uncertain band listwise (see LLMJudge.evaluate_batch)
+            priority: Rate limiter lane
+
+        Returns:
+            One judgment per document, with doc_id attached; locally decided
+            judgments have "source": "cascade"
+        """
+        scores = await self.score(query, documents)
+        run = CascadeStats(documents=len(documents))
+        results: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+        uncertain, audits = [], []
+        for i, score in enumerate(scores):
+            if score >= self.high or score <= self.low:
+                relevant = bool(score >= self.high)
+                results[i] = self._local_judgment(float(score), relevant, criteria)
+                if relevant:
+                    run.accepted += 1
+                else:
+                    run.rejected += 1
+                if self.audit_rate and self._random.random() < self.audit_rate:
+                    audits.append(i)
+            else:
+                uncertain.append(i)
+
+        to_judge = uncertain + audits
+        if to_judge:
+            judge = self.judge or get_llm_judge()
+            judged_documents = [documents[i] for i in to_judge]
+            if listwise:
+                judged = await judge.evaluate_batch(query, judged_documents, criteria, priority=priority)
+            else:
+                judged = await asyncio.gather(*(
+                    judge.evaluate(query, doc, criteria, priority=priority) for doc in judged_documents
+                ))
+            run.llm_judged = len(uncertain)
+            for i, judgment in zip(uncertain, judged):
+                results[i] = judgment
+            for i, judgment in zip(audits, judged[len(uncertain):]):
+                if "error" in judgment:
+                    continue
+                local = results[i]
+                run.audited += 1
+                run.agreed += (local["overall_score"] >= RELEVANCE_THRESHOLD) == (judgment["overall_score"] >= RELEVANCE_THRESHOLD)
+                run.audit_abs_error += abs(local["overall_score"] - judgment["overall_score"])
+
+        for i, result in enumerate(results):
+            result["doc_id"] = documents[i].get("doc_id", f"doc_{i}")
+        self.stats.merge(run)
+        logger.debug(f"Cascade judged {run.llm_judged} of {run.documents} documents with the LLM")
+        return results
+
+
+_shared_cascade: Optional[CascadeJudge] = None
+
+
+def get_cascade_judge() -> CascadeJudge:
+    """
+    Get the process-wide cascade configured from settings
+
+    It scores lexically and sends the uncertain band to the shared judge, so
+    its stats cover every cascaded request served by this process.
+    """
+    global _shared_cascade
+    if _shared_cascade is None:
+        _shared_cascade = CascadeJudge(
+            low=settings.LLM_CASCADE_LOW,
+            high=settings.LLM_CASCADE_HIGH,
+            audit_rate=settings.LLM_CASCADE_AUDIT_RATE
+        )
+    return _shared_cascade
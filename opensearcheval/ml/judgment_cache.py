@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from opensearcheval.utils.cache import LRUCache, payload_hash
+from opensearcheval.utils.monitoring import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Document fields that end up in the judge prompt
+JUDGED_DOCUMENT_FIELDS = ("title", "snippet", "url")
+
+
+def judgment_key(model_name: str, temperature: float, prompt_version: str, query: str,
+                 document: Dict[str, Any], criteria: List[str]) -> str:
+    """
+    Content address of a judgment
+
+    Only inputs that change what the model is asked are included: the document
+    ID is not, so the same content judged under two IDs is a single entry.
+
+    Args:
+        model_name: Judge model
+        temperature: Sampling temperature
+        prompt_version: Version of the prompt template
+        query: Search query
+        document: Judged document
+        criteria: Evaluation criteria, in prompt order
+
+    Returns:
+        Hex digest used as the cache key
+    """
+    return payload_hash({
+        "model": model_name,
+        "temperature": temperature,
+        "prompt_version": prompt_version,
+        "query": query,
+        "document": {name: document.get(name) for name in JUDGED_DOCUMENT_FIELDS},
+        "criteria": list(criteria)
+    })
+
+
+class JudgmentCache:
+    """
+    Two-level cache of LLM judgments
+
+    An in-memory LRU sits in front of an optional SQLite file, so judgments
+    survive restarts and can be shared by batch jobs and API workers on one
+    host. Entries never expire: a judgment only changes when one of the key
+    inputs (model, temperature, prompt version, query, document) does.
+
+    SQLite I/O stays off the event loop. Writes go into the LRU at once and
+    to a writer thread that commits whatever has queued up in one
+    transaction. Code on an event loop reads with aget/aget_many, which
+    answer memory hits inline and run SQLite lookups in the default executor.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10000):
+        """
+        Initialize the cache
+
+        Args:
+            path: SQLite file for persistent storage (None keeps judgments in memory only)
+            max_entries: Capacity of the in-memory LRU
+        """
+        self.path = path
+        self.memory = LRUCache(max_entries=max_entries)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._hit = CACHE_REQUESTS.child("llm_judgment", "hit")
+        self._miss = CACHE_REQUESTS.child("llm_judgment", "miss")
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS judgments ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, judgment TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._writer = threading.Thread(target=self._write_loop, name="judgment-cache-writer", daemon=True)
+            self._writer.start()
+            logger.info(f"LLM judgment cache at {path}")
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is None:
+            return None
+        self.memory_hits += 1
+        self._hit.inc()
+        return json.loads(value)
+
+    def _disk_get(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Look keys up in SQLite, promoting hits into the LRU"""
+        found = []
+        for key in keys:
+            with self._lock:
+                row = self._db.execute("SELECT judgment FROM judgments WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                found.append(None)
+                continue
+            self.memory.set(key, row[0].encode("utf-8"))
+            self.disk_hits += 1
+            self._hit.inc()
+            found.append(json.loads(row[0]))
+        return found
+
+    def _missed(self, count: int = 1):
+        self.misses += count
+        self._miss.inc(count)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a judgment, or None if it has not been cached (blocks on SQLite; see aget)"""
+        judgment = self._memory_get(key)
+        if judgment is None and self._db is not None:
+            judgment = self._disk_get([key])[0]
+        if judgment is None:
+            self._missed()
+        return judgment
+
+    async def aget_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Get judgments from an event loop; all SQLite lookups go to the executor in one call"""
+        found = [self._memory_get(key) for key in keys]
+        missing = [i for i, judgment in enumerate(found) if judgment is None]
+        if missing and self._db is not None:
+            loaded = await asyncio.get_running_loop().run_in_executor(
+                None, self._disk_get, [keys[i] for i in missing]
+            )
+            for i, judgment in zip(missing, loaded):
+                found[i] = judgment
+        misses = found.count(None)
+        if misses:
+            self._missed(misses)
+        return found
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """get() without blocking the event loop on SQLite"""
+        return (await self.aget_many([key]))[0]
+
+    def set(self, key: str, judgment: Dict[str, Any], model_name: str = ""):
+        """Store a judgment; it is written to the file in the background"""
+        encoded = json.dumps(judgment)
+        self.memory.set(key, encoded.encode("utf-8"))
+        if self._db is not None:
+            self._writes.put((key, model_name, encoded, time.time()))
+
+    def _write_loop(self):
+        while True:
+            batch = [self._writes.get()]
+            # One commit (and fsync) for everything queued meanwhile
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [row for row in batch if row is not None]
+            if rows:
+                try:
+                    with self._lock:
+                        self._db.executemany(
+                            "INSERT OR REPLACE INTO judgments (key, model, judgment, created_at) VALUES (?, ?, ?, ?)",
+                            rows
+                        )
+                        self._db.commit()
+                except sqlite3.Error as e:
+                    # Failures to write the file are logged and ignored
+                    logger.warning(f"Failed to persist {len(rows)} LLM judgments: {str(e)}")
+            for _ in batch:
+                self._writes.task_done()
+            if len(rows) < len(batch):
+                return
+
+    def flush(self):
+        """Wait until every stored judgment has been written to the file"""
+        if self._writer is not None:
+            self._writes.join()
+
+    def __len__(self) -> int:
+        if self._db is not None:
+            self.flush()
+            with self._lock:
+                return self._db.execute("SELECT COUNT(*) FROM judgments").fetchone()[0]
+        return len(self.memory)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counts since the cache was created"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "persistent": self._db is not None
+        }
+
+    def close(self):
+        if self._writer is not None:
+            self._writes.put(None)
+            self._writer.join()
+            self._writer = None
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+            self._db = None
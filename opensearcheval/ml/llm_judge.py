@@ -1,29 +1,137 @@
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Any, Optional, Tuple
+import atexit
+import functools
 import logging
 import json
 import asyncio
+import time
 import httpx
 from pydantic import BaseModel
 
 from opensearcheval.core.config import get_settings
+from opensearcheval.ml.judgment_cache import JUDGED_DOCUMENT_FIELDS, JudgmentCache, judgment_key
+from opensearcheval.ml.rate_limiter import LLMRateLimiter, Priority, backoff_delay, parse_retry_after
+from opensearcheval.ml.usage import UsageTracker, usage_tracker
+from opensearcheval.utils.cache import payload_hash
+from opensearcheval.utils.monitoring import LLM_COST, LLM_REQUEST_DURATION, LLM_RETRIES, LLM_TOKENS
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - h2 is optional
+    HTTP2_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Bump whenever the prompt or system message changes, so cached judgments
+# made with the old prompt are no longer served
+PROMPT_VERSION = "2"
+LISTWISE_PROMPT_VERSION = "listwise-2"
+PAIRWISE_PROMPT_VERSION = "pairwise-1"
+SYSTEM_PROMPT = "You are an expert search quality evaluator."
+
+# Transient provider responses worth retrying
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
 class LLMJudge:
-    """LLM-as-a-judge system for evaluating search results"""
+    """
+    LLM-as-a-judge system for evaluating search results
+    
+    Requests go through one pooled keep-alive client (HTTP/2 when h2 is
+    installed), created on first use, and at most max_concurrency of them
+    are in flight at a time. Call aclose() (or use the judge as an async
+    context manager) to release the connections.
     
-    def __init__(self, model_name: str, config: Dict[str, Any]):
+    With a JudgmentCache, successful judgments are stored and repeated
+    (query, document, criteria) evaluations are answered without a request.
+    """
+    
+    def __init__(self, model_name: str, config: Dict[str, Any], client: Optional[httpx.AsyncClient] = None,
+                 cache: Optional[JudgmentCache] = None, rate_limiter: Optional[LLMRateLimiter] = None,
+                 usage: Optional[UsageTracker] = None):
+        """
+        Initialize the judge
+        
+        Args:
+            model_name: Model to request from the endpoint
+            config: endpoint, api_key, temperature, max_tokens, timeout,
+                max_concurrency, max_connections, http2, and for listwise
+                judging batch_max_documents, batch_token_budget and
+                max_tokens_per_document; retries are set by max_retries,
+                retry_base_delay and retry_max_delay; prompt_cost_per_1k and
+                completion_cost_per_1k price the reported token usage
+            client: Existing client to share; it is not closed by aclose()
+            cache: Judgment cache to read from and write to
+            rate_limiter: Scheduler for the provider's rate limits, shared by
+                every judge using the same API key
+            usage: Tracker for token, cost and latency totals (defaults to
+                the process-wide tracker)
+        """
         self.model_name = model_name
         self.config = config
         self.endpoint = config.get("endpoint", "https://api.openai.com/v1/chat/completions")
         self.api_key = config.get("api_key", "")
         self.temperature = config.get("temperature", 0.1)
         self.max_tokens = config.get("max_tokens", 1024)
+        self.timeout = config.get("timeout", settings.LLM_TIMEOUT)
+        self.max_concurrency = config.get("max_concurrency", settings.LLM_MAX_CONCURRENCY)
+        self.max_connections = config.get("max_connections", settings.LLM_MAX_CONNECTIONS)
+        self.http2 = config.get("http2", settings.LLM_HTTP2) and HTTP2_AVAILABLE
+        self.batch_max_documents = config.get("batch_max_documents", settings.LLM_BATCH_MAX_DOCUMENTS)
+        self.batch_token_budget = config.get("batch_token_budget", settings.LLM_BATCH_TOKEN_BUDGET)
+        self.max_tokens_per_document = config.get("max_tokens_per_document", 300)
+        self.max_retries = config.get("max_retries", settings.AGENT_MAX_RETRIES)
+        self.retry_base_delay = config.get("retry_base_delay", 1.0)
+        self.retry_max_delay = config.get("retry_max_delay", 30.0)
+        self.prompt_cost_per_1k = config.get("prompt_cost_per_1k", settings.LLM_PROMPT_COST_PER_1K)
+        self.completion_cost_per_1k = config.get("completion_cost_per_1k", settings.LLM_COMPLETION_COST_PER_1K)
+        self.usage = usage or usage_tracker
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self._client = client
+        self._owns_client = client is None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            # "Bearer " with an empty key is not a legal header value
+            self._headers["Authorization"] = f"Bearer {self.api_key}"
+        self._success_duration = LLM_REQUEST_DURATION.child(model_name, "success")
+        self._error_duration = LLM_REQUEST_DURATION.child(model_name, "error")
+        self._prompt_tokens = LLM_TOKENS.child(model_name, "prompt")
+        self._completion_tokens = LLM_TOKENS.child(model_name, "completion")
+        self._cost = LLM_COST.child(model_name)
         logger.info(f"Initialized LLM Judge with model: {model_name}")
     
-    async def evaluate(self, query: str, document: Dict[str, Any], 
-                      criteria: List[str]) -> Dict[str, Any]:
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+            self._owns_client = True
+        return self._client
+    
+    async def aclose(self):
+        """Close the pooled client if this judge created it"""
+        if self._client is not None and self._owns_client and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+    
+    async def __aenter__(self) -> "LLMJudge":
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.aclose()
+    
+    async def evaluate(self, query: str, document: Dict[str, Any], criteria: List[str],
+                       cache_only: bool = False, priority: Priority = Priority.INTERACTIVE) -> Dict[str, Any]:
         """
         Evaluate a single document against a query using the LLM
         
@@ -31,112 +139,528 @@ class LLMJudge:
             query: The search query
             document: The document to evaluate (with title, content, etc.)
             criteria: List of evaluation criteria
+            cache_only: Only serve cached judgments; a miss returns an error
+                result instead of calling the LLM
+            priority: Rate limiter lane (BULK for batch jobs)
             
         Returns:
             Evaluation results
         """
-        # Construct prompt for LLM
+        key = None
+        if self.cache is not None:
+            key = judgment_key(self.model_name, self.temperature, PROMPT_VERSION, query, document, criteria)
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                return cached
+        if cache_only:
+            return _failed_judgment(criteria, "Not cached", "No cached judgment for this document")
+        
+        # Construct prompt for LLM; unusable responses are retried, so only valid judgments are cached
         prompt = self._construct_evaluation_prompt(query, document, criteria)
+        evaluation, failure = await self._complete(
+            prompt, criteria, self.max_tokens, priority, parse=functools.partial(parse_judgment, criteria=criteria)
+        )
+        if failure is not None:
+            return failure
+        if key is not None:
+            self.cache.set(key, evaluation, self.model_name)
+        return evaluation
+    
+    async def evaluate_batch(self, query: str, documents: List[Dict[str, Any]], criteria: List[str],
+                             cache_only: bool = False,
+                             priority: Priority = Priority.INTERACTIVE) -> List[Dict[str, Any]]:
+        """
+        Evaluate documents listwise, several per LLM call
         
-        try:
-            # Call LLM API
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.endpoint,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {self.api_key}"
-                    },
-                    json={
-                        "model": self.model_name,
-                        "messages": [
-                            {"role": "system", "content": "You are an expert search quality evaluator."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": self.temperature,
-                        "max_tokens": self.max_tokens,
-                        "response_format": {"type": "json_object"}
-                    },
-                    timeout=30.0
-                )
-                
-                if response.status_code != 200:
-                    logger.error(f"LLM API error: {response.status_code} - {response.text}")
-                    return {
-                        "error": f"API error: {response.status_code}",
-                        "scores": {c: 0.0 for c in criteria},
-                        "overall_score": 0.0,
-                        "explanation": "Failed to get evaluation from LLM"
-                    }
-                
-                result = response.json()
-                llm_response = result.get("choices", [{}])[0].get("message", {}).get("content", "{}")
-                
-                # Parse LLM response
-                try:
-                    evaluation = json.loads(llm_response)
-                    return evaluation
-                except json.JSONDecodeError:
-                    logger.error(f"Failed to parse LLM response as JSON: {llm_response}")
-                    return {
-                        "error": "Failed to parse LLM response",
-                        "scores": {c: 0.0 for c in criteria},
-                        "overall_score": 0.0,
-                        "explanation": "Invalid response format"
-                    }
-                    
-        except Exception as e:
-            logger.error(f"Error evaluating with LLM: {str(e)}")
-            return {
-                "error": str(e),
-                "scores": {c: 0.0 for c in criteria},
-                "overall_score": 0.0,
-                "explanation": f"Exception: {str(e)}"
-            }
+        Uncached documents are packed into prompts of at most batch_max_documents
+        documents and batch_token_budget estimated prompt tokens, so the
+        instructions are sent once per batch instead of once per document.
+        Documents whose judgment cannot be parsed out of a batch response are
+        re-judged with single-document calls.
+        
+        Args:
+            query: The search query
+            documents: Documents to evaluate
+            criteria: List of evaluation criteria
+            cache_only: Only serve cached judgments (see evaluate)
+            priority: Rate limiter lane (BULK for batch jobs)
+            
+        Returns:
+            Evaluation results, in document order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+        ready, jobs = await self._listwise_jobs(query, documents, criteria, cache_only, priority)
+        for i, judgment in ready:
+            results[i] = judgment
+        for batch in await asyncio.gather(*jobs):
+            for i, judgment in batch:
+                results[i] = judgment
+        return results
     
-    def _construct_evaluation_prompt(self, query: str, document: Dict[str, Any], 
-                                    criteria: List[str]) -> str:
-        """Construct a prompt for the LLM to evaluate a document"""
-        criteria_str = ", ".join(criteria)
+    async def _listwise_jobs(self, query: str, documents: List[Dict[str, Any]], criteria: List[str],
+                             cache_only: bool = False, priority: Priority = Priority.INTERACTIVE
+                             ) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Awaitable[List[Tuple[int, Dict[str, Any]]]]]]:
+        """
+        Plan listwise judging of documents
+        
+        Returns:
+            Tuple of (cached or cache_only judgments, one awaitable per batch);
+            both carry (document index, judgment) pairs, and the awaitables
+            cache what they judge
+        """
+        ready = []
+        keys: List[Optional[str]] = [None] * len(documents)
+        found: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+        if self.cache is not None:
+            keys = [
+                judgment_key(self.model_name, self.temperature, LISTWISE_PROMPT_VERSION, query, document, criteria)
+                for document in documents
+            ]
+            found = await self.cache.aget_many(keys)
+        pending = []
+        for i, cached in enumerate(found):
+            if cached is not None:
+                ready.append((i, cached))
+            elif cache_only:
+                ready.append((i, _failed_judgment(criteria, "Not cached", "No cached judgment for this document")))
+            else:
+                pending.append(i)
         
-        prompt = f"""
-        Evaluate the following search result for the query:
+        async def judge_batch(indices: List[int]) -> List[Tuple[int, Dict[str, Any]]]:
+            judged = await self._evaluate_listwise(query, [documents[i] for i in indices], criteria, priority)
+            for i, judgment in zip(indices, judged):
+                if keys[i] is not None and "error" not in judgment:
+                    self.cache.set(keys[i], judgment, self.model_name)
+            return list(zip(indices, judged))
         
-        QUERY: {query}
+        batches = self._pack_batches(query, pending, criteria, documents)
+        return ready, [judge_batch(indices) for indices in batches]
+    
+    def _pack_batches(self, query: str, indices: List[int], criteria: List[str],
+                      documents: List[Dict[str, Any]]) -> List[List[int]]:
+        """Greedily split the indexed documents into batches within the document and token limits"""
+        base = estimate_tokens(self._construct_listwise_prompt(query, [], criteria))
+        batches = []
+        batch: List[int] = []
+        tokens = base
+        for i in indices:
+            cost = estimate_tokens(_format_listwise_document(len(batch) + 1, documents[i]))
+            if batch and (len(batch) >= self.batch_max_documents or tokens + cost > self.batch_token_budget):
+                batches.append(batch)
+                batch, tokens = [], base
+            batch.append(i)
+            tokens += cost
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    async def _evaluate_listwise(self, query: str, batch: List[Dict[str, Any]], criteria: List[str],
+                                 priority: Priority = Priority.INTERACTIVE) -> List[Dict[str, Any]]:
+        """Judge one batch with a single call, falling back to per-document calls where needed"""
+        if len(batch) == 1:
+            return [await self.evaluate(query, batch[0], criteria, priority=priority)]
         
-        SEARCH RESULT:
-        Title: {document.get('title', 'N/A')}
-        Snippet: {document.get('snippet', 'N/A')}
-        URL: {document.get('url', 'N/A')}
+        prompt = self._construct_listwise_prompt(query, batch, criteria)
+        max_tokens = max(self.max_tokens, self.max_tokens_per_document * len(batch))
+        llm_response, failure = await self._complete(prompt, criteria, max_tokens, priority)
+        if failure is not None:
+            return [dict(failure) for _ in batch]
         
-        Please evaluate this result based on the following criteria: {criteria_str}
+        parsed = parse_listwise_response(llm_response, len(batch), criteria)
+        missing = [i for i in range(len(batch)) if i not in parsed]
+        if missing:
+            logger.warning(
+                f"Listwise response covered {len(batch) - len(missing)} of {len(batch)} documents; "
+                f"re-judging {len(missing)} individually"
+            )
+            fallbacks = await asyncio.gather(*(
+                self.evaluate(query, batch[i], criteria, priority=priority) for i in missing
+            ))
+            parsed.update(zip(missing, fallbacks))
+        return [parsed[i] for i in range(len(batch))]
+    
+    async def _complete(self, prompt: str, criteria: List[str], max_tokens: int,
+                        priority: Priority = Priority.INTERACTIVE,
+                        parse: Optional[Callable[[str], Any]] = None) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """
+        Send one chat completion request, retrying transient failures
         
-        For each criterion, assign a score from 0.0 to 5.0, where:
-        - 0.0-1.0: Poor - Does not satisfy the criterion at all
-        - 1.0-2.0: Fair - Minimally satisfies the criterion
-        - 2.0-3.0: Good - Adequately satisfies the criterion
-        - 3.0-4.0: Very Good - Strongly satisfies the criterion
-        - 4.0-5.0: Excellent - Perfectly satisfies the criterion
+        429, 5xx and transport errors are retried up to max_retries times,
+        after the Retry-After delay when the provider sends one (capped at
+        retry_max_delay) and with jittered exponential backoff otherwise.
+        With a rate limiter, every attempt first reserves a request and its
+        estimated tokens. The tokens are refunded when the attempt fails
+        without a completion being generated: an error response, or a
+        connection that was never made. The request slot is kept, since the
+        provider counts rejected requests too.
         
-        Also provide an overall score and a detailed explanation of your evaluation.
+        Args:
+            parse: Turns the response content into a result, returning None
+                if it is unusable; unusable responses are retried like
+                transient failures
         
-        Respond in the following JSON format:
-        {{
-            "scores": {{
-                "criterion1": score1,
-                "criterion2": score2,
-                ...
-            }},
-            "overall_score": overall_score,
-            "explanation": "your detailed explanation"
-        }}
+        Returns:
+            Tuple of (response content or parsed result, None) on success or
+            (None, failed judgment)
         """
+        reserved = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt) + max_tokens
+        failure = None
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(reserved, priority)
+            
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                # Call LLM API over the shared connection pool
+                async with self._semaphore:
+                    # Time the request itself, not the wait for a slot
+                    started = time.perf_counter()
+                    response = await self.client.post(
+                        self.endpoint,
+                        headers=self._headers,
+                        json={
+                            "model": self.model_name,
+                            "messages": [
+                                {"role": "system", "content": SYSTEM_PROMPT},
+                                {"role": "user", "content": prompt}
+                            ],
+                            "temperature": self.temperature,
+                            "max_tokens": max_tokens,
+                            "response_format": {"type": "json_object"}
+                        }
+                    )
+                
+                if response.status_code == 200:
+                    latency = time.perf_counter() - started
+                    self._success_duration.observe(latency)
+                    result = response.json()
+                    self._record_usage(result.get("usage") or {}, reserved, latency)
+                    content = result.get("choices", [{}])[0].get("message", {}).get("content", "{}")
+                    if parse is None:
+                        return content, None
+                    parsed = parse(content)
+                    if parsed is not None:
+                        return parsed, None
+                    logger.warning(f"Unusable LLM response: {content[:200]}")
+                    failure = _failed_judgment(criteria, "Failed to parse LLM response", "Invalid response format")
+                    reason = "invalid_response"
+                else:
+                    self._record_failure(started)
+                    self._refund_tokens(reserved)
+                    failure = _failed_judgment(
+                        criteria, f"API error: {response.status_code}", "Failed to get evaluation from LLM"
+                    )
+                    if response.status_code not in RETRYABLE_STATUS_CODES:
+                        logger.error(f"LLM API error: {response.status_code} - {response.text}")
+                        return None, failure
+                    reason = str(response.status_code)
+                    retry_after = parse_retry_after(response.headers.get("retry-after"))
+                    if retry_after is not None:
+                        # A server asking for minutes or hours must not park callers that long
+                        retry_after = min(retry_after, self.retry_max_delay)
+                    if response.status_code == 429 and retry_after and self.rate_limiter is not None:
+                        self.rate_limiter.pause(retry_after)
+            
+            except httpx.TransportError as e:
+                self._record_failure(started)
+                # After a read timeout the provider may still have generated (and counted) the tokens
+                if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+                    self._refund_tokens(reserved)
+                failure = _failed_judgment(criteria, str(e) or type(e).__name__, f"Exception: {str(e)}")
+                reason = "transport"
+            except Exception as e:
+                self._record_failure(started)
+                logger.error(f"Error evaluating with LLM: {str(e)}")
+                return None, _failed_judgment(criteria, str(e), f"Exception: {str(e)}")
+            
+            if attempt == self.max_retries:
+                break
+            delay = retry_after if retry_after is not None else backoff_delay(
+                attempt, self.retry_base_delay, self.retry_max_delay
+            )
+            LLM_RETRIES.child(self.model_name, reason).inc()
+            logger.warning(f"LLM call failed ({reason}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        
+        logger.error(f"LLM call failed after {self.max_retries + 1} attempts: {failure['error']}")
+        return None, failure
+    
+    def _record_usage(self, usage: Dict[str, Any], reserved: int, latency: float):
+        """Account for the token usage the provider reported for a successful call"""
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        cost = (prompt_tokens * self.prompt_cost_per_1k + completion_tokens * self.completion_cost_per_1k) / 1000
+        self._prompt_tokens.inc(prompt_tokens)
+        self._completion_tokens.inc(completion_tokens)
+        self._cost.inc(cost)
+        self.usage.record(
+            self.model_name,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_prompt_tokens=(usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+            cost=cost,
+            latency=latency
+        )
+        if self.rate_limiter is not None and "total_tokens" in usage:
+            self.rate_limiter.record_usage(reserved, usage["total_tokens"])
+    
+    def _refund_tokens(self, reserved: int):
+        """Give back a failed attempt's token reservation"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.record_usage(reserved, 0)
+    
+    def _record_failure(self, started: float):
+        latency = time.perf_counter() - started
+        self._error_duration.observe(latency)
+        self.usage.record(self.model_name, latency=latency, failed=True)
+    
+    def _construct_evaluation_prompt(self, query: str, document: Dict[str, Any], 
+                                    criteria: List[str]) -> str:
+        """Construct a prompt for the LLM to evaluate a document"""
+        return (
+            f"{_instructions(tuple(criteria), False)}\n\n"
+            f"QUERY: {query}\n\n"
+            f"SEARCH RESULT:\n"
+            f"Title: {document.get('title', 'N/A')}\n"
+            f"Snippet: {document.get('snippet', 'N/A')}\n"
+            f"URL: {document.get('url', 'N/A')}"
+        )
+    
+    def _construct_listwise_prompt(self, query: str, documents: List[Dict[str, Any]],
+                                   criteria: List[str]) -> str:
+        """Construct a prompt for the LLM to evaluate several documents at once"""
+        results_str = "\n".join(_format_listwise_document(i, doc) for i, doc in enumerate(documents, 1))
+        return f"{_instructions(tuple(criteria), True)}\n\nQUERY: {query}\n\nSEARCH RESULTS:\n{results_str}"
+
+
+_SCORE_SCALE = """For each criterion, assign a score from 0.0 to 5.0, where:
+- 0.0-1.0: Poor - Does not satisfy the criterion at all
+- 1.0-2.0: Fair - Minimally satisfies the criterion
+- 2.0-3.0: Good - Adequately satisfies the criterion
+- 3.0-4.0: Very Good - Strongly satisfies the criterion
+- 4.0-5.0: Excellent - Perfectly satisfies the criterion"""
+
+
+@functools.lru_cache(maxsize=128)
+def _instructions(criteria: Tuple[str, ...], listwise: bool) -> str:
+    """
+    Static part of a judging prompt, built once per criteria set
+    
+    It comes before the query and documents, so consecutive prompts share
+    a prefix the provider can serve from its prompt cache.
+    """
+    scores = ", ".join(f'"{c}": score' for c in criteria)
+    if listwise:
+        return (
+            f"Evaluate each of the search results below for the query independently, "
+            f"based on the following criteria: {', '.join(criteria)}\n"
+            f"{_SCORE_SCALE}\n"
+            f"Also provide an overall score and a brief explanation for each result.\n"
+            f"Respond with JSON, one entry per result in the same order:\n"
+            f'{{"judgments": [{{"index": result number, "scores": {{{scores}}}, '
+            f'"overall_score": score, "explanation": "brief explanation"}}, ...]}}'
+        )
+    return (
+        f"Evaluate the search result below for the query, based on the following criteria: {', '.join(criteria)}\n"
+        f"{_SCORE_SCALE}\n"
+        f"Also provide an overall score and a detailed explanation of your evaluation.\n"
+        f"Respond with JSON:\n"
+        f'{{"scores": {{{scores}}}, "overall_score": score, "explanation": "your detailed explanation"}}'
+    )
+
+
+@functools.lru_cache(maxsize=128)
+def _pairwise_instructions(criteria: Tuple[str, ...]) -> str:
+    """Static part of a pairwise comparison prompt, built once per criteria set"""
+    return (
+        f"Compare the two search results below for the query and decide which one is better, "
+        f"based on the following criteria: {', '.join(criteria)}\n"
+        f"Judge the content only; the order in which the results are shown means nothing. "
+        f"Answer \"tie\" only if neither is better.\n"
+        f"Respond with JSON:\n"
+        f'{{"preferred": "A" or "B" or "tie", "explanation": "brief explanation"}}'
+    )
+
+
+def _failed_judgment(criteria: List[str], error: str, explanation: str) -> Dict[str, Any]:
+    """Placeholder result for a document the LLM could not judge"""
+    return {
+        "error": error,
+        "scores": {c: 0.0 for c in criteria},
+        "overall_score": 0.0,
+        "explanation": explanation
+    }
+
+
+def _format_listwise_document(index: int, document: Dict[str, Any]) -> str:
+    return (
+        f"[{index}] Title: {document.get('title', 'N/A')}\n"
+        f"Snippet: {document.get('snippet', 'N/A')}\n"
+        f"URL: {document.get('url', 'N/A')}"
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def _as_index(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        digits = value.strip().strip("[]#").strip()
+        if digits.isdigit():
+            return int(digits)
+    return None
+
+
+def _valid_judgment(item: Any, criteria: List[str]) -> Optional[Dict[str, Any]]:
+    """Normalize one judgment, or None if it is unusable"""
+    if not isinstance(item, dict) or not isinstance(item.get("scores"), dict):
+        return None
+    try:
+        scores = {c: float(item["scores"][c]) for c in criteria}
+        overall = float(item["overall_score"]) if "overall_score" in item else sum(scores.values()) / len(scores)
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return None
+    return {"scores": scores, "overall_score": overall, "explanation": str(item.get("explanation", ""))}
+
+
+def parse_judgment(content: str, criteria: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Extract the judgment from a pointwise response
+    
+    Returns:
+        The normalized judgment, or None if the response is not valid JSON
+        or lacks a score for any criterion
+    """
+    try:
+        return _valid_judgment(json.loads(content), criteria)
+    except ValueError:
+        return None
+
+
+def parse_listwise_response(content: str, count: int, criteria: List[str]) -> Dict[int, Dict[str, Any]]:
+    """
+    Extract per-document judgments from a listwise response
+    
+    Tolerates code fences and text around the JSON object, a top-level list
+    instead of {"judgments": [...]}, objects keyed by result number, 1-based
+    or 0-based indices, and missing indices when the list length matches.
+    Entries that are missing or lack a score for a criterion are left out.
+    
+    Args:
+        content: Raw message content
+        count: Number of documents in the batch
+        criteria: Criteria every judgment must score
         
-        return prompt
+    Returns:
+        Dictionary mapping 0-based batch position to judgment
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, json.JSONDecodeError):
+        # Models sometimes wrap the object in prose or code fences
+        start, end = (content or "").find("{"), (content or "").rfind("}")
+        if start < 0 or end <= start:
+            return {}
+        try:
+            data = json.loads(content[start:end + 1])
+        except json.JSONDecodeError:
+            return {}
+    
+    if isinstance(data, dict):
+        items = data.get("judgments", data.get("results"))
+        if items is None:
+            # {"1": {...}, "2": {...}}
+            items = [dict(value, index=key) for key, value in data.items()
+                     if isinstance(value, dict) and _as_index(key) is not None]
+        elif isinstance(items, dict):
+            items = [dict(value, index=key) for key, value in items.items() if isinstance(value, dict)]
+    else:
+        items = data
+    if not isinstance(items, list):
+        return {}
+    
+    items = [item for item in items if isinstance(item, dict)]
+    indices = [_as_index(item.get("index", item.get("id"))) for item in items]
+    if any(i is None for i in indices):
+        # Fall back to list order, but only if it cannot be misaligned
+        indices = list(range(1, len(items) + 1)) if len(items) == count else []
+    elif indices and min(indices) == 0:
+        indices = [i + 1 for i in indices]
+    
+    parsed = {}
+    for index, item in zip(indices, items):
+        judgment = _valid_judgment(item, criteria)
+        if judgment is not None and 1 <= index <= count and index - 1 not in parsed:
+            parsed[index - 1] = judgment
+    return parsed
+
+
+_shared_judge: Optional[LLMJudge] = None
+_judgment_cache: Optional[JudgmentCache] = None
+
+
+def get_judgment_cache() -> Optional[JudgmentCache]:
+    """
+    Get the process-wide judgment cache configured from settings
+    
+    LLM_CACHE_PATH makes it persistent; LLM_CACHE_ENABLED=false disables it.
+    Judgments still queued for the file are written before the process exits.
+    """
+    global _judgment_cache
+    if _judgment_cache is None and settings.LLM_CACHE_ENABLED:
+        _judgment_cache = JudgmentCache(settings.LLM_CACHE_PATH, max_entries=settings.LLM_CACHE_MAX_ENTRIES)
+        atexit.register(_judgment_cache.flush)
+    return _judgment_cache
+
+
+def get_llm_judge() -> LLMJudge:
+    """
+    Get the process-wide judge configured from settings
+    
+    All callers share its connection pool and concurrency limit; the API
+    closes it on shutdown with close_llm_judge().
+    """
+    global _shared_judge
+    if _shared_judge is None:
+        _shared_judge = LLMJudge(
+            model_name=settings.LLM_MODEL,
+            config={
+                "temperature": 0.1,
+                "max_tokens": 1024,
+                "endpoint": settings.LLM_ENDPOINT,
+                "api_key": settings.LLM_API_KEY
+            },
+            cache=get_judgment_cache(),
+            rate_limiter=LLMRateLimiter(settings.LLM_REQUESTS_PER_MINUTE, settings.LLM_TOKENS_PER_MINUTE)
+        )
+    return _shared_judge
+
+
+def set_llm_judge(judge: Optional[LLMJudge]):
+    """Replace the shared judge, e.g. with a stub for load tests; close_llm_judge() closes it"""
+    global _shared_judge
+    _shared_judge = judge
+
+
+async def close_llm_judge():
+    """Close the shared judge's connections; the next get_llm_judge() starts afresh"""
+    global _shared_judge
+    if _shared_judge is not None:
+        judge, _shared_judge = _shared_judge, None
+        await judge.aclose()
 
 
 async def evaluate_search_results(query: str, documents: List[Dict[str, Any]], 
-                                 criteria: List[str]) -> List[Dict[str, Any]]:
+                                 criteria: List[str], judge: Optional[LLMJudge] = None,
+                                 cache_only: bool = False, listwise: bool = False,
+                                 priority: Priority = Priority.INTERACTIVE) -> List[Dict[str, Any]]:
     """
     Evaluate a set of search results using the LLM judge
     
@@ -144,32 +668,256 @@ async def evaluate_search_results(query: str, documents: List[Dict[str, Any]],
         query: Search query
         documents: List of documents to evaluate
         criteria: Evaluation criteria
+        judge: Judge to use (defaults to the shared judge)
+        cache_only: Only serve cached judgments (see LLMJudge.evaluate)
+        listwise: Judge several documents per LLM call (see LLMJudge.evaluate_batch)
+        priority: Rate limiter lane (BULK for batch jobs)
         
     Returns:
         List of evaluation results
     """
-    # Initialize LLM judge
-    judge = LLMJudge(
-        model_name=settings.LLM_MODEL,
-        config={
-            "temperature": 0.1,
-            "max_tokens": 1024,
-            "endpoint": settings.LLM_ENDPOINT,
-            "api_key": settings.LLM_API_KEY
-        }
-    )
+    judge = judge or get_llm_judge()
     
-    # Evaluate each document in parallel
-    tasks = []
-    for doc in documents:
-        task = judge.evaluate(query, doc, criteria)
-        tasks.append(task)
-    
-    # Wait for all evaluations to complete
-    results = await asyncio.gather(*tasks)
+    if listwise:
+        results = await judge.evaluate_batch(query, documents, criteria, cache_only, priority)
+    else:
+        # Evaluate documents concurrently; the judge bounds how many requests are in flight
+        results = await asyncio.gather(*(judge.evaluate(query, doc, criteria, cache_only, priority) for doc in documents))
     
     # Attach document IDs to results
     for i, result in enumerate(results):
         result["doc_id"] = documents[i].get("doc_id", f"doc_{i}")
     
-    return results
\ No newline at end of file
+    return results
+
+
+async def stream_search_results(query: str, documents: List[Dict[str, Any]], criteria: List[str],
+                                judge: Optional[LLMJudge] = None, cache_only: bool = False,
+                                listwise: bool = False, priority: Priority = Priority.INTERACTIVE,
+                                heartbeat: Optional[float] = None
+                                ) -> AsyncIterator[Optional[Tuple[int, Dict[str, Any]]]]:
+    """
+    Evaluate search results, yielding each judgment as soon as it is ready
+    
+    Takes the same arguments as evaluate_search_results. Cached judgments
+    come first; the rest arrive in completion order, a whole batch at a time
+    when listwise. Closing the generator early cancels the calls still in
+    flight.
+    
+    Args:
+        heartbeat: If set, yield None after this many seconds without a
+            judgment, so callers can keep idle connections alive
+        
+    Yields:
+        (document index, judgment with doc_id) pairs, or None as a heartbeat
+    """
+    judge = judge or get_llm_judge()
+    
+    if listwise:
+        ready, jobs = await judge._listwise_jobs(query, documents, criteria, cache_only, priority)
+    else:
+        async def judge_one(i: int) -> List[Tuple[int, Dict[str, Any]]]:
+            return [(i, await judge.evaluate(query, documents[i], criteria, cache_only, priority))]
+        ready, jobs = [], [judge_one(i) for i in range(len(documents))]
+    
+    tasks = {asyncio.ensure_future(job) for job in jobs}
+    try:
+        for i, judgment in ready:
+            judgment["doc_id"] = documents[i].get("doc_id", f"doc_{i}")
+            yield i, judgment
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                yield None
+                continue
+            for task in done:
+                for i, judgment in task.result():
+                    judgment["doc_id"] = documents[i].get("doc_id", f"doc_{i}")
+                    yield i, judgment
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _document_fields(document: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: document.get(name) for name in JUDGED_DOCUMENT_FIELDS}
+
+
+def parse_preference(content: str) -> Optional[int]:
+    """
+    Read a pairwise preference from an LLM response
+    
+    Returns:
+        1 if result A is preferred, -1 if B is, 0 for a tie, None if unreadable
+    """
+    try:
+        preferred = json.loads(content).get("preferred")
+    except (ValueError, AttributeError):
+        return None
+    value = str(preferred).strip().lower().replace("result", "").strip()
+    if value in ("a", "1", "first"):
+        return 1
+    if value in ("b", "2", "second"):
+        return -1
+    if value in ("tie", "equal", "none", "neither"):
+        return 0
+    return None
+
+
+class PairwiseJudge:
+    """
+    Ranking documents from pairwise LLM preferences
+    
+    The documents are merge sorted with the LLM as the comparator, which
+    needs at most about n log2 n comparisons instead of the n(n-1)/2 of
+    all pairs. The merges at each level of a bottom-up merge sort are
+    independent, so they run concurrently. Every pair is put to the model
+    in a canonical order (by content hash), so a comparison of (a, b) and
+    one of (b, a) share the same prompt and cache entry. Ties and failed
+    comparisons keep the current order, so the input ranking breaks ties.
+    """
+    
+    def __init__(self, judge: Optional[LLMJudge] = None, both_orders: bool = False, max_tokens: int = 256):
+        """
+        Initialize the pairwise judge
+        
+        Args:
+            judge: Judge whose client, concurrency limit, retries, rate
+                limiter, usage tracking and cache are used (defaults to the
+                shared judge)
+            both_orders: Ask for each pair in both orders and count
+                disagreements as ties, to cancel out position bias (twice the calls)
+            max_tokens: Completion token limit per comparison
+        """
+        self.judge = judge
+        self.both_orders = both_orders
+        self.max_tokens = max_tokens
+    
+    def _construct_pairwise_prompt(self, query: str, first: Dict[str, Any], second: Dict[str, Any],
+                                   criteria: List[str]) -> str:
+        """Construct a prompt for the LLM to compare two documents"""
+        return (
+            f"{_pairwise_instructions(tuple(criteria))}\n\n"
+            f"QUERY: {query}\n\n"
+            f"RESULT A:\n"
+            f"Title: {first.get('title', 'N/A')}\n"
+            f"Snippet: {first.get('snippet', 'N/A')}\n"
+            f"URL: {first.get('url', 'N/A')}\n\n"
+            f"RESULT B:\n"
+            f"Title: {second.get('title', 'N/A')}\n"
+            f"Snippet: {second.get('snippet', 'N/A')}\n"
+            f"URL: {second.get('url', 'N/A')}"
+        )
+    
+    async def _ask(self, judge: LLMJudge, query: str, first: Dict[str, Any], second: Dict[str, Any],
+                   criteria: List[str], priority: Priority, stats: Dict[str, int]) -> Optional[int]:
+        """Preference for first over second, or None if the call failed"""
+        prompt = self._construct_pairwise_prompt(query, first, second, criteria)
+        stats["llm_calls"] += 1
+        # Unreadable preferences are retried like transient failures
+        preference, _ = await judge._complete(prompt, criteria, self.max_tokens, priority, parse=parse_preference)
+        return preference
+    
+    async def compare(self, query: str, a: Dict[str, Any], b: Dict[str, Any], criteria: List[str],
+                      priority: Priority = Priority.INTERACTIVE, stats: Optional[Dict[str, int]] = None) -> int:
+        """
+        Compare two documents for a query
+        
+        Args:
+            query: Search query
+            a: First document
+            b: Second document
+            criteria: Evaluation criteria
+            priority: Rate limiter lane
+            stats: Counters to update (comparisons, llm_calls, cache_hits, failures)
+            
+        Returns:
+            1 if a is preferred, -1 if b is, 0 for a tie or a failed comparison
+        """
+        judge = self.judge or get_llm_judge()
+        stats = stats if stats is not None else _new_pairwise_stats()
+        stats["comparisons"] += 1
+        
+        # Canonical order: the same pair gets the same prompt and cache entry either way round
+        hashes = (payload_hash(_document_fields(a)), payload_hash(_document_fields(b)))
+        swapped = hashes[1] < hashes[0]
+        first, second = (b, a) if swapped else (a, b)
+        
+        key = None
+        if judge.cache is not None:
+            key = payload_hash({
+                "model": judge.model_name,
+                "temperature": judge.temperature,
+                "prompt_version": PAIRWISE_PROMPT_VERSION,
+                "both_orders": self.both_orders,
+                "query": query,
+                "documents": sorted(hashes),
+                "criteria": list(criteria)
+            })
+            cached = await judge.cache.aget(key)
+            if cached is not None:
+                stats["cache_hits"] += 1
+                return -cached["preference"] if swapped else cached["preference"]
+        
+        preferences = [await self._ask(judge, query, first, second, criteria, priority, stats)]
+        if self.both_orders:
+            reverse = await self._ask(judge, query, second, first, criteria, priority, stats)
+            preferences.append(None if reverse is None else -reverse)
+        
+        # Only this comparison's own outcome decides; stats is shared with concurrent merges
+        failed = preferences.count(None)
+        if failed:
+            stats["failures"] += failed
+            return 0
+        preference = preferences[0] if len(set(preferences)) == 1 else 0
+        if key is not None:
+            judge.cache.set(key, {"preference": preference}, judge.model_name)
+        return -preference if swapped else preference
+    
+    async def rank(self, query: str, documents: List[Dict[str, Any]], criteria: List[str],
+                   priority: Priority = Priority.INTERACTIVE) -> Dict[str, Any]:
+        """
+        Rank documents by pairwise preference
+        
+        Args:
+            query: Search query
+            documents: Documents in their current (e.g. ranker) order
+            criteria: Evaluation criteria
+            priority: Rate limiter lane
+            
+        Returns:
+            Dictionary with the ranked doc_ids, the ranked positions as
+            indices into documents, and comparison counters
+        """
+        stats = _new_pairwise_stats()
+        
+        async def merge(left: List[int], right: List[int]) -> List[int]:
+            merged = []
+            i = j = 0
+            while i < len(left) and j < len(right):
+                # Only a strict preference moves a later document ahead
+                if await self.compare(query, documents[right[j]], documents[left[i]], criteria, priority, stats) > 0:
+                    merged.append(right[j])
+                    j += 1
+                else:
+                    merged.append(left[i])
+                    i += 1
+            return merged + left[i:] + right[j:]
+        
+        runs = [[i] for i in range(len(documents))]
+        while len(runs) > 1:
+            merged = await asyncio.gather(*(merge(runs[k], runs[k + 1]) for k in range(0, len(runs) - 1, 2)))
+            if len(runs) % 2:
+                merged.append(runs[-1])
+            runs = merged
+        order = runs[0] if runs else []
+        
+        return dict(
+            stats,
+            ranking=[documents[i].get("doc_id", f"doc_{i}") for i in order],
+            order=order
+        )
+
+
+def _new_pairwise_stats() -> Dict[str, int]:
+    return {"comparisons": 0, "llm_calls": 0, "cache_hits": 0, "failures": 0}
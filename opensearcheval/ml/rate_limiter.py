@@ -0,0 +1,174 @@
+import asyncio
+import enum
+import heapq
+import itertools
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+from opensearcheval.utils.monitoring import LLM_RATE_LIMIT_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(enum.IntEnum):
+    """Scheduling lanes; lower values are served first"""
+    INTERACTIVE = 0
+    BULK = 1
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate
+
+    The bucket may go negative when a reservation is corrected upwards (see
+    LLMRateLimiter.record_usage); later requests then wait for the debt.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute if capacity is None else capacity
+        self.clock = clock
+        self.level = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until amount can be taken (0 if it can be taken now)"""
+        self._refill()
+        # Requests larger than the bucket only need it to be full
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class LLMRateLimiter:
+    """
+    Client-side scheduler for the LLM provider's rate limits
+
+    Callers reserve one request and an estimated token count before each
+    call. Requests and tokens per minute are enforced with token buckets;
+    waiters are served strictly by priority lane and then in arrival order, so
+    interactive judging is never stuck behind a bulk backlog. A 429 with
+    Retry-After pauses everyone, since the provider limit is shared.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the limiter
+
+        Args:
+            requests_per_minute: Request limit (0 for no limit)
+            tokens_per_minute: Prompt plus completion token limit (0 for no limit)
+            clock: Monotonic clock in seconds
+        """
+        self.clock = clock
+        self.requests = TokenBucket(requests_per_minute, clock=clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute else None
+        self.paused_until = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition: Optional[asyncio.Condition] = None
+        self._wait_metrics = {priority: LLM_RATE_LIMIT_WAIT.child(priority.name.lower()) for priority in Priority}
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _delay(self, tokens: int) -> float:
+        delay = max(0.0, self.paused_until - self.clock())
+        if self.requests is not None:
+            delay = max(delay, self.requests.time_until(1))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.time_until(tokens))
+        return delay
+
+    async def acquire(self, tokens: int, priority: Priority = Priority.INTERACTIVE):
+        """
+        Wait until a request of the given token cost may be sent, then reserve it
+
+        Args:
+            tokens: Estimated prompt plus maximum completion tokens
+            priority: Scheduling lane
+        """
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        started = self.clock()
+        entry = (int(priority), next(self._sequence))
+        async with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if self._waiters[0] == entry:
+                        delay = self._delay(tokens)
+                        if delay <= 0:
+                            break
+                        try:
+                            await asyncio.wait_for(self._condition.wait(), delay)
+                        except asyncio.TimeoutError:
+                            pass
+                    else:
+                        await self._condition.wait()
+            except BaseException:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+                raise
+            heapq.heappop(self._waiters)
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+            # Let the next waiter re-check the buckets
+            self._condition.notify_all()
+        self._wait_metrics[Priority(priority)].observe(self.clock() - started)
+
+    def record_usage(self, reserved: int, used: int):
+        """Correct a token reservation once the actual usage is known"""
+        if self.tokens is None:
+            return
+        if used < reserved:
+            self.tokens.give(reserved - used)
+        elif used > reserved:
+            self.tokens.take(used - reserved)
+
+    def pause(self, seconds: float):
+        """Hold all requests for the given time (e.g. from a Retry-After header)"""
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+        logger.warning(f"LLM requests paused for {seconds:.1f}s by the provider's rate limit")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, maximum: float = 30.0) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
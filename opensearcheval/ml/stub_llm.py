@@ -0,0 +1,268 @@
+"""
+Local stand-ins for the judge model, for offline load and performance testing
+
+StubLLM answers OpenAI-style chat completion requests with deterministic
+judgments after a simulated latency, and can inject server errors and 429
+rate limiting. It can be served over HTTP (create_stub_llm_app, or
+`python -m opensearcheval.ml.stub_llm`) or plugged straight into an httpx
+client (StubLLMTransport), which is what MockLLMJudge does.
+
+Usage:
+    python -m opensearcheval.ml.stub_llm --port 8900 --latency 0.5 --distribution lognormal --rate-limit-rate 0.05
+    LLM_ENDPOINT=http://127.0.0.1:8900/v1/chat/completions opensearcheval-api
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from opensearcheval.ml.llm_judge import LLMJudge
+from opensearcheval.ml.rate_limiter import TokenBucket
+from opensearcheval.utils.cache import payload_hash
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+_QUERY_PATTERN = re.compile(r"QUERY: (.*)")
+_CRITERIA_PATTERN = re.compile(r"following criteria: (.*)")
+_DOCUMENT_PATTERN = re.compile(r"(?:\[(\d+)\] )?Title: (.*)\n\s*Snippet: (.*)\n\s*URL: (.*)")
+
+
+def stub_score(query: str, title: str, snippet: str, url: str, criterion: str) -> float:
+    """Deterministic 0-5 score for a query, document and criterion"""
+    digest = payload_hash([query, title, snippet, url, criterion])
+    return round(int(digest[:8], 16) % 51 / 10.0, 1)
+
+
+class StubLLM:
+    """
+    Simulated judge model
+
+    Judgments depend only on the query, the document fields and the
+    criteria in the prompt, so a document gets the same scores whether it
+    is judged alone or in a listwise batch, on every run. Latency, error and
+    429 injection are random, drawn from a seeded generator.
+    """
+
+    def __init__(self, latency: float = 0.05, distribution: str = "fixed", sigma: float = 0.5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, requests_per_minute: float = 0,
+                 retry_after: float = 1.0, seed: Optional[int] = None):
+        """
+        Initialize the stub
+
+        Args:
+            latency: Mean response time in seconds
+            distribution: One of LATENCY_DISTRIBUTIONS; uniform draws from
+                [0, 2 * latency], lognormal has the given mean and sigma
+            sigma: Shape of the lognormal distribution (larger means a longer tail)
+            error_rate: Share of requests answered with a 500
+            rate_limit_rate: Share of requests answered with a 429
+            requests_per_minute: Enforce a real request limit, answering 429 above it (0 for none)
+            retry_after: Retry-After seconds sent with injected 429s
+            seed: Seed for latency and failure injection
+        """
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latency = latency
+        self.distribution = distribution
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._random = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        if self.latency <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            return self._random.uniform(0, 2 * self.latency)
+        if self.distribution == "exponential":
+            return self._random.expovariate(1.0 / self.latency)
+        if self.distribution == "lognormal":
+            return self._random.lognormvariate(math.log(self.latency) - self.sigma ** 2 / 2, self.sigma)
+        return self.latency
+
+    def judge(self, prompt: str) -> str:
+        """Response content for a pointwise, listwise or pairwise judging prompt"""
+        query = _QUERY_PATTERN.search(prompt)
+        query = query.group(1).strip() if query else ""
+        criteria = _CRITERIA_PATTERN.search(prompt)
+        criteria = [c.strip() for c in criteria.group(1).split(",")] if criteria else ["relevance"]
+
+        judgments = []
+        for index, title, snippet, url in _DOCUMENT_PATTERN.findall(prompt):
+            scores = {c: stub_score(query, title.strip(), snippet.strip(), url.strip(), c) for c in criteria}
+            judgment = {
+                "scores": scores,
+                "overall_score": round(sum(scores.values()) / len(scores), 2),
+                "explanation": "Stub judgment"
+            }
+            if index:
+                judgment["index"] = int(index)
+            judgments.append(judgment)
+
+        # Pairwise prompts show two results, A then B
+        if "RESULT A:" in prompt and len(judgments) == 2:
+            a, b = (j["overall_score"] for j in judgments)
+            preferred = "A" if a > b else "B" if b > a else "tie"
+            return json.dumps({"preferred": preferred, "explanation": "Stub preference"})
+        # Listwise prompts number their results as "[n] Title:"
+        if judgments and "index" in judgments[0]:
+            return json.dumps({"judgments": judgments})
+        if judgments:
+            return json.dumps(judgments[0])
+        return json.dumps({"scores": {c: 0.0 for c in criteria}, "overall_score": 0.0, "explanation": "No document"})
+
+    async def handle(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, str], Dict[str, Any]]:
+        """
+        Answer one chat completion request
+
+        Returns:
+            Tuple of (status code, headers, JSON body)
+        """
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self.bucket is not None and self.bucket.time_until(1) > 0:
+                self.rate_limited += 1
+                wait = math.ceil(self.bucket.time_until(1))
+                return 429, {"Retry-After": str(wait)}, {"error": {"message": "Rate limit reached", "type": "requests"}}
+            if self.bucket is not None:
+                self.bucket.take(1)
+
+            await asyncio.sleep(self.sample_latency())
+
+            draw = self._random.random()
+            if draw < self.rate_limit_rate:
+                self.rate_limited += 1
+                return 429, {"Retry-After": str(self.retry_after)}, {"error": {"message": "Rate limit reached", "type": "requests"}}
+            if draw < self.rate_limit_rate + self.error_rate:
+                self.errors += 1
+                return 500, {}, {"error": {"message": "Injected server error", "type": "server_error"}}
+
+            prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+            content = self.judge(prompt)
+            prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+            return 200, {}, {
+                "id": f"stub-{self.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens}
+            }
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight
+        }
+
+
+class StubLLMTransport(httpx.AsyncBaseTransport):
+    """httpx transport answering every request from a StubLLM, without sockets"""
+
+    def __init__(self, stub: StubLLM):
+        self.stub = stub
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        status_code, headers, payload = await self.stub.handle(json.loads(await request.aread()))
+        return httpx.Response(status_code, headers=headers, json=payload, request=request)
+
+
+def create_stub_llm_app(stub: Optional[StubLLM] = None):
+    """OpenAI-compatible chat completions server backed by a StubLLM"""
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+
+    stub = stub or StubLLM()
+    app = FastAPI()
+    app.state.stub = stub
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: Dict[str, Any]):
+        status_code, headers, payload = await stub.handle(body)
+        return JSONResponse(payload, status_code=status_code, headers=headers)
+
+    @app.get("/stats")
+    async def stats():
+        return stub.stats()
+
+    return app
+
+
+class MockLLMJudge(LLMJudge):
+    """
+    LLMJudge wired to an in-process StubLLM
+
+    Everything but the network is real: the concurrency limit, retries,
+    rate limiter, cache and response parsing all run as they would against
+    a provider, so the judging pipeline can be tested and benchmarked
+    offline. The stub's counters are available as judge.stub.
+    """
+
+    def __init__(self, model_name: str = "mock", config: Optional[Dict[str, Any]] = None,
+                 stub: Optional[StubLLM] = None, **kwargs):
+        """
+        Initialize the mock judge
+
+        Args:
+            model_name: Model name reported in metrics and cache keys
+            config: LLMJudge config (the endpoint is ignored)
+            stub: Simulated model (defaults to a StubLLM without latency)
+            **kwargs: cache and rate_limiter, as for LLMJudge
+        """
+        self.stub = stub or StubLLM(latency=0.0)
+        client = httpx.AsyncClient(transport=StubLLMTransport(self.stub))
+        super().__init__(model_name, dict({"endpoint": "http://stub-llm/v1/chat/completions"}, **(config or {})),
+                         client=client, **kwargs)
+        # The client was made here, so aclose() should close it
+        self._owns_client = True
+
+
+def main(argv: Optional[List[str]] = None):
+    """Serve a StubLLM over HTTP"""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean response time in seconds")
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--sigma", type=float, default=0.5, help="Lognormal shape")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of injected 429 responses")
+    parser.add_argument("--requests-per-minute", type=float, default=0, help="Enforced request limit (0 for none)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on injected 429s")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    stub = StubLLM(
+        latency=args.latency, distribution=args.distribution, sigma=args.sigma,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        requests_per_minute=args.requests_per_minute, retry_after=args.retry_after, seed=args.seed
+    )
+    uvicorn.run(create_stub_llm_app(stub), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
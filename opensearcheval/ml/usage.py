@@ -0,0 +1,117 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Experiment that LLM calls made in the current context are charged to
+current_experiment: ContextVar[Optional[str]] = ContextVar("llm_usage_experiment", default=None)
+
+
+@contextmanager
+def usage_scope(experiment_id: Optional[str]) -> Iterator[None]:
+    """
+    Charge LLM calls made inside the block (including tasks it starts) to an experiment
+
+    Args:
+        experiment_id: Experiment ID, or None for unattributed usage
+    """
+    token = current_experiment.set(experiment_id)
+    try:
+        yield
+    finally:
+        current_experiment.reset(token)
+
+
+@dataclass
+class UsageStats:
+    """Token, cost and latency totals for a model and experiment"""
+    calls: int = 0
+    failed_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    cost: float = 0.0
+    latency_seconds: float = 0.0
+
+    def merge(self, other: "UsageStats"):
+        for name, value in asdict(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        attempts = self.calls + self.failed_calls
+        return dict(
+            asdict(self),
+            total_tokens=self.prompt_tokens + self.completion_tokens,
+            mean_latency_ms=1000 * self.latency_seconds / attempts if attempts else 0.0
+        )
+
+
+class UsageTracker:
+    """
+    Aggregated LLM usage per model and experiment
+
+    Every attempt is recorded, so retried calls count once per attempt in
+    latency and failed_calls; tokens and cost come from the provider's
+    usage report on successful calls.
+    """
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, Optional[str]], UsageStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, prompt_tokens: int = 0, completion_tokens: int = 0,
+               cached_prompt_tokens: int = 0, cost: float = 0.0, latency: float = 0.0,
+               failed: bool = False, experiment_id: Optional[str] = None):
+        """
+        Record one LLM call attempt
+
+        Args:
+            model: Model name
+            prompt_tokens: Prompt tokens reported by the provider
+            completion_tokens: Completion tokens reported by the provider
+            cached_prompt_tokens: Prompt tokens served from the provider's prompt cache
+            cost: Cost of the call
+            latency: Seconds the request took
+            failed: Whether the attempt failed
+            experiment_id: Experiment to charge (defaults to the current usage_scope)
+        """
+        key = (model, experiment_id if experiment_id is not None else current_experiment.get())
+        with self._lock:
+            stats = self._stats.setdefault(key, UsageStats())
+            if failed:
+                stats.failed_calls += 1
+            else:
+                stats.calls += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cached_prompt_tokens += cached_prompt_tokens
+            stats.cost += cost
+            stats.latency_seconds += latency
+
+    def summary(self, model: Optional[str] = None, experiment_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Usage rows per model and experiment, optionally filtered"""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda item: (item[0][0], item[0][1] or ""))
+            return [
+                dict(stats.to_dict(), model=key_model, experiment_id=key_experiment)
+                for (key_model, key_experiment), stats in items
+                if (model is None or key_model == model) and (experiment_id is None or key_experiment == experiment_id)
+            ]
+
+    def totals(self, model: Optional[str] = None, experiment_id: Optional[str] = None) -> Dict[str, Any]:
+        """Usage summed over the rows summary() would return"""
+        total = UsageStats()
+        with self._lock:
+            for (key_model, key_experiment), stats in self._stats.items():
+                if (model is None or key_model == model) and (experiment_id is None or key_experiment == experiment_id):
+                    total.merge(stats)
+        return total.to_dict()
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+# Process-wide tracker used by every LLMJudge unless one is passed in
+usage_tracker = UsageTracker()
@@ -2,6 +2,9 @@
 Test package functionality and imports
 """
 
+import subprocess
+import sys
+
 import pytest
 import opensearcheval as ose
 
@@ -100,5 +103,21 @@ def test_config_loading():
     assert hasattr(settings, 'API_PORT')
 
 
+def test_lazy_imports():
+    """Test that importing the package defers heavy dependencies"""
+    code = (
+        "import sys, opensearcheval as ose\n"
+        "heavy = ['sklearn', 'scipy', 'matplotlib', 'opensearcheval.utils.stats']\n"
+        "assert not [m for m in heavy if m in sys.modules], [m for m in heavy if m in sys.modules]\n"
+        "assert callable(ose.t_test) and 'scipy' in sys.modules\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    
+    assert set(ose.__all__) <= set(dir(ose))
+    with pytest.raises(AttributeError):
+        ose.not_a_real_attribute
+
+
 if __name__ == "__main__":
     pytest.main([__file__]) 
\ No newline at end of file
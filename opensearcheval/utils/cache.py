@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from opensearcheval.core.config import get_settings
+from opensearcheval.utils.monitoring import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def payload_hash(payload: Any) -> str:
+    """Stable hash of a JSON-compatible payload (key order does not matter)"""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Byte-valued key/value store with per-entry TTL and atomic counters"""
+
+    # Calls do network I/O; async callers run them in a thread instead of on the event loop
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        pass
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU cache with TTL expiry"""
+
+    def __init__(self, max_entries: int = 10000, ttl: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Optional[float], bytes]]" = OrderedDict()
+        # Counters are kept apart so LRU eviction can never reset them
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._counters:
+                return str(self._counters[key]).encode()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._counters.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class FakeRedis:
+    """
+    Minimal in-memory stand-in for redis.Redis
+
+    Implements only the commands RedisCache uses, so the Redis code path can
+    be exercised without a server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode()
+        self._data[key] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def incr(self, key: str) -> int:
+        value = int(self.get(key) or 0) + 1
+        self._data[key] = (None, str(value).encode())
+        return value
+
+
+class RedisCache(CacheBackend):
+    """Cache backed by Redis, shared between API workers"""
+
+    blocking = True
+
+    def __init__(self, url: Optional[str] = None, client: Any = None, prefix: str = "opensearcheval:"):
+        """
+        Initialize the Redis cache
+
+        Args:
+            url: Redis URL (defaults to settings.redis_url)
+            client: Existing redis client (e.g. FakeRedis in tests)
+            prefix: Prefix for all keys written by this cache
+        """
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url or settings.redis_url)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        self.client.set(self.prefix + key, value, ex=ttl or None)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(self.prefix + key))
+
+
+class ResponseCache:
+    """
+    Namespaced cache for serialized responses
+
+    Each namespace has a generation counter that is part of every key, so
+    invalidate() drops a whole namespace with one increment instead of
+    scanning keys, on every worker sharing the backend.
+
+    Code running on an event loop uses aget/aset/ainvalidate, which run
+    blocking backends (Redis) in the default executor so a cache round
+    trip never stalls other requests.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: Optional[int] = None, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+
+    def _key(self, namespace: str, key: str) -> str:
+        generation = self.backend.get(f"generation:{namespace}") or 0
+        return f"{namespace}:{int(generation)}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """Get a cached value, or None on a miss (or when caching is disabled)"""
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(self._key(namespace, key))
+        except Exception as e:
+            logger.warning(f"Cache get failed for {namespace}: {str(e)}")
+            return None
+        CACHE_REQUESTS.child(namespace, "miss" if value is None else "hit").inc()
+        return value
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[int] = None):
+        """Store a value; backend failures are logged and ignored"""
+        if not self.enabled:
+            return
+        try:
+            self.backend.set(self._key(namespace, key), value, ttl or self.ttl)
+        except Exception as e:
+            logger.warning(f"Cache set failed for {namespace}: {str(e)}")
+
+    def invalidate(self, namespace: str):
+        """Drop every entry in a namespace"""
+        if not self.enabled:
+            return
+        try:
+            self.backend.incr(f"generation:{namespace}")
+        except Exception as e:
+            logger.error(f"Cache invalidation failed for {namespace}: {str(e)}")
+
+    async def _off_loop(self, call: Callable[[], Any]) -> Any:
+        if not self.enabled or not self.backend.blocking:
+            return call()
+        return await asyncio.get_running_loop().run_in_executor(None, call)
+
+    async def aget(self, namespace: str, key: str) -> Optional[bytes]:
+        """get() without blocking the event loop"""
+        return await self._off_loop(partial(self.get, namespace, key))
+
+    async def aset(self, namespace: str, key: str, value: bytes, ttl: Optional[int] = None):
+        """set() without blocking the event loop"""
+        await self._off_loop(partial(self.set, namespace, key, value, ttl))
+
+    async def ainvalidate(self, namespace: str):
+        """invalidate() without blocking the event loop"""
+        await self._off_loop(partial(self.invalidate, namespace))
+
+
+def create_response_cache() -> ResponseCache:
+    """
+    Create the response cache from settings
+
+    CACHE_BACKEND selects "memory" (per-process LRU) or "redis" (settings.redis_url);
+    ENABLE_CACHING=false turns the cache into a no-op.
+    """
+    if settings.CACHE_BACKEND == "redis":
+        backend = RedisCache(settings.redis_url)
+    else:
+        backend = LRUCache(max_entries=settings.CACHE_MAX_ENTRIES)
+    logger.info(f"Response cache backend: {settings.CACHE_BACKEND}")
+    return ResponseCache(backend, ttl=settings.CACHE_TTL, enabled=settings.ENABLE_CACHING)
@@ -0,0 +1,210 @@
+import time
+from typing import Dict, Tuple, Any
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+from opensearcheval.core.config import get_settings
+
+settings = get_settings()
+
+# Dedicated registry so /metrics only exposes OpenSearchEval series
+REGISTRY = CollectorRegistry(auto_describe=True)
+
+# Sub-millisecond buckets for in-process work, second-scale buckets for I/O
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1)
+IO_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _NoopChild:
+    """Stand-in for a labelled metric when metrics are disabled"""
+
+    def observe(self, amount: float):
+        pass
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+
+_NOOP = _NoopChild()
+
+
+class MetricFamily:
+    """
+    A Prometheus metric whose labelled children are bound once and reused
+
+    prometheus_client's own labels() takes a lock and builds a tuple on every
+    call; hot paths should call child() once at setup and keep the result.
+    """
+
+    def __init__(self, metric: Any):
+        self.metric = metric
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def child(self, *label_values: str) -> Any:
+        """Get (and cache) the child for a set of label values"""
+        child = self._children.get(label_values)
+        if child is None:
+            child = self.metric.labels(*label_values) if settings.ENABLE_METRICS else _NOOP
+            self._children[label_values] = child
+        return child
+
+
+# API
+HTTP_REQUEST_DURATION = MetricFamily(Histogram(
+    "opensearcheval_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=IO_BUCKETS,
+    registry=REGISTRY
+))
+HTTP_REQUESTS = MetricFamily(Counter(
+    "opensearcheval_http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+    registry=REGISTRY
+))
+
+ADMISSION_IN_FLIGHT = MetricFamily(Gauge(
+    "opensearcheval_admission_in_flight",
+    "Admitted requests currently running, by route class",
+    ["route_class"],
+    registry=REGISTRY
+))
+ADMISSION_WAITING = MetricFamily(Gauge(
+    "opensearcheval_admission_waiting",
+    "Requests queued for admission, by route class",
+    ["route_class"],
+    registry=REGISTRY
+))
+ADMISSION_REJECTED = MetricFamily(Counter(
+    "opensearcheval_admission_rejected_total",
+    "Requests shed by admission control, by route class and status code",
+    ["route_class", "status"],
+    registry=REGISTRY
+))
+
+# Response cache
+CACHE_REQUESTS = MetricFamily(Counter(
+    "opensearcheval_cache_requests_total",
+    "Response cache lookups by namespace and result",
+    ["namespace", "result"],
+    registry=REGISTRY
+))
+
+# Agents
+AGENT_QUEUE_DEPTH = MetricFamily(Gauge(
+    "opensearcheval_agent_queue_depth",
+    "Tasks waiting in each agent's queue",
+    ["agent"],
+    registry=REGISTRY
+))
+AGENT_QUEUE_WAIT = MetricFamily(Histogram(
+    "opensearcheval_agent_queue_wait_seconds",
+    "Time tasks spend queued before an agent picks them up",
+    ["agent"],
+    buckets=IO_BUCKETS,
+    registry=REGISTRY
+))
+AGENT_TASK_DURATION = MetricFamily(Histogram(
+    "opensearcheval_agent_task_duration_seconds",
+    "Time an agent spends processing one task",
+    ["agent"],
+    buckets=IO_BUCKETS,
+    registry=REGISTRY
+))
+
+# Metric computation
+METRIC_COMPUTE_DURATION = MetricFamily(Histogram(
+    "opensearcheval_metric_compute_seconds",
+    "Time to compute one search metric",
+    ["metric"],
+    buckets=FAST_BUCKETS,
+    registry=REGISTRY
+))
+
+# LLM judge
+LLM_REQUEST_DURATION = MetricFamily(Histogram(
+    "opensearcheval_llm_request_duration_seconds",
+    "LLM judge API call latency",
+    ["model", "outcome"],
+    buckets=IO_BUCKETS,
+    registry=REGISTRY
+))
+LLM_TOKENS = MetricFamily(Counter(
+    "opensearcheval_llm_tokens_total",
+    "Tokens used by LLM judge calls",
+    ["model", "kind"],
+    registry=REGISTRY
+))
+LLM_COST = MetricFamily(Counter(
+    "opensearcheval_llm_cost_total",
+    "Cost of LLM judge calls, from reported token usage and configured prices",
+    ["model"],
+    registry=REGISTRY
+))
+LLM_RETRIES = MetricFamily(Counter(
+    "opensearcheval_llm_retries_total",
+    "LLM judge calls retried, by model and reason",
+    ["model", "reason"],
+    registry=REGISTRY
+))
+LLM_RATE_LIMIT_WAIT = MetricFamily(Histogram(
+    "opensearcheval_llm_rate_limit_wait_seconds",
+    "Time spent waiting for the client-side LLM rate limiter, by priority lane",
+    ["priority"],
+    buckets=IO_BUCKETS,
+    registry=REGISTRY
+))
+
+# Data connectors
+DB_QUERY_DURATION = MetricFamily(Histogram(
+    "opensearcheval_db_query_duration_seconds",
+    "Query duration by connector",
+    ["connector"],
+    buckets=IO_BUCKETS,
+    registry=REGISTRY
+))
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render all registered metrics in the Prometheus text exposition format
+
+    Returns:
+        Tuple of (body, content type)
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording request latency and status per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ENABLE_METRICS:
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route on the scope; label by its
+            # template rather than the raw path to keep label sets bounded
+            route = scope.get("route")
+            template = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.child(method, template).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.child(method, template, str(status[0])).inc()
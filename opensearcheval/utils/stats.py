@@ -1,7 +1,8 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 from scipy import stats
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -91,8 +92,100 @@ def mann_whitney_u_test(control_data: List[float], treatment_data: List[float],
             "error": str(e)
         }
 
+# Upper bound on the memory used by one block of resamples
+DEFAULT_RESAMPLE_BLOCK_BYTES = 32 * 1024 * 1024
+
+def _resample_worker(strata: List[Tuple[np.ndarray, int]], n_resamples: int, replace: bool,
+                     seed: Any, block_bytes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Draw resampled control/treatment sums in memory-bounded blocks
+    
+    Each stratum is a (values, n_control) pair; observations are resampled
+    (with replacement for the bootstrap, as a permutation otherwise) within
+    their stratum and the first n_control draws are assigned to control.
+    """
+    rng = np.random.default_rng(seed)
+    n_total = sum(len(values) for values, _ in strata)
+    block_size = max(1, block_bytes // (8 * max(n_total, 1)))
+    
+    control_sums = np.empty(n_resamples)
+    treatment_sums = np.empty(n_resamples)
+    for start in range(0, n_resamples, block_size):
+        size = min(block_size, n_resamples - start)
+        control_block = np.zeros(size)
+        treatment_block = np.zeros(size)
+        for values, n_control in strata:
+            if replace:
+                draws = values[rng.integers(0, len(values), size=(size, len(values)))]
+            else:
+                draws = rng.permuted(np.broadcast_to(values, (size, len(values))), axis=1)
+            control_part = draws[:, :n_control].sum(axis=1)
+            control_block += control_part
+            treatment_block += draws.sum(axis=1) - control_part
+        control_sums[start:start + size] = control_block
+        treatment_sums[start:start + size] = treatment_block
+    
+    return control_sums, treatment_sums
+
+def _resampled_mean_differences(control_data: List[float], treatment_data: List[float],
+                                n_resamples: int, replace: bool,
+                                control_strata: Optional[List[Any]] = None,
+                                treatment_strata: Optional[List[Any]] = None,
+                                random_state: Optional[int] = None, n_jobs: int = 1,
+                                parallel_threshold: int = 10_000_000,
+                                block_bytes: int = DEFAULT_RESAMPLE_BLOCK_BYTES) -> np.ndarray:
+    """
+    Null distribution of the treatment - control difference in means
+    
+    Shared resampling engine for the bootstrap and permutation tests. Pooled
+    observations are resampled under the null hypothesis, optionally within
+    strata (e.g. query segments), in vectorized blocks. When n_jobs > 1 and the
+    total work (resamples x observations) exceeds parallel_threshold, blocks are
+    spread over a process pool with independent random streams.
+    """
+    control = np.asarray(control_data, dtype=float)
+    treatment = np.asarray(treatment_data, dtype=float)
+    
+    if control_strata is None or treatment_strata is None:
+        strata = [(np.concatenate([control, treatment]), len(control))]
+    else:
+        control_labels = np.asarray(control_strata)
+        treatment_labels = np.asarray(treatment_strata)
+        if len(control_labels) != len(control) or len(treatment_labels) != len(treatment):
+            raise ValueError("Strata labels must have one entry per observation")
+        strata = []
+        for label in np.unique(np.concatenate([control_labels, treatment_labels])):
+            control_values = control[control_labels == label]
+            treatment_values = treatment[treatment_labels == label]
+            strata.append((np.concatenate([control_values, treatment_values]), len(control_values)))
+    
+    seed_sequence = np.random.SeedSequence(random_state)
+    n_total = len(control) + len(treatment)
+    
+    if n_jobs > 1 and n_resamples * n_total >= parallel_threshold:
+        from concurrent.futures import ProcessPoolExecutor
+        
+        chunks = np.array_split(np.arange(n_resamples), n_jobs)
+        seeds = seed_sequence.spawn(len(chunks))
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [
+                executor.submit(_resample_worker, strata, len(chunk), replace, seed, block_bytes)
+                for chunk, seed in zip(chunks, seeds)
+                if len(chunk) > 0
+            ]
+            parts = [future.result() for future in futures]
+        control_sums = np.concatenate([part[0] for part in parts])
+        treatment_sums = np.concatenate([part[1] for part in parts])
+    else:
+        control_sums, treatment_sums = _resample_worker(
+            strata, n_resamples, replace, seed_sequence, block_bytes
+        )
+    
+    return treatment_sums / len(treatment) - control_sums / len(control)
+
 def bootstrap_test(control_data: List[float], treatment_data: List[float], 
-                  alpha: float = 0.05, n_resamples: int = 10000) -> Dict[str, Any]:
+                  alpha: float = 0.05, n_resamples: int = 10000,
+                  random_state: Optional[int] = None, n_jobs: int = 1) -> Dict[str, Any]:
     """
     Perform a bootstrap hypothesis test
     
@@ -101,6 +194,8 @@ def bootstrap_test(control_data: List[float], treatment_data: List[float],
         treatment_data: List of metric values for treatment group
         alpha: Significance level
         n_resamples: Number of bootstrap resamples
+        random_state: Seed for reproducible resampling
+        n_jobs: Number of worker processes for large groups
         
     Returns:
         Dictionary with test results
@@ -111,27 +206,17 @@ def bootstrap_test(control_data: List[float], treatment_data: List[float],
         treatment_mean = np.mean(treatment_data)
         observed_diff = treatment_mean - control_mean
         
-        # Combine data for bootstrap
-        combined = np.concatenate([control_data, treatment_data])
         n_control = len(control_data)
         n_treatment = len(treatment_data)
         
-        # Bootstrap resampling
-        diffs = []
-        for _ in range(n_resamples):
-            # Resample from combined data
-            resampled = np.random.choice(combined, size=n_control + n_treatment, replace=True)
-            
-            # Split into control and treatment
-            resample_control = resampled[:n_control]
-            resample_treatment = resampled[n_control:]
-            
-            # Calculate difference in means
-            diff = np.mean(resample_treatment) - np.mean(resample_control)
-            diffs.append(diff)
+        # Bootstrap resampling from the combined data
+        diffs = _resampled_mean_differences(
+            control_data, treatment_data, n_resamples, replace=True,
+            random_state=random_state, n_jobs=n_jobs
+        )
         
         # Calculate p-value
-        p_value = np.mean([abs(diff) >= abs(observed_diff) for diff in diffs])
+        p_value = np.mean(np.abs(diffs) >= abs(observed_diff))
         
         # Calculate confidence interval
         lower_percentile = alpha / 2 * 100
@@ -164,6 +249,70 @@ def bootstrap_test(control_data: List[float], treatment_data: List[float],
             "error": str(e)
         }
 
+def permutation_test(control_data: List[float], treatment_data: List[float],
+                     alpha: float = 0.05, n_resamples: int = 10000,
+                     control_strata: Optional[List[Any]] = None,
+                     treatment_strata: Optional[List[Any]] = None,
+                     random_state: Optional[int] = None, n_jobs: int = 1) -> Dict[str, Any]:
+    """
+    Perform a two-sided permutation test on the difference in means
+    
+    Group labels are shuffled (within strata when given) in vectorized,
+    memory-bounded blocks; large problems can be spread over a process pool.
+    
+    Args:
+        control_data: List of metric values for control group
+        treatment_data: List of metric values for treatment group
+        alpha: Significance level
+        n_resamples: Number of random permutations
+        control_strata: Optional segment label (e.g. query segment) per control value
+        treatment_strata: Optional segment label per treatment value
+        random_state: Seed for reproducible permutations
+        n_jobs: Number of worker processes for large groups
+        
+    Returns:
+        Dictionary with test results
+    """
+    try:
+        control_mean = np.mean(control_data)
+        treatment_mean = np.mean(treatment_data)
+        observed_diff = treatment_mean - control_mean
+        
+        diffs = _resampled_mean_differences(
+            control_data, treatment_data, n_resamples, replace=False,
+            control_strata=control_strata, treatment_strata=treatment_strata,
+            random_state=random_state, n_jobs=n_jobs
+        )
+        
+        # Add-one correction keeps the Monte Carlo p-value valid (never exactly zero)
+        extreme = np.count_nonzero(np.abs(diffs) >= abs(observed_diff) - 1e-12)
+        p_value = (extreme + 1) / (n_resamples + 1)
+        
+        percent_change = (observed_diff / control_mean) * 100 if control_mean != 0 else 0
+        
+        return {
+            "test": "permutation_test",
+            "observed_difference": float(observed_diff),
+            "p_value": float(p_value),
+            "control_mean": float(control_mean),
+            "treatment_mean": float(treatment_mean),
+            "percent_change": float(percent_change),
+            "significant": bool(p_value < alpha),
+            "confidence_level": 1 - alpha,
+            "n_resamples": n_resamples,
+            "stratified": control_strata is not None and treatment_strata is not None,
+            "sample_sizes": {
+                "control": len(control_data),
+                "treatment": len(treatment_data)
+            }
+        }
+    except Exception as e:
+        logger.error(f"Error in permutation_test: {str(e)}")
+        return {
+            "test": "permutation_test",
+            "error": str(e)
+        }
+
 def power_analysis(control_mean: float, control_std: float, 
                   min_detectable_effect: float, alpha: float = 0.05, 
                   power: float = 0.8) -> Dict[str, Any]:
@@ -204,4 +353,334 @@ def power_analysis(control_mean: float, control_std: float,
         return {
             "analysis": "power_analysis",
             "error": str(e)
-        }
\ No newline at end of file
+        }
+
+def adjust_p_values(p_values: Any, method: str = "holm") -> np.ndarray:
+    """
+    Adjust a family of p-values for multiple testing in a single vectorized pass
+    
+    Args:
+        p_values: Array-like of raw p-values (NaN entries are ignored and kept as NaN)
+        method: Correction method, one of "holm", "bh" (Benjamini-Hochberg),
+            "bonferroni" or "none"
+        
+    Returns:
+        Array of adjusted p-values with the same shape as the input
+    """
+    p = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p.shape, np.nan)
+    flat = p.ravel()
+    valid = ~np.isnan(flat)
+    m = int(valid.sum())
+    if m == 0 or method == "none":
+        return p.copy()
+    
+    values = flat[valid]
+    order = np.argsort(values, kind="mergesort")
+    ranked = values[order]
+    
+    if method == "holm":
+        scaled = ranked * (m - np.arange(m))
+        corrected = np.maximum.accumulate(scaled)
+    elif method in ("bh", "fdr_bh", "benjamini_hochberg"):
+        scaled = ranked * m / np.arange(1, m + 1)
+        corrected = np.minimum.accumulate(scaled[::-1])[::-1]
+    elif method == "bonferroni":
+        corrected = ranked * m
+    else:
+        raise ValueError(f"Unknown multiple-testing correction: {method}")
+    
+    result = np.empty(m)
+    result[order] = np.minimum(corrected, 1.0)
+    adjusted_flat = adjusted.ravel()
+    adjusted_flat[valid] = result
+    return adjusted_flat.reshape(p.shape)
+
+def summary_statistics(samples: List[List[float]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compute sample sizes, means and unbiased variances for a list of samples"""
+    n = np.zeros(len(samples))
+    mean = np.full(len(samples), np.nan)
+    var = np.full(len(samples), np.nan)
+    for i, values in enumerate(samples):
+        arr = np.asarray(values, dtype=float)
+        arr = arr[~np.isnan(arr)]
+        n[i] = arr.size
+        if arr.size > 0:
+            mean[i] = arr.mean()
+        if arr.size > 1:
+            var[i] = arr.var(ddof=1)
+    return n, mean, var
+
+def t_test_from_summary(n1: np.ndarray, mean1: np.ndarray, var1: np.ndarray,
+                        n2: np.ndarray, mean2: np.ndarray, var2: np.ndarray,
+                        alpha: float = 0.05, equal_var: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Two-sample t-tests computed elementwise from summary statistics
+    
+    All inputs broadcast against each other, so a whole arm x metric grid is
+    tested with a handful of array operations instead of one scipy call per pair.
+    Comparisons are oriented as group 2 minus group 1.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if equal_var:
+            dof = n1 + n2 - 2
+            pooled = ((n1 - 1) * var1 + (n2 - 1) * var2) / dof
+            se = np.sqrt(pooled * (1 / n1 + 1 / n2))
+        else:
+            v1 = var1 / n1
+            v2 = var2 / n2
+            se = np.sqrt(v1 + v2)
+            dof = (v1 + v2) ** 2 / (v1 ** 2 / (n1 - 1) + v2 ** 2 / (n2 - 1))
+        
+        diff = mean2 - mean1
+        t_stat = diff / se
+        p_value = 2 * stats.t.sf(np.abs(t_stat), dof)
+        margin = stats.t.ppf(1 - alpha / 2, dof) * se
+    
+    return {
+        "t_statistic": t_stat,
+        "p_value": p_value,
+        "degrees_of_freedom": dof,
+        "difference": diff,
+        "ci_lower": diff - margin,
+        "ci_upper": diff + margin
+    }
+
+def multi_arm_analysis(groups: Dict[str, Dict[str, List[float]]], control: str = "control",
+                       alpha: float = 0.05, correction: str = "holm",
+                       metrics: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Compare every treatment arm against the control on every metric at once
+    
+    Welch t-tests for the full arm x metric grid are evaluated as vectorized
+    array operations and the resulting family of p-values is corrected for
+    multiple testing in one step.
+    
+    Args:
+        groups: Mapping of arm name to a mapping of metric name to observed values
+        control: Name of the control arm
+        alpha: Family-wise significance level (or FDR level for "bh")
+        correction: Multiple-testing correction ("holm", "bh", "bonferroni" or "none")
+        metrics: Metrics to analyze; defaults to the control arm's metrics
+        
+    Returns:
+        Dictionary with per-metric, per-arm test results
+    """
+    try:
+        if control not in groups:
+            raise ValueError(f"Control group '{control}' not found")
+        
+        arms = [name for name in groups if name != control]
+        if not arms:
+            raise ValueError("Need at least one treatment group for comparison")
+        
+        if metrics is None:
+            metrics = list(groups[control].keys())
+        metrics = [m for m in metrics if all(m in groups[g] for g in groups)]
+        
+        # Sufficient statistics: control is (metrics,), treatments are (arms, metrics)
+        n_c, mean_c, var_c = summary_statistics([groups[control][m] for m in metrics])
+        flat_n, flat_mean, flat_var = summary_statistics(
+            [groups[arm][m] for arm in arms for m in metrics]
+        )
+        shape = (len(arms), len(metrics))
+        n_t, mean_t, var_t = flat_n.reshape(shape), flat_mean.reshape(shape), flat_var.reshape(shape)
+        
+        tests = t_test_from_summary(n_c, mean_c, var_c, n_t, mean_t, var_t, alpha=alpha)
+        
+        enough_data = (n_t >= 2) & (n_c >= 2)
+        raw_p = np.where(enough_data, tests["p_value"], np.nan)
+        adjusted_p = adjust_p_values(raw_p, method=correction)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent_change = np.where(mean_c != 0, (mean_t - mean_c) / mean_c * 100, 0.0)
+        
+        results: Dict[str, Dict[str, Any]] = {}
+        for j, metric_name in enumerate(metrics):
+            metric_results = {}
+            for i, arm in enumerate(arms):
+                if not enough_data[i, j]:
+                    metric_results[arm] = {"error": "Not enough data for statistical analysis"}
+                    continue
+                metric_results[arm] = {
+                    "test": "welch_t_test",
+                    "t_statistic": float(tests["t_statistic"][i, j]),
+                    "p_value": float(raw_p[i, j]),
+                    "p_value_adjusted": float(adjusted_p[i, j]),
+                    "control_mean": float(mean_c[j]),
+                    "treatment_mean": float(mean_t[i, j]),
+                    "difference": float(tests["difference"][i, j]),
+                    "percent_change": float(percent_change[i, j]),
+                    "confidence_interval": [float(tests["ci_lower"][i, j]), float(tests["ci_upper"][i, j])],
+                    "significant": bool(adjusted_p[i, j] < alpha),
+                    "sample_sizes": {
+                        "control": int(n_c[j]),
+                        "treatment": int(n_t[i, j])
+                    }
+                }
+            results[metric_name] = metric_results
+        
+        return {
+            "analysis": "multi_arm_analysis",
+            "control": control,
+            "arms": arms,
+            "metrics": metrics,
+            "correction": correction,
+            "num_comparisons": int(enough_data.sum()),
+            "confidence_level": 1 - alpha,
+            "results": results
+        }
+    except Exception as e:
+        logger.error(f"Error in multi_arm_analysis: {str(e)}")
+        return {
+            "analysis": "multi_arm_analysis",
+            "error": str(e)
+        }
+
+def ratio_metric_std(numerator_mean: float, numerator_std: float,
+                     denominator_mean: float, denominator_std: float,
+                     covariance: float = 0.0) -> Tuple[float, float]:
+    """
+    Per-unit mean and standard deviation of a ratio metric via the delta method
+    
+    Ratio metrics such as clicks per query are aggregated over randomization
+    units, so their variance depends on both the numerator and denominator.
+    
+    Args:
+        numerator_mean: Mean of the numerator per randomization unit
+        numerator_std: Standard deviation of the numerator per unit
+        denominator_mean: Mean of the denominator per randomization unit
+        denominator_std: Standard deviation of the denominator per unit
+        covariance: Covariance between numerator and denominator
+        
+    Returns:
+        Tuple of (ratio, standard deviation of the ratio per unit)
+    """
+    ratio = numerator_mean / denominator_mean
+    variance = (numerator_std ** 2 - 2 * ratio * covariance + ratio ** 2 * denominator_std ** 2) / denominator_mean ** 2
+    return ratio, float(np.sqrt(max(variance, 0.0)))
+
+def _as_tuple(values: Any) -> Tuple[float, ...]:
+    """Flatten scalars and array-likes into a hashable tuple of floats"""
+    return tuple(float(v) for v in np.atleast_1d(np.asarray(values, dtype=float)).ravel())
+
+@lru_cache(maxsize=1024)
+def _sample_size_grid(control_means: Tuple[float, ...], control_stds: Tuple[float, ...],
+                      effects: Tuple[float, ...], powers: Tuple[float, ...],
+                      alphas: Tuple[float, ...],
+                      allocation_ratios: Tuple[float, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Required control sample sizes over the full planning grid (memoized)
+    
+    Returns read-only arrays of shape (arms, metrics, effects, powers, alphas)
+    for the control and treatment groups of each treatment arm.
+    """
+    mean = np.asarray(control_means)[None, :, None, None, None]
+    std = np.asarray(control_stds)[None, :, None, None, None]
+    effect = np.asarray(effects)[None, None, :, None, None]
+    power = np.asarray(powers)[None, None, None, :, None]
+    alpha = np.asarray(alphas)[None, None, None, None, :]
+    ratio = np.asarray(allocation_ratios)[:, None, None, None, None]
+    
+    z = stats.norm.ppf(1 - alpha / 2) + stats.norm.ppf(power)
+    delta = mean * effect / 100
+    with np.errstate(divide="ignore", invalid="ignore"):
+        control_n = np.ceil(z ** 2 * std ** 2 * (1 + 1 / ratio) / delta ** 2)
+    treatment_n = np.ceil(control_n * ratio)
+    
+    control_n.flags.writeable = False
+    treatment_n.flags.writeable = False
+    return control_n, treatment_n
+
+def sample_size_grid(control_mean: Any, control_std: Any, min_detectable_effects: Any,
+                     alpha: Any = 0.05, power: Any = 0.8,
+                     traffic_split: Optional[Dict[str, float]] = None,
+                     control: str = "control") -> Dict[str, Any]:
+    """
+    Plan sample sizes over a grid of metrics, effects, power and significance levels
+    
+    Every input may be a scalar or an array; the planner returns the whole
+    metric x MDE x power x alpha grid from one vectorized computation, and
+    results are memoized on the inputs so repeated sweeps are free.
+    Unequal allocations (e.g. an Experiment.traffic_split) are handled per
+    treatment arm against the control arm.
+    
+    Args:
+        control_mean: Baseline mean(s), one per metric
+        control_std: Baseline standard deviation(s) per randomization unit
+            (see ratio_metric_std for ratio metrics)
+        min_detectable_effects: Relative effect sizes to detect (as percentage)
+        alpha: Significance level(s)
+        power: Desired statistical power(s)
+        traffic_split: Mapping of arm name to traffic share; defaults to a 50/50 split
+        control: Name of the control arm in traffic_split
+        
+    Returns:
+        Dictionary with the grid axes and nested lists indexed
+        [metric][effect][power][alpha]
+    """
+    try:
+        if traffic_split is None:
+            traffic_split = {"control": 0.5, "treatment": 0.5}
+        if control not in traffic_split:
+            raise ValueError(f"Control arm {control!r} is not in the traffic split")
+        
+        arms = [arm for arm in traffic_split if arm != control]
+        if not arms:
+            raise ValueError("Traffic split needs at least one treatment arm")
+        control_share = traffic_split[control]
+        if control_share <= 0:
+            raise ValueError("Control arm must receive traffic")
+        
+        means = _as_tuple(control_mean)
+        stds = _as_tuple(control_std)
+        if len(stds) == 1 and len(means) > 1:
+            stds = stds * len(means)
+        if len(means) != len(stds):
+            raise ValueError("control_mean and control_std must have the same length")
+        effects = _as_tuple(min_detectable_effects)
+        powers = _as_tuple(power)
+        alphas = _as_tuple(alpha)
+        ratios = tuple(traffic_split[arm] / control_share for arm in arms)
+        # A zero absolute effect or an arm without traffic needs infinitely many samples
+        if 0.0 in means:
+            raise ValueError("control_mean must be non-zero to size a relative effect")
+        if 0.0 in effects:
+            raise ValueError("min_detectable_effects must be non-zero")
+        if any(ratio <= 0 for ratio in ratios):
+            raise ValueError("Treatment arms must receive traffic")
+        if not all(0 < p < 1 for p in powers):
+            raise ValueError("power must be between 0 and 1 (exclusive)")
+        if not all(0 < a < 1 for a in alphas):
+            raise ValueError("alpha must be between 0 and 1 (exclusive)")
+        
+        control_n, treatment_n = _sample_size_grid(means, stds, effects, powers, alphas, ratios)
+        
+        # Total traffic needed so that every arm reaches its required size
+        total_n = np.ceil(np.max(control_n / control_share, axis=0))
+        
+        return {
+            "analysis": "sample_size_grid",
+            "axes": {
+                "control_mean": list(means),
+                "control_std": list(stds),
+                "min_detectable_effect_percent": list(effects),
+                "power": list(powers),
+                "significance_level": list(alphas)
+            },
+            "control": control,
+            "arms": {
+                arm: {
+                    "allocation_ratio": ratios[i],
+                    "control_sample_size": control_n[i].tolist(),
+                    "treatment_sample_size": treatment_n[i].tolist()
+                }
+                for i, arm in enumerate(arms)
+            },
+            "total_sample_size": total_n.tolist()
+        }
+    except Exception as e:
+        logger.error(f"Error in sample_size_grid: {str(e)}")
+        return {
+            "analysis": "sample_size_grid",
+            "error": str(e)
+        }
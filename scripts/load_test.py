@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Load-testing harness for the OpenSearchEval API
+
+Drives the FastAPI app either in-process (ASGI transport, no sockets) or
+through a local uvicorn server, with a stub LLM standing in for the judge
+model: called in-process for in-process runs, and as a local HTTP server
+for uvicorn runs. Reports p50/p95/p99 latency and throughput per scenario and
+exits non-zero when a latency SLO or error budget is exceeded, so it can
+gate changes to api/main.py.
+
+Usage:
+    python scripts/load_test.py
+    python scripts/load_test.py --target uvicorn --concurrency 32 --duration 20
+    python scripts/load_test.py --scenario evaluate --scenario bulk --slo-p95-ms 50
+    python scripts/load_test.py --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Scenario:
+    """One request type to generate load with"""
+    name: str
+    method: str
+    path: str
+    make_payload: Callable[[int], Any]
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ScenarioResult:
+    """Latency and throughput summary for one scenario"""
+    name: str
+    target: str
+    concurrency: int
+    requests: int
+    errors: int
+    shed: int
+    duration_s: float
+    requests_per_s: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+def make_evaluation(i: int, num_results: int = 10) -> Dict[str, Any]:
+    return {
+        "id": f"load_{i}",
+        "query": f"query {i % 500}",
+        "results": [
+            {"doc_id": f"doc{j}", "title": f"Document {j}", "snippet": "snippet text"}
+            for j in range(num_results)
+        ],
+        "user_interactions": [
+            {"type": "search", "timestamp": 100.0, "query": f"query {i % 500}"},
+            {"type": "click", "timestamp": 104.0, "doc_id": f"doc{i % num_results}", "dwell_time": 20.0}
+        ],
+        "relevance_judgments": {f"doc{j}": (i + j) % 3 for j in range(num_results)}
+    }
+
+
+def make_ab_test(i: int, sample_size: int = 200) -> Dict[str, Any]:
+    rng = np.random.default_rng(i)
+    def group(group_id, shift):
+        return {
+            "group_id": group_id,
+            "metrics": {
+                "mean_reciprocal_rank": (rng.beta(2, 3, sample_size) + shift).tolist(),
+                "click_through_rate": rng.binomial(1, 0.3 + shift, sample_size).astype(float).tolist()
+            },
+            "sample_size": sample_size
+        }
+    return {
+        "experiment_id": f"load_exp_{i}",
+        "control_group": group("control", 0.0),
+        "treatment_group": group("treatment", 0.02)
+    }
+
+
+def make_llm_judge(i: int, num_documents: int = 5) -> Dict[str, Any]:
+    return {
+        "query": f"query {i}",
+        "documents": [
+            {"doc_id": f"doc{j}", "title": f"Document {j}", "content": "Document content " * 20}
+            for j in range(num_documents)
+        ],
+        "evaluation_criteria": ["relevance", "factuality"]
+    }
+
+
+SCENARIOS = {
+    "evaluate": Scenario("evaluate", "POST", "/api/v1/evaluate", make_evaluation, {"mode": "sync"}),
+    "evaluate_async": Scenario("evaluate_async", "POST", "/api/v1/evaluate", make_evaluation, {"mode": "async"}),
+    "bulk": Scenario(
+        "bulk", "POST", "/api/v1/evaluate/bulk",
+        lambda i: {"items": [make_evaluation(i * 100 + j) for j in range(100)]}
+    ),
+    "ab_test": Scenario("ab_test", "POST", "/api/v1/analyze-ab-test", make_ab_test),
+    "llm_judge": Scenario("llm_judge", "POST", "/api/v1/llm-judge", make_llm_judge),
+    "llm_judge_listwise": Scenario(
+        "llm_judge_listwise", "POST", "/api/v1/llm-judge", lambda i: dict(make_llm_judge(i, 20), listwise=True)
+    ),
+    "list_experiments": Scenario("list_experiments", "GET", "/api/v1/experiments", lambda i: None, {"limit": 50}),
+}
+
+
+def stub_judge(stub_llm: Any, endpoint: Optional[str] = None) -> Any:
+    """
+    Build a judge configured like the API's shared judge but answered by the stub
+
+    Args:
+        stub_llm: StubLLM simulating the model
+        endpoint: URL of a stub LLM server; without one the stub is called in-process
+
+    Returns:
+        LLMJudge to install with set_llm_judge
+    """
+    from opensearcheval.core.config import get_settings
+    from opensearcheval.ml.llm_judge import LLMJudge, get_judgment_cache
+    from opensearcheval.ml.rate_limiter import LLMRateLimiter
+    from opensearcheval.ml.stub_llm import MockLLMJudge
+
+    settings = get_settings()
+    config = {"temperature": 0.1, "max_tokens": 1024}
+    kwargs = {
+        "cache": get_judgment_cache(),
+        "rate_limiter": LLMRateLimiter(settings.LLM_REQUESTS_PER_MINUTE, settings.LLM_TOKENS_PER_MINUTE)
+    }
+    if endpoint is None:
+        return MockLLMJudge(settings.LLM_MODEL, config, stub=stub_llm, **kwargs)
+    return LLMJudge(settings.LLM_MODEL, dict(config, endpoint=endpoint, api_key="stub"), **kwargs)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class UvicornThread:
+    """Run an ASGI app on a local uvicorn server in a background thread"""
+
+    def __init__(self, app: Any, port: int):
+        import uvicorn
+        self.port = port
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"uvicorn did not start on port {self.port}")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, target: str,
+                       concurrency: int, duration: float, max_requests: Optional[int]) -> ScenarioResult:
+    """Closed-loop load: concurrency workers issue requests back to back until time or count runs out"""
+    latencies: List[float] = []
+    errors = 0
+    shed = 0
+    counter = 0
+    deadline = time.perf_counter() + duration
+
+    # Payloads are built before timing starts so only the API is measured
+    pool_size = max_requests or 256
+    payloads = [scenario.make_payload(i) for i in range(pool_size)]
+
+    async def worker():
+        nonlocal errors, shed, counter
+        while time.perf_counter() < deadline and (max_requests is None or counter < max_requests):
+            i = counter
+            counter += 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(
+                    scenario.method, scenario.path, params=scenario.params,
+                    json=payloads[i % pool_size]
+                )
+                status = response.status_code
+            except httpx.HTTPError as e:
+                logger.debug(f"{scenario.name} request failed: {e}")
+                status = None
+            latencies.append(time.perf_counter() - started)
+            if status in (429, 503):
+                shed += 1
+            elif status is None or status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    values = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return ScenarioResult(
+        name=scenario.name,
+        target=target,
+        concurrency=concurrency,
+        requests=len(latencies),
+        errors=errors,
+        shed=shed,
+        duration_s=round(elapsed, 3),
+        requests_per_s=round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        p50_ms=round(float(p50), 2),
+        p95_ms=round(float(p95), 2),
+        p99_ms=round(float(p99), 2),
+        max_ms=round(float(values.max()), 2)
+    )
+
+
+async def run_load_test(scenarios: List[str], target: str = "inprocess", concurrency: int = 16,
+                        duration: float = 10.0, max_requests: Optional[int] = None,
+                        llm_latency: float = 0.05, llm_distribution: str = "fixed", llm_error_rate: float = 0.0,
+                        llm_rate_limit_rate: float = 0.0, warmup: int = 20) -> List[ScenarioResult]:
+    """
+    Run the selected scenarios against the API
+
+    Args:
+        scenarios: Scenario names (keys of SCENARIOS)
+        target: "inprocess" (ASGI transport) or "uvicorn" (local HTTP server)
+        concurrency: Concurrent in-flight requests
+        duration: Seconds per scenario
+        max_requests: Optional cap on requests per scenario
+        llm_latency: Mean simulated LLM response time in seconds
+        llm_distribution: Stub LLM latency distribution (see opensearcheval.ml.stub_llm)
+        llm_error_rate: Share of stub LLM requests answered with a 500
+        llm_rate_limit_rate: Share of stub LLM requests answered with a 429
+        warmup: Unmeasured requests per scenario before timing
+
+    Returns:
+        One result per scenario
+    """
+    from opensearcheval.ml.llm_judge import set_llm_judge
+    from opensearcheval.ml.stub_llm import StubLLM, create_stub_llm_app
+    from opensearcheval.api.main import app
+
+    # The stub replaces the shared judge outright, so no settings or configured endpoint are consulted;
+    # the app's shutdown closes it
+    stub_llm = StubLLM(latency=llm_latency, distribution=llm_distribution, error_rate=llm_error_rate,
+                       rate_limit_rate=llm_rate_limit_rate, retry_after=0.1)
+    results = []
+    if target == "uvicorn":
+        port = free_port()
+        with UvicornThread(create_stub_llm_app(stub_llm), port):
+            set_llm_judge(stub_judge(stub_llm, f"http://127.0.0.1:{port}/v1/chat/completions"))
+            with UvicornThread(app, free_port()) as server:
+                limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+                async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{server.port}", limits=limits, timeout=60) as client:
+                    for name in scenarios:
+                        await run_scenario(client, SCENARIOS[name], target, min(concurrency, 4), 1.0, warmup)
+                        results.append(await run_scenario(client, SCENARIOS[name], target, concurrency, duration, max_requests))
+    else:
+        await app.router.startup()
+        set_llm_judge(stub_judge(stub_llm))
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver", timeout=60) as client:
+                for name in scenarios:
+                    await run_scenario(client, SCENARIOS[name], target, min(concurrency, 4), 1.0, warmup)
+                    results.append(await run_scenario(client, SCENARIOS[name], target, concurrency, duration, max_requests))
+        finally:
+            await app.router.shutdown()
+    return results
+
+
+def print_report(results: List[ScenarioResult]):
+    header = f"{'scenario':<20}{'target':<11}{'conc':>5}{'reqs':>8}{'err':>6}{'shed':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r.name:<20}{r.target:<11}{r.concurrency:>5}{r.requests:>8}{r.errors:>6}{r.shed:>6}"
+              f"{r.requests_per_s:>9.1f}{r.p50_ms:>9.2f}{r.p95_ms:>9.2f}{r.p99_ms:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the OpenSearchEval API")
+    parser.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess",
+                        help="Drive the ASGI app in-process or through a local uvicorn server")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent in-flight requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--requests", type=int, default=None, help="Maximum requests per scenario")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Mean stub LLM latency in seconds")
+    parser.add_argument("--llm-distribution", choices=["fixed", "uniform", "exponential", "lognormal"], default="fixed",
+                        help="Stub LLM latency distribution")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Share of stub LLM requests failing with a 500")
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0, help="Share of stub LLM requests answered with a 429")
+    parser.add_argument("--slo-p95-ms", type=float, default=None, help="Fail if any scenario's p95 exceeds this")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Fail if any scenario's error rate exceeds this")
+    parser.add_argument("--json", type=str, default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    # Per-request logging would dominate the measurement
+    logging.getLogger("opensearcheval").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results = asyncio.run(run_load_test(
+        args.scenario or list(SCENARIOS), target=args.target, concurrency=args.concurrency,
+        duration=args.duration, max_requests=args.requests, llm_latency=args.llm_latency,
+        llm_distribution=args.llm_distribution, llm_error_rate=args.llm_error_rate,
+        llm_rate_limit_rate=args.llm_rate_limit_rate
+    ))
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+        logger.info(f"Results written to {args.json}")
+
+    failed = False
+    for r in results:
+        if r.requests and r.errors / r.requests > args.max_error_rate:
+            logger.error(f"{r.name}: error rate {r.errors / r.requests:.1%} exceeds {args.max_error_rate:.1%}")
+            failed = True
+        if args.slo_p95_ms is not None and r.p95_ms > args.slo_p95_ms:
+            logger.error(f"{r.name}: p95 {r.p95_ms:.1f} ms exceeds SLO {args.slo_p95_ms:.1f} ms")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
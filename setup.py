@@ -168,6 +168,7 @@ entry_points = {
         "ose=opensearcheval.cli:main",
         "opensearcheval-api=opensearcheval.api.main:main",
         "opensearcheval-ui=opensearcheval.ui.app:main",
+        "opensearcheval-batch-judge=opensearcheval.ml.batch_judge:main",
     ],
 }
 
@@ -0,0 +1,846 @@
+import asyncio
+import datetime
+import json
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from typing import List
+import httpx
+import numpy as np
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import parse_obj_as
+from opensearcheval.api import main as api, middleware as api_middleware, serialization
+from opensearcheval.api.routes import dashboard
+from opensearcheval.api.main import app, settings
+from opensearcheval.core.agent import AgentManager, ResultNotifier, UserBehaviorAgent
+from opensearcheval.api.middleware import AdmissionControlMiddleware, AdmissionRejected, CompressionMiddleware
+from opensearcheval.ml import llm_judge
+from opensearcheval.ml.stub_llm import MockLLMJudge
+from opensearcheval.ml.usage import usage_tracker
+
+def make_evaluation(i: int, num_results: int = 10):
+    return {
+        "id": f"eval_{i}",
+        "query": f"query {i}",
+        "results": [
+            {"doc_id": f"doc{j}", "title": f"Document {j}", "snippet": "snippet"}
+            for j in range(num_results)
+        ],
+        "user_interactions": [
+            {"type": "search", "timestamp": 100.0, "query": f"query {i}"},
+            {"type": "click", "timestamp": 104.0, "doc_id": f"doc{i % num_results}", "dwell_time": 20.0}
+        ],
+        "relevance_judgments": {f"doc{j}": j % 3 for j in range(num_results)}
+    }
+
+class TestEvaluate(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app).__enter__()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+    
+    def test_sync_mode(self):
+        response = self.client.post("/api/v1/evaluate?mode=sync", json=make_evaluation(1))
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["status"], "complete")
+        self.assertEqual(body["metrics"]["mean_reciprocal_rank"], 0.5)
+        self.assertEqual(body["metrics"]["precision_at_k"], 0.6)
+        self.assertEqual(body["metrics"]["click_through_rate"], 0.1)
+        self.assertEqual(body["metrics"]["time_to_first_click"], 4.0)
+        
+        stored = self.client.get("/api/v1/evaluation-results/eval_1")
+        self.assertEqual(stored.json()["metrics"], body["metrics"])
+    
+    def test_async_mode(self):
+        response = self.client.post("/api/v1/evaluate", json=make_evaluation(2))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"id": "eval_2", "metrics": {}, "status": "processing"})
+    
+    def test_invalid_mode(self):
+        response = self.client.post("/api/v1/evaluate?mode=later", json=make_evaluation(3))
+        self.assertEqual(response.status_code, 422)
+    
+    def test_ab_test_rejects_duplicate_groups(self):
+        def group(group_id):
+            return {"group_id": group_id, "metrics": {"ctr": [0.1, 0.2, 0.3]}, "sample_size": 3}
+        body = {"experiment_id": "exp_dup", "control_group": group("control"), "treatment_group": group("a"),
+                "treatment_groups": [group("b")]}
+        self.assertEqual(self.client.post("/api/v1/analyze-ab-test", json=body).status_code, 200)
+        body["treatment_groups"] = [group("a")]
+        self.assertEqual(self.client.post("/api/v1/analyze-ab-test", json=body).status_code, 422)
+
+class TestBulkEvaluation(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = TestClient(app)
+        self.items = [make_evaluation(i) for i in range(25)]
+    
+    def test_json_body(self):
+        response = self.client.post("/api/v1/evaluate/bulk", json={"items": self.items, "k": 5})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["count"], 25)
+        self.assertEqual([r["id"] for r in body["results"]], [i["id"] for i in self.items])
+        first = body["results"][0]["metrics"]
+        self.assertEqual(first["mean_reciprocal_rank"], 0.5)
+        self.assertEqual(first["precision_at_k"], 0.6)
+        self.assertEqual(first["time_to_first_click"], 4.0)
+        self.assertAlmostEqual(body["aggregates"]["click_through_rate"]["mean"], 0.1)
+    
+    def test_ndjson_body(self):
+        payload = "\n".join(json.dumps(item) for item in self.items)
+        response = self.client.post(
+            "/api/v1/evaluate/bulk?k=5",
+            content=payload,
+            headers={"content-type": "application/x-ndjson"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 25)
+    
+    def test_invalid_item(self):
+        response = self.client.post("/api/v1/evaluate/bulk", json={"items": [{"id": "x"}]})
+        self.assertEqual(response.status_code, 422)
+    
+    def test_malformed_parameters(self):
+        payload = "\n".join(json.dumps(item) for item in self.items[:2])
+        headers = {"content-type": "application/x-ndjson"}
+        response = self.client.post("/api/v1/evaluate/bulk?k=five", content=payload, headers=headers)
+        self.assertEqual(response.status_code, 422)
+        response = self.client.post("/api/v1/evaluate/bulk", content=payload,
+                                    headers=dict(headers, **{"content-length": "many"}))
+        self.assertEqual(response.status_code, 400)
+    
+    def test_size_limits(self):
+        max_items = settings.MAX_BULK_ITEMS
+        settings.MAX_BULK_ITEMS = 10
+        try:
+            response = self.client.post("/api/v1/evaluate/bulk", json={"items": self.items})
+            self.assertEqual(response.status_code, 413)
+        finally:
+            settings.MAX_BULK_ITEMS = max_items
+    
+    def test_chunked_body_limit(self):
+        line = json.dumps(self.items[0]).encode() + b"\n"
+        sent = []
+        
+        async def body():
+            for _ in range(100):
+                sent.append(len(line))
+                yield line
+        
+        async def post():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+                return await client.post("/api/v1/evaluate/bulk", content=body(),
+                                         headers={"content-type": "application/x-ndjson"})
+        
+        max_bytes = settings.MAX_BULK_REQUEST_BYTES
+        settings.MAX_BULK_REQUEST_BYTES = 10 * len(line)
+        try:
+            response = asyncio.run(post())
+        finally:
+            settings.MAX_BULK_REQUEST_BYTES = max_bytes
+        self.assertEqual(response.status_code, 413)
+        # Rejected as soon as the limit was passed, not after buffering the whole upload
+        self.assertLess(len(sent), 100)
+
+class TestStreamingEvaluation(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = TestClient(app)
+    
+    def test_ndjson_stream(self):
+        lines = [json.dumps(make_evaluation(i)) for i in range(5)]
+        lines.insert(2, json.dumps({"id": "broken"}))
+        
+        def body():
+            # Split lines across chunks to exercise incremental parsing
+            for line in lines:
+                yield line[:7].encode()
+                yield (line[7:] + "\n").encode()
+        
+        response = self.client.post(
+            "/api/v1/evaluate/stream?chunk_size=2",
+            content=body(),
+            headers={"content-type": "application/x-ndjson"}
+        )
+        self.assertEqual(response.status_code, 200)
+        records = [json.loads(line) for line in response.text.splitlines()]
+        
+        self.assertEqual([r["id"] for r in records if r["status"] == "complete"],
+                         [f"eval_{i}" for i in range(5)])
+        self.assertEqual([r["line"] for r in records if r["status"] == "error"], [3])
+        summary = records[-1]
+        self.assertEqual(summary["status"], "summary")
+        self.assertEqual((summary["count"], summary["errors"]), (5, 1))
+        self.assertEqual(summary["aggregates"]["mean_reciprocal_rank"]["mean"], 0.5)
+
+    def test_line_limit(self):
+        lines = [json.dumps(make_evaluation(i)).encode() for i in range(3)]
+        
+        def body():
+            # One byte at a time, the worst case for re-buffering partial lines
+            for line in lines:
+                for i in range(len(line)):
+                    yield line[i:i + 1]
+                yield b"\n"
+        
+        max_line = settings.MAX_NDJSON_LINE_BYTES
+        settings.MAX_NDJSON_LINE_BYTES = len(lines[0]) + 1
+        try:
+            response = self.client.post("/api/v1/evaluate/stream", content=body(),
+                                        headers={"content-type": "application/x-ndjson"})
+            records = [json.loads(line) for line in response.text.splitlines()]
+            self.assertEqual(records[-1]["count"], 3)
+            
+            settings.MAX_NDJSON_LINE_BYTES = 16
+            response = self.client.post("/api/v1/evaluate/stream", content=body(),
+                                        headers={"content-type": "application/x-ndjson"})
+            self.assertEqual(json.loads(response.text.splitlines()[-1]),
+                             {"status": "error", "error": "NDJSON line too long"})
+        finally:
+            settings.MAX_NDJSON_LINE_BYTES = max_line
+    
+    def test_chunks_are_evaluated_off_the_event_loop(self):
+        payload = b"".join(json.dumps(make_evaluation(i)).encode() + b"\n" for i in range(4))
+        threads = []
+        batch_search_metrics = api.batch_search_metrics
+        
+        def recorded(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return batch_search_metrics(*args, **kwargs)
+        
+        async def post():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+                return await client.post("/api/v1/evaluate/stream?chunk_size=2", content=payload,
+                                         headers={"content-type": "application/x-ndjson"})
+        
+        with patch.object(api, "batch_search_metrics", recorded):
+            response = asyncio.run(post())
+        self.assertEqual(json.loads(response.text.splitlines()[-1])["count"], 4)
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.get_ident(), threads)
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestResultPush(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app).__enter__()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+    
+    def test_notifier(self):
+        notifier = ResultNotifier()
+        
+        async def scenario():
+            waiter = asyncio.ensure_future(notifier.wait_for("agent", "key", timeout=1.0))
+            await asyncio.sleep(0)
+            self.assertEqual(notifier.subscriber_count("agent", "key"), 1)
+            notifier.publish("agent", "key", {"value": 1})
+            result = await waiter
+            with self.assertRaises(asyncio.TimeoutError):
+                await notifier.wait_for("agent", "other", timeout=0.01)
+            return result
+        
+        self.assertEqual(asyncio.run(scenario()), {"value": 1})
+        self.assertEqual(notifier.subscriber_count("agent", "other"), 0)
+    
+    def test_sse_result(self):
+        self.client.post("/api/v1/evaluate?mode=sync", json=make_evaluation(900))
+        
+        response = self.client.get("/api/v1/evaluation-results/eval_900/events")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        event, data = response.text.strip().split("\n")
+        self.assertEqual(event, "event: result")
+        body = json.loads(data[len("data:"):])
+        self.assertEqual(body["id"], "eval_900")
+        self.assertEqual(body["status"], "complete")
+        self.assertIn("mean_reciprocal_rank", body["metrics"])
+    
+    def test_sse_timeout(self):
+        response = self.client.get("/api/v1/ab-test-results/missing/events?timeout=0.05")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.text.startswith("event: timeout"))
+    
+    def test_websocket_push(self):
+        with self.client.websocket_connect("/api/v1/ws/results") as websocket:
+            websocket.send_json({"kind": "evaluation", "id": "eval_901", "timeout": 5})
+            self.client.post("/api/v1/evaluate?mode=async", json=make_evaluation(901))
+            message = websocket.receive_json()
+            self.assertEqual(message["status"], "complete")
+            self.assertEqual(message["result"]["id"], "eval_901")
+            
+            websocket.send_json({"kind": "unknown", "id": "eval_901"})
+            self.assertEqual(websocket.receive_json()["status"], "error")
+            
+            # Malformed messages get an error frame and the socket stays usable
+            for malformed in ("not json", "[1, 2]", '{"kind": "evaluation", "id": "eval_902", "timeout": "soon"}',
+                              '{"kind": "evaluation", "id": ["eval_902"]}'):
+                websocket.send_text(malformed)
+                self.assertEqual(websocket.receive_json()["status"], "error")
+            websocket.send_json({"kind": "evaluation", "id": "eval_902", "timeout": 5})
+            self.client.post("/api/v1/evaluate?mode=async", json=make_evaluation(902))
+            self.assertEqual(websocket.receive_json()["result"]["id"], "eval_902")
+
+
+class TestPrometheusMetrics(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app).__enter__()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+    
+    def test_metrics_exposition(self):
+        self.client.post("/api/v1/evaluate?mode=sync", json=make_evaluation(950))
+        self.client.get("/api/v1/evaluation-results/eval_950")
+        
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        body = response.text
+        # Labelled by route template, not the raw path
+        self.assertIn('route="/api/v1/evaluation-results/{evaluation_id}"', body)
+        self.assertNotIn("eval_950", body)
+        self.assertIn('opensearcheval_http_requests_total{method="POST",route="/api/v1/evaluate",status="200"}', body)
+        self.assertIn('opensearcheval_metric_compute_seconds_count{metric="mean_reciprocal_rank"}', body)
+
+
+class TestStartup(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app).__enter__()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+    
+    def test_readiness(self):
+        response = self.client.get("/ready")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertTrue(body["ready"])
+        self.assertIn(body["status"], ("ready", "warm"))
+        self.assertIsNotNone(body["startup_seconds"])
+        
+        # The background warm-up builds every lazy agent
+        for _ in range(200):
+            if self.client.get("/ready").json()["warm"]:
+                break
+            time.sleep(0.05)
+        body = self.client.get("/ready?warm=true").json()
+        self.assertEqual(body["status"], "warm")
+        self.assertEqual(body["pending_agents"], [])
+        self.assertEqual(set(self.client.get("/health").json()["agents"]),
+                         {"search_evaluator", "ab_tester", "user_behavior_analyzer"})
+    
+    def test_not_ready_before_warm(self):
+        with patch.dict(api.startup_state, {"warm": False}):
+            self.assertEqual(self.client.get("/ready").status_code, 200)
+            self.assertEqual(self.client.get("/ready?warm=true").status_code, 503)
+        with patch.dict(api.startup_state, {"ready": False, "warm": False}):
+            response = self.client.get("/ready")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json()["status"], "starting")
+    
+    def test_import_without_mlx(self):
+        # A None entry in sys.modules makes `import mlx` raise ImportError
+        code = "import sys; sys.modules['mlx'] = None; import opensearcheval.api.main"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+    
+    def test_lazy_agent_construction(self):
+        manager = AgentManager()
+        built = []
+        
+        def factory():
+            built.append(True)
+            return UserBehaviorAgent(name="lazy", config={})
+        
+        manager.register_factory("lazy", factory)
+        self.assertEqual(manager.agents, {})
+        self.assertEqual(manager.agent_names, ["lazy"])
+        self.assertEqual(manager.pending, ["lazy"])
+        
+        async def dispatch():
+            await manager.start_all()
+            self.assertTrue(await manager.dispatch_task("lazy", {"session_id": "s"}))
+            agent = manager.get_agent("lazy")
+            await asyncio.sleep(0)
+            running = agent.running
+            manager.stop_all()
+            return agent, running
+        
+        agent, running = asyncio.run(dispatch())
+        self.assertEqual(len(built), 1)
+        self.assertIs(manager.agents["lazy"], agent)
+        self.assertEqual(manager.pending, [])
+        # Built after start_all, so it is started on construction
+        self.assertTrue(running)
+
+
+class TestLLMJudgeEndpoint(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app).__enter__()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+    
+    def test_cache_only_never_calls_the_llm(self):
+        before = self.client.get("/api/v1/llm-judge/cache-stats").json()
+        response = self.client.post("/api/v1/llm-judge", json={
+            "query": "uncached query",
+            "documents": [{"doc_id": "d1", "title": "One"}, {"doc_id": "d2", "title": "Two"}],
+            "cache_only": True
+        })
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([j["error"] for j in body["judgments"]], ["Not cached", "Not cached"])
+        self.assertEqual(body["average_score"], 0)
+        
+        after = self.client.get("/api/v1/llm-judge/cache-stats").json()
+        self.assertEqual(after["misses"] - before["misses"], 2)
+    
+    def test_cascade_decides_clear_cases_locally(self):
+        before = self.client.get("/api/v1/llm-judge/cascade-stats").json()
+        # No LLM is reachable here, so keep audits out of it
+        with patch.object(api.get_cascade_judge(), "audit_rate", 0.0):
+            response = self.client.post("/api/v1/llm-judge", json={
+                "query": "python tutorial",
+                "documents": [
+                    {"doc_id": "d1", "title": "Python tutorial for beginners"},
+                    {"doc_id": "d2", "title": "Gardening in spring"}
+                ],
+                "evaluation_criteria": ["relevance"],
+                "cascade": True
+            })
+        self.assertEqual(response.status_code, 200)
+        judgments = response.json()["judgments"]
+        self.assertEqual([j["source"] for j in judgments], ["cascade", "cascade"])
+        self.assertEqual([j["overall_score"] for j in judgments], [5.0, 0.0])
+        
+        after = self.client.get("/api/v1/llm-judge/cascade-stats").json()
+        self.assertEqual(after["documents"] - before["documents"], 2)
+        self.assertEqual(after["llm_judged"], before["llm_judged"])
+    
+    def test_stream_ndjson(self):
+        with patch.object(llm_judge, "_shared_judge", MockLLMJudge()):
+            response = self.client.post("/api/v1/llm-judge/stream", json={
+                "query": "streamed query",
+                "documents": [{"doc_id": f"d{i}", "title": f"Streamed {i}"} for i in range(3)],
+                "evaluation_criteria": ["relevance"]
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+        records = [json.loads(line) for line in response.text.splitlines()]
+        judgments, summary = records[:-1], records[-1]
+        self.assertEqual(sorted(r["judgment"]["doc_id"] for r in judgments), ["d0", "d1", "d2"])
+        self.assertEqual([r["completed"] for r in judgments], [1, 2, 3])
+        scores = [r["judgment"]["overall_score"] for r in judgments]
+        self.assertAlmostEqual(judgments[-1]["average_score"], sum(scores) / 3)
+        self.assertEqual(summary["status"], "summary")
+        self.assertEqual((summary["count"], summary["errors"]), (3, 0))
+        self.assertAlmostEqual(summary["average_score"], sum(scores) / 3)
+    
+    def test_stream_sse(self):
+        response = self.client.post("/api/v1/llm-judge/stream", params={"format": "sse"}, json={
+            "query": "uncached streamed query",
+            "documents": [{"doc_id": "d1", "title": "One"}],
+            "cache_only": True
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+        self.assertEqual([lines[0] for lines in events], ["event: judgment", "event: summary"])
+        judgment = json.loads(events[0][1][len("data: "):])
+        self.assertEqual(judgment["judgment"]["error"], "Not cached")
+        self.assertEqual(json.loads(events[1][1][len("data: "):])["errors"], 1)
+        
+        response = self.client.post("/api/v1/llm-judge/stream", json={"query": "q", "documents": [], "cascade": True})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_pairwise_ranking(self):
+        documents = [{"doc_id": f"d{i}", "title": f"Ranked {i}"} for i in range(5)]
+        with patch.object(llm_judge, "_shared_judge", MockLLMJudge()):
+            response = self.client.post("/api/v1/llm-judge/pairwise", json={
+                "query": "pairwise query",
+                "documents": documents,
+                "evaluation_criteria": ["relevance"]
+            })
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(sorted(body["ranking"]), ["d0", "d1", "d2", "d3", "d4"])
+        self.assertEqual(body["all_pairs"], 10)
+        self.assertLessEqual(body["comparisons"], 8)
+    
+    def test_usage_report(self):
+        usage_tracker.record("usage-test-model", prompt_tokens=100, completion_tokens=10, cost=0.5,
+                             latency=0.2, experiment_id="usage-test")
+        response = self.client.get("/api/v1/llm-judge/usage", params={"experiment_id": "usage-test"})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([row["model"] for row in body["usage"]], ["usage-test-model"])
+        self.assertEqual(body["total"]["total_tokens"], 110)
+        self.assertAlmostEqual(body["total"]["mean_latency_ms"], 200.0)
+
+
+class TestAdmissionControl(unittest.TestCase):
+    
+    def make_middleware(self, release: asyncio.Event, **kwargs):
+        async def slow_app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+        return AdmissionControlMiddleware(slow_app, **kwargs)
+    
+    async def call(self, middleware, path):
+        messages = []
+        
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+        
+        async def send(message):
+            messages.append(message)
+        
+        await middleware({"type": "http", "method": "POST", "path": path, "headers": []}, receive, send)
+        start = messages[0]
+        return start["status"], dict(start["headers"])
+    
+    def test_route_classes(self):
+        middleware = AdmissionControlMiddleware(None, max_concurrent=10, queue_size=10, queue_timeout=1)
+        self.assertEqual(middleware.route_class("/api/v1/llm-judge"), "llm_judge")
+        self.assertEqual(middleware.route_class("/api/v1/evaluate/bulk"), "bulk")
+        self.assertEqual(middleware.route_class("/api/v1/evaluate"), "default")
+        self.assertIsNone(middleware.route_class("/health"))
+        self.assertIsNone(middleware.route_class("/api/v1/evaluation-results/eval_1/events"))
+    
+    def test_shedding(self):
+        async def scenario():
+            release = asyncio.Event()
+            # llm_judge gets 2 slots and 2 queue entries
+            middleware = self.make_middleware(release, max_concurrent=10, queue_size=10, queue_timeout=0.05)
+            
+            held = [asyncio.ensure_future(self.call(middleware, "/api/v1/llm-judge")) for _ in range(4)]
+            await asyncio.sleep(0)
+            self.assertEqual(middleware.limiters["llm_judge"].active, 2)
+            self.assertEqual(middleware.limiters["llm_judge"].waiting, 2)
+            
+            # Queue full: rejected immediately
+            status, headers = await self.call(middleware, "/api/v1/llm-judge")
+            self.assertEqual(status, 429)
+            self.assertEqual(headers[b"retry-after"], b"1")
+            
+            # Cheap routes are not starved by the saturated heavy class
+            cheap = asyncio.ensure_future(self.call(middleware, "/api/v1/experiments"))
+            await asyncio.sleep(0)
+            self.assertEqual(middleware.limiters["default"].active, 1)
+            
+            # Queued requests time out with 503
+            await asyncio.sleep(0.1)
+            release.set()
+            statuses = sorted([(await task)[0] for task in held])
+            self.assertEqual(statuses, [200, 200, 503, 503])
+            self.assertEqual((await cheap)[0], 200)
+            self.assertEqual(middleware.limiters["llm_judge"].active, 0)
+        
+        asyncio.run(scenario())
+    
+    def test_slot_handoff(self):
+        async def scenario():
+            release = asyncio.Event()
+            middleware = self.make_middleware(release, max_concurrent=5, queue_size=50, queue_timeout=5)
+            tasks = [asyncio.ensure_future(self.call(middleware, "/api/v1/analyze-ab-test")) for _ in range(6)]
+            await asyncio.sleep(0)
+            self.assertEqual(middleware.limiters["ab_test"].active, 1)
+            self.assertEqual(middleware.limiters["ab_test"].waiting, 5)
+            release.set()
+            self.assertEqual([(await task)[0] for task in tasks], [200] * 6)
+            self.assertEqual(middleware.limiters["ab_test"].active, 0)
+        
+        asyncio.run(scenario())
+    
+    def test_rejections_carry_cors_headers(self):
+        async def full(timeout):
+            raise AdmissionRejected(429, "Too many requests")
+        
+        with TestClient(app) as client:
+            middleware = app.middleware_stack
+            while not isinstance(middleware, AdmissionControlMiddleware):
+                middleware = middleware.app
+            with patch.object(middleware.limiters["default"], "acquire", full):
+                response = client.get("/api/v1/experiments", headers={"Origin": "https://dashboard.example"})
+        self.assertEqual(response.status_code, 429)
+        # Browsers hide responses without it, so clients could not see the Retry-After
+        self.assertEqual(response.headers["access-control-allow-origin"], "*")
+
+
+class TestSampleSizePlanning(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app).__enter__()
+        experiment = cls.client.post("/api/v1/experiments", json={"name": "sizing"}).json()
+        cls.url = f"/api/v1/experiments/{experiment['id']}/sample-size"
+        cls.body = {"metrics": {"ctr": {"mean": 0.3, "std": 0.46}}, "min_detectable_effects": [5]}
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+    
+    def test_plan(self):
+        response = self.client.post(self.url, json=dict(self.body, powers=[0.8, 0.9], alphas=[0.05]))
+        self.assertEqual(response.status_code, 200, response.text)
+        plan = response.json()["plan"]
+        self.assertEqual(plan["axes"]["metric"], ["ctr"])
+        sizes = plan["arms"]["treatment"]["control_sample_size"][0][0]
+        self.assertLess(sizes[0][0], sizes[1][0])
+    
+    def test_rejects_zero_delta(self):
+        # An infinite sample size cannot be encoded; it is rejected instead of failing with a 500
+        for changed in ({"min_detectable_effects": [0, 5]}, {"metrics": {"ctr": {"mean": 0.0, "std": 0.46}}}):
+            response = self.client.post(self.url, json=dict(self.body, **changed))
+            self.assertEqual(response.status_code, 422, response.text)
+    
+    def test_rejects_power_and_alpha_outside_zero_one(self):
+        for field in ("powers", "alphas"):
+            for value in (0.0, 1.0, 1.5, -0.1):
+                response = self.client.post(self.url, json=dict(self.body, **{field: [value]}))
+                self.assertEqual(response.status_code, 422, f"{field}={value}: {response.text}")
+
+class TestFastJSON(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app).__enter__()
+        for i in range(3):
+            cls.client.post("/api/v1/experiments", json={"name": f"json-{i}", "description": "é"})
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+    
+    def test_encoders_agree(self):
+        payload = {
+            "query": "naïve query",
+            "judgments": [{"doc_id": f"d{i}", "scores": {"relevance": i / 3}, "overall_score": 0.5} for i in range(5)],
+            "relevance": {1: 2, 3: 0},
+            "model": api.SearchEvaluationResponse(id="x", metrics={"mrr": 1.0})
+        }
+        expected = json.loads(json.dumps(jsonable_encoder(payload)))
+        self.assertEqual(json.loads(serialization.dumps(payload)), expected)
+        
+        with patch.object(serialization, "orjson", None):
+            self.assertEqual(json.loads(serialization.dumps(payload)), expected)
+            self.assertEqual(serialization.loads(b'{"a": [1, 2]}'), {"a": [1, 2]})
+    
+    def test_non_finite_floats_become_null(self):
+        payload = {
+            "mrr": float("nan"),
+            "bounds": (float("-inf"), 1.5),
+            "scores": np.array([np.nan, 0.5]),
+            "worst": np.float64("inf"),
+            "model": api.SearchEvaluationResponse(id="x", metrics={"ttfc": float("inf")})
+        }
+        expected = {
+            "mrr": None, "bounds": [None, 1.5], "scores": [None, 0.5], "worst": None,
+            "model": {"id": "x", "metrics": {"ttfc": None}, "status": "success"}
+        }
+        self.assertEqual(json.loads(serialization.dumps(payload)), expected)
+        with patch.object(serialization, "orjson", None):
+            self.assertEqual(json.loads(serialization.dumps(payload)), expected)
+    
+    def test_experiment_list_schema(self):
+        response = self.client.get("/api/v1/experiments")
+        self.assertEqual(response.status_code, 200)
+        expected = [
+            jsonable_encoder(api.ExperimentResponse(**exp.to_dict()))
+            for exp in api.experiment_manager.list_experiments()
+        ]
+        self.assertEqual(response.json(), expected)
+        parse_obj_as(List[api.ExperimentResponse], response.json())
+    
+    def test_bulk_schema(self):
+        items = [make_evaluation(i) for i in range(5)]
+        response = self.client.post("/api/v1/evaluate/bulk", json={"items": items})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(jsonable_encoder(api.BulkEvaluationResponse.parse_obj(body)), body)
+    
+    def test_invalid_json_body(self):
+        response = self.client.post(
+            "/api/v1/evaluate", content=b"{not json", headers={"content-type": "application/json"}
+        )
+        self.assertEqual(response.status_code, 422)
+
+
+class TestCompressionAndConditionalRequests(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app).__enter__()
+        for i in range(20):
+            cls.client.post("/api/v1/experiments", json={"name": f"cond-{i}", "description": "x" * 100})
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+    
+    def test_compression(self):
+        # brotli is optional; without it, clients that also accept gzip get gzip
+        expected = {"gzip": "gzip", "br, gzip": "gzip" if api_middleware.brotli is None else "br"}
+        for accept_encoding, encoding in expected.items():
+            response = self.client.get("/api/v1/experiments", headers={"accept-encoding": accept_encoding})
+            self.assertEqual(response.headers["content-encoding"], encoding)
+            self.assertEqual(response.headers["vary"], "Accept-Encoding")
+            # httpx transparently decodes both
+            self.assertEqual(len(response.json()), len(api.experiment_manager.experiments))
+        
+        response = self.client.get("/api/v1/experiments", headers={"accept-encoding": "identity"})
+        self.assertNotIn("content-encoding", response.headers)
+        
+        with patch.object(api_middleware, "brotli", None):
+            response = self.client.get("/api/v1/experiments", headers={"accept-encoding": "br, gzip"})
+            self.assertEqual(response.headers["content-encoding"], "gzip")
+            response = self.client.get("/api/v1/experiments", headers={"accept-encoding": "br"})
+            self.assertNotIn("content-encoding", response.headers)
+        
+        # Below the size threshold
+        response = self.client.get("/health", headers={"accept-encoding": "gzip"})
+        self.assertNotIn("content-encoding", response.headers)
+        
+        # Streams are not compressed
+        response = self.client.post(
+            "/api/v1/evaluate/stream",
+            content="\n".join(json.dumps(make_evaluation(i)) for i in range(50)).encode(),
+            headers={"accept-encoding": "gzip", "content-type": "application/x-ndjson"}
+        )
+        self.assertNotIn("content-encoding", response.headers)
+    
+    def test_compression_keeps_vary(self):
+        def respond(vary):
+            async def app(scope, receive, send):
+                headers = [(b"content-type", b"application/json")] + [(b"vary", value) for value in vary]
+                await send({"type": "http.response.start", "status": 200, "headers": headers})
+                await send({"type": "http.response.body", "body": b"[]" * 100})
+            return CompressionMiddleware(app, minimum_size=0)
+        
+        async def vary_header(middleware):
+            messages = []
+            
+            async def send(message):
+                messages.append(message)
+            
+            scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+            await middleware(scope, None, send)
+            return [value for name, value in messages[0]["headers"] if name == b"vary"]
+        
+        # Fields from inner middleware such as CORS are kept, and Accept-Encoding is not repeated
+        for vary, expected in (
+            ([], b"Accept-Encoding"),
+            ([b"Origin"], b"Origin, Accept-Encoding"),
+            ([b"Origin", b"Cookie, accept-encoding"], b"Origin, Cookie, accept-encoding"),
+            ([b"*"], b"*"),
+        ):
+            self.assertEqual(asyncio.run(vary_header(respond(vary))), [expected])
+    
+    def test_experiment_list_etag(self):
+        response = self.client.get("/api/v1/experiments")
+        etag = response.headers["etag"]
+        self.assertIn("last-modified", response.headers)
+        
+        response = self.client.get("/api/v1/experiments", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response.headers["etag"], etag)
+        
+        response = self.client.get(
+            "/api/v1/experiments", headers={"if-modified-since": response.headers["last-modified"]}
+        )
+        self.assertEqual(response.status_code, 304)
+        
+        experiment = api.experiment_manager.create_experiment(name="cond-new")
+        response = self.client.get("/api/v1/experiments", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["etag"], etag)
+        
+        etag = response.headers["etag"]
+        api.experiment_manager.delete_experiment(experiment.id)
+        response = self.client.get("/api/v1/experiments", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_experiment_etag_changes_on_update(self):
+        experiment = api.experiment_manager.list_experiments()[0]
+        url = f"/api/v1/experiments/{experiment.id}"
+        etag = self.client.get(url).headers["etag"]
+        self.assertEqual(self.client.get(url, headers={"if-none-match": etag}).status_code, 304)
+        
+        experiment.updated_at = experiment.updated_at + datetime.timedelta(seconds=1)
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], experiment.id)
+    
+    def test_experiment_pagination(self):
+        ids, url = [], "/api/v1/experiments?limit=7"
+        while True:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(e["id"] for e in response.json())
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                self.assertNotIn("link", response.headers)
+                break
+            self.assertIn('rel="next"', response.headers["link"])
+            url = f"/api/v1/experiments?limit=7&cursor={cursor}"
+        self.assertEqual(ids, [e["id"] for e in self.client.get("/api/v1/experiments").json()])
+        
+        self.assertEqual(self.client.get("/api/v1/experiments?cursor=bogus").status_code, 400)
+        self.assertEqual(self.client.get("/api/v1/experiments?limit=0").status_code, 422)
+    
+    def test_cached_experiment_follows_state(self):
+        experiment = api.experiment_manager.create_experiment(name="cache-state")
+        url = f"/api/v1/experiments/{experiment.id}"
+        self.assertEqual(self.client.get(url).json()["status"], "CREATED")
+        self.assertEqual(self.client.get(url).json()["status"], "CREATED")
+        
+        self.client.post(f"{url}/start")
+        self.assertEqual(self.client.get(url).json()["status"], "RUNNING")
+    
+    def test_dashboard_routes(self):
+        dashboard_app = FastAPI()
+        dashboard_app.include_router(dashboard.router)
+        with TestClient(dashboard_app) as client:
+            response = client.get("/api/v1/dashboard/summary")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                client.get("/api/v1/dashboard/summary", headers={"if-none-match": response.headers["etag"]}).status_code,
+                304
+            )
+            
+            experiment_id = api.experiment_manager.list_experiments()[0].id
+            response = client.get(f"/api/v1/dashboard/metrics-over-time/{experiment_id}?metric=ctr")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()["timestamps"]), 24)
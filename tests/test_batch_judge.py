@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+import httpx
+
+from opensearcheval.data.processors.relevance_judgments import RelevanceJudgmentProcessor
+from opensearcheval.ml.batch_judge import BatchJudgeJob, iter_checkpoint, relevance_grade
+from opensearcheval.ml.llm_judge import LLMJudge
+
+def completion(score):
+    content = {"scores": {"relevance": score}, "overall_score": score, "explanation": "ok"}
+    return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": json.dumps(content)}}]})
+
+def score_handler(calls):
+    """Score each document by the number in its title ("Document 3" scores 3 % 6)"""
+    def handler(request):
+        prompt = json.loads(request.content)["messages"][1]["content"]
+        calls.append(prompt)
+        number = int(prompt.split("Document ")[1].split()[0])
+        return completion(float(number % 6))
+    return handler
+
+class TestBatchJudgeJob(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.input_path = os.path.join(self.directory.name, "pairs.jsonl")
+        self.output_dir = os.path.join(self.directory.name, "out")
+        with open(self.input_path, "w") as f:
+            for i in range(10):
+                f.write(json.dumps({"query": f"query {i // 5}", "query_id": f"q{i // 5}",
+                                    "doc_id": f"doc{i}", "title": f"Document {i}"}) + "\n")
+            # Duplicates and garbage are tolerated
+            f.write(json.dumps({"query": "query 0", "doc_id": "doc0", "title": "Document 0"}) + "\n")
+            f.write("not json\n")
+
+    def run_job(self, handler, model="test-model", **kwargs):
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            judge = LLMJudge(model, {"max_retries": 0}, client=client)
+            job = BatchJudgeJob(self.input_path, self.output_dir, ["relevance"], judge=judge,
+                                concurrency=3, **kwargs)
+            return job, await job.run()
+        return asyncio.run(run())
+
+    def test_outputs(self):
+        calls = []
+        _, stats = self.run_job(score_handler(calls), chunk_size=4)
+        self.assertEqual(len(calls), 10)
+        self.assertEqual((stats.read, stats.duplicates, stats.invalid), (12, 1, 1))
+        self.assertEqual((stats.judged, stats.chunks_written), (10, 3))
+
+        with open(os.path.join(self.output_dir, "qrels.txt")) as f:
+            qrels = sorted(line.split() for line in f)
+        self.assertEqual(len(qrels), 10)
+        self.assertIn(["q1", "0", "doc5", "4"], qrels)
+        self.assertIn(["q0", "0", "doc0", "0"], qrels)
+
+        with open(os.path.join(self.output_dir, "judgments.jsonl")) as f:
+            records = [json.loads(line) for line in f]
+        df = RelevanceJudgmentProcessor().process_judgments(records)
+        # Grade 0 judgments survive processing
+        self.assertEqual(len(df), 10)
+        self.assertEqual(df.set_index("doc_id").loc["doc5", "relevance"], 1.0)
+
+    def test_resume_skips_completed_pairs(self):
+        calls = []
+
+        def flaky(request):
+            if "Document 7" in json.loads(request.content)["messages"][1]["content"]:
+                return httpx.Response(503)
+            return score_handler(calls)(request)
+
+        _, stats = self.run_job(flaky)
+        self.assertEqual((stats.judged, stats.failed), (9, 1))
+
+        calls.clear()
+        _, stats = self.run_job(score_handler(calls))
+        # Only the failed pair costs another call
+        self.assertEqual(len(calls), 1)
+        # The repeated doc0 line is also skipped as already judged
+        self.assertEqual((stats.resumed, stats.judged), (10, 1))
+        self.assertEqual(len(list(iter_checkpoint(self.output_dir))), 10)
+
+    def test_interrupted_job_keeps_finished_judgments(self):
+        calls = []
+
+        async def run():
+            stuck = asyncio.Event()
+
+            async def handler(request):
+                calls.append(request)
+                if len(calls) > 4:
+                    stuck.set()
+                    await asyncio.sleep(3600)
+                return completion(3.0)
+
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            job = BatchJudgeJob(self.input_path, self.output_dir, ["relevance"],
+                                judge=LLMJudge("test-model", {}, client=client), concurrency=1)
+            task = asyncio.create_task(job.run())
+            await stuck.wait()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        self.assertEqual(len(list(iter_checkpoint(self.output_dir))), 4)
+
+        calls.clear()
+        _, stats = self.run_job(score_handler(calls))
+        self.assertEqual((stats.resumed, stats.judged), (5, 6))
+
+    def test_listwise_groups_by_query(self):
+        calls = []
+
+        def handler(request):
+            prompt = json.loads(request.content)["messages"][1]["content"]
+            calls.append(prompt)
+            count = prompt.count("Title:")
+            return httpx.Response(200, json={"choices": [{"message": {"content": json.dumps({"judgments": [
+                {"index": i, "scores": {"relevance": 5.0}, "overall_score": 5.0} for i in range(1, count + 1)
+            ]})}}]})
+
+        _, stats = self.run_job(handler, listwise=True)
+        # One call per query
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(stats.judged, 10)
+
+    def test_changed_settings_need_a_new_directory(self):
+        self.run_job(score_handler([]))
+        with self.assertRaises(ValueError):
+            self.run_job(score_handler([]), model="other-model")
+        # Pointwise and listwise judgments are not mixed
+        with self.assertRaises(ValueError):
+            self.run_job(score_handler([]), listwise=True)
+    
+    def test_dead_workers_fail_the_job(self):
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(score_handler([])))
+            job = BatchJudgeJob(self.input_path, self.output_dir, ["relevance"],
+                                judge=LLMJudge("test-model", {}, client=client), concurrency=2)
+            
+            async def broken(unit):
+                raise RuntimeError("worker bug")
+            
+            job._judge_unit = broken
+            await asyncio.wait_for(job.run(), timeout=5)
+        
+        with self.assertRaisesRegex(RuntimeError, "worker bug"):
+            asyncio.run(run())
+
+    def test_relevance_grade(self):
+        self.assertEqual([relevance_grade(s) for s in (0, 1.2, 2.5, 5, 7)], [0, 1, 2, 4, 4])
+
+if __name__ == "__main__":
+    unittest.main()
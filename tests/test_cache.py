@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+import unittest
+from functools import partial
+
+from opensearcheval.core.agent import SearchEvaluationAgent
+from opensearcheval.core.experiment import ExperimentManager
+from opensearcheval.core.metrics import mean_reciprocal_rank, precision_at_k
+from opensearcheval.utils.cache import LRUCache, FakeRedis, RedisCache, ResponseCache, payload_hash
+
+class ThreadRecordingRedis(FakeRedis):
+    """FakeRedis remembering which threads called it"""
+    
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+    
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+    
+    def set(self, key, value, ex=None):
+        self.threads.add(threading.get_ident())
+        return super().set(key, value, ex=ex)
+    
+    def incr(self, key):
+        self.threads.add(threading.get_ident())
+        return super().incr(key)
+
+class TestBackends(unittest.TestCase):
+    
+    def check_backend(self, backend):
+        self.assertIsNone(backend.get("a"))
+        backend.set("a", b"1")
+        self.assertEqual(backend.get("a"), b"1")
+        backend.delete("a")
+        self.assertIsNone(backend.get("a"))
+        self.assertEqual(backend.incr("counter"), 1)
+        self.assertEqual(backend.incr("counter"), 2)
+        
+        backend.set("short", b"x", ttl=1)
+        self.assertEqual(backend.get("short"), b"x")
+    
+    def test_lru(self):
+        backend = LRUCache(max_entries=2)
+        self.check_backend(backend)
+        
+        backend.set("a", b"1")
+        backend.set("b", b"2")
+        backend.get("a")
+        backend.set("c", b"3")
+        # b was least recently used; counters survive eviction
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.get("a"), b"1")
+        self.assertEqual(backend.incr("counter"), 3)
+    
+    def test_lru_ttl(self):
+        backend = LRUCache(ttl=1)
+        backend.set("a", b"1")
+        backend._entries["a"] = (time.monotonic() - 1, b"1")
+        self.assertIsNone(backend.get("a"))
+    
+    def test_redis(self):
+        self.check_backend(RedisCache(client=FakeRedis()))
+
+class TestResponseCache(unittest.TestCase):
+    
+    def test_namespace_invalidation(self):
+        backend = FakeRedis()
+        # Two workers sharing one Redis
+        first = ResponseCache(RedisCache(client=backend))
+        second = ResponseCache(RedisCache(client=backend))
+        
+        first.set("experiments", "list", b"[1]")
+        first.set("evaluation", "abc", b"{}")
+        self.assertEqual(second.get("experiments", "list"), b"[1]")
+        
+        second.invalidate("experiments")
+        self.assertIsNone(first.get("experiments", "list"))
+        self.assertEqual(first.get("evaluation", "abc"), b"{}")
+    
+    def test_async_calls_leave_the_event_loop(self):
+        client = ThreadRecordingRedis()
+        cache = ResponseCache(RedisCache(client=client))
+        agent = SearchEvaluationAgent("search", {}, [mean_reciprocal_rank], cache=cache)
+        data = {"id": "e1", "query": "q", "results": [{"doc_id": "d1"}], "relevance_judgments": {"d1": 1}}
+        
+        async def run():
+            await cache.aset("experiments", "list", b"[1]")
+            cached = await cache.aget("experiments", "list")
+            await cache.ainvalidate("experiments")
+            evaluation = await agent.process(data)
+            return cached, await cache.aget("experiments", "list"), evaluation
+        
+        cached, invalidated, evaluation = asyncio.run(run())
+        self.assertEqual((cached, invalidated), (b"[1]", None))
+        # asyncio.run drives the loop on this thread; Redis was only called from the executor
+        self.assertTrue(client.threads)
+        self.assertNotIn(threading.get_ident(), client.threads)
+        # The sync path shares the cached evaluation
+        self.assertEqual(agent.evaluate(data), evaluation)
+    
+    def test_disabled(self):
+        cache = ResponseCache(LRUCache(), enabled=False)
+        cache.set("experiments", "list", b"[1]")
+        self.assertIsNone(cache.get("experiments", "list"))
+    
+    def test_payload_hash(self):
+        self.assertEqual(payload_hash({"a": 1, "b": [1, 2]}), payload_hash({"b": [1, 2], "a": 1}))
+        self.assertNotEqual(payload_hash({"a": 1}), payload_hash({"a": 2}))
+    
+    def test_experiment_listener(self):
+        manager = ExperimentManager()
+        cache = ResponseCache(LRUCache())
+        manager.add_listener(lambda experiment: cache.invalidate("experiments"))
+        
+        experiment = manager.create_experiment(name="cached")
+        cache.set("experiments", experiment.id, b"{}")
+        experiment.start()
+        self.assertIsNone(cache.get("experiments", experiment.id))
+        
+        cache.set("experiments", experiment.id, b"{}")
+        manager.delete_experiment(experiment.id)
+        self.assertIsNone(cache.get("experiments", experiment.id))
+        self.assertNotIn("_on_change", experiment.to_dict())
+    
+    def test_evaluation_cache(self):
+        cache = ResponseCache(LRUCache())
+        calls = []
+        
+        def counting_mrr(query, results, relevance_judgments):
+            calls.append(query)
+            return mean_reciprocal_rank(query, results, relevance_judgments)
+        
+        agent = SearchEvaluationAgent(
+            "search", {}, [counting_mrr, partial(precision_at_k, k=5)], cache=cache
+        )
+        data = {
+            "id": "first",
+            "query": "q",
+            "results": [{"doc_id": "d1"}, {"doc_id": "d2"}],
+            "relevance_judgments": {"d2": 1}
+        }
+        evaluation = agent.evaluate(data)
+        self.assertEqual(agent.evaluate(dict(data, id="second")), evaluation)
+        self.assertEqual(len(calls), 1)
+        
+        agent.evaluate(dict(data, relevance_judgments={"d1": 1}))
+        self.assertEqual(len(calls), 2)
+        
+        # Different metric configuration does not share entries
+        other = SearchEvaluationAgent("search", {}, [counting_mrr, partial(precision_at_k, k=1)], cache=cache)
+        other.evaluate(data)
+        self.assertEqual(len(calls), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import random
+import unittest
+
+from opensearcheval.core.experiment import ExperimentManager, ExperimentStatus
+
+class TestExperimentIndexes(unittest.TestCase):
+    
+    def setUp(self):
+        self.manager = ExperimentManager()
+        rng = random.Random(7)
+        for i in range(200):
+            experiment = self.manager.create_experiment(name=f"exp-{i}", owner=rng.choice(["alice", "bob", "carol"]))
+            action = rng.random()
+            if action < 0.5:
+                experiment.start()
+            if action < 0.2:
+                experiment.complete()
+            elif action < 0.3:
+                experiment.pause()
+        for experiment_id in rng.sample(list(self.manager.experiments), 30):
+            self.manager.delete_experiment(experiment_id)
+    
+    def brute_force(self, status=None, owner=None):
+        result = [
+            e for e in self.manager.experiments.values()
+            if (not status or e.status == status) and (not owner or e.owner == owner)
+        ]
+        return sorted(result, key=lambda e: (e.created_at, e.id), reverse=True)
+    
+    def test_filters_match_scan(self):
+        for status in [None] + list(ExperimentStatus):
+            for owner in [None, "alice", "bob", "nobody"]:
+                self.assertEqual(
+                    [e.id for e in self.manager.list_experiments(status=status, owner=owner)],
+                    [e.id for e in self.brute_force(status, owner)]
+                )
+    
+    def test_cursor_pagination(self):
+        for status, owner in [(None, None), (ExperimentStatus.RUNNING, None), (None, "bob"),
+                              (ExperimentStatus.CREATED, "alice")]:
+            seen, cursor = [], None
+            while True:
+                page, cursor = self.manager.page_experiments(status=status, owner=owner, limit=7, cursor=cursor)
+                self.assertLessEqual(len(page), 7)
+                seen.extend(e.id for e in page)
+                if cursor is None:
+                    break
+            self.assertEqual(seen, [e.id for e in self.brute_force(status, owner)])
+    
+    def test_pages_stable_under_inserts(self):
+        first, cursor = self.manager.page_experiments(limit=10)
+        self.manager.create_experiment(name="newer")
+        second, _ = self.manager.page_experiments(limit=10, cursor=cursor)
+        self.assertEqual(
+            [e.id for e in first + second],
+            [e.id for e in self.brute_force()[1:21]]
+        )
+    
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            self.manager.page_experiments(cursor="not-a-cursor")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,921 @@
+import asyncio
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unittest
+
+import httpx
+
+from opensearcheval.ml import llm_judge
+from opensearcheval.ml.cascade import CascadeJudge, lexical_overlap
+from opensearcheval.ml.embeddings import EmbeddingModel
+from opensearcheval.ml.stub_llm import MockLLMJudge, StubLLM, create_stub_llm_app
+from opensearcheval.ml.usage import UsageTracker, usage_scope
+from opensearcheval.ml.judgment_cache import JudgmentCache, judgment_key
+from opensearcheval.ml.rate_limiter import LLMRateLimiter, Priority, TokenBucket, parse_retry_after
+from opensearcheval.ml.llm_judge import (
+    LLMJudge, PairwiseJudge, PROMPT_VERSION, estimate_tokens, evaluate_search_results, parse_listwise_response,
+    parse_preference, stream_search_results
+)
+
+JUDGMENT = {"scores": {"relevance": 4.0}, "overall_score": 4.0, "explanation": "Relevant"}
+
+def make_documents(n: int):
+    return [{"doc_id": f"doc{i}", "title": f"Document {i}", "snippet": "snippet"} for i in range(n)]
+
+def completion(content=JUDGMENT, status_code=200):
+    return httpx.Response(status_code, json={
+        "choices": [{"message": {"role": "assistant", "content": json.dumps(content)}}],
+        "usage": {"prompt_tokens": 100, "completion_tokens": 20}
+    })
+
+class TestLLMJudgeClient(unittest.TestCase):
+    
+    def test_requests_share_one_client(self):
+        requests = []
+        
+        def handler(request):
+            requests.append(request)
+            return completion()
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            judge = LLMJudge("test-model", {"api_key": "secret"}, client=client)
+            results = await evaluate_search_results("query", make_documents(5), ["relevance"], judge=judge)
+            self.assertIs(judge.client, client)
+            await judge.aclose()
+            # Injected clients belong to the caller
+            self.assertFalse(client.is_closed)
+            await client.aclose()
+            return results
+        
+        results = asyncio.run(run())
+        self.assertEqual([r["doc_id"] for r in results], [f"doc{i}" for i in range(5)])
+        self.assertEqual(results[0]["overall_score"], 4.0)
+        self.assertEqual(len(requests), 5)
+        self.assertEqual(requests[0].headers["authorization"], "Bearer secret")
+        self.assertEqual(json.loads(requests[0].content)["model"], "test-model")
+    
+    def test_concurrency_limit(self):
+        in_flight = 0
+        peak = 0
+        
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return completion()
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            judge = LLMJudge("test-model", {"max_concurrency": 3}, client=client)
+            async with judge:
+                return await evaluate_search_results("query", make_documents(12), ["relevance"], judge=judge)
+        
+        results = asyncio.run(run())
+        self.assertEqual(len(results), 12)
+        self.assertEqual(peak, 3)
+    
+    def test_errors_return_zero_scores(self):
+        calls = []
+        
+        def handler(request):
+            calls.append(request)
+            return completion(status_code=500)
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with LLMJudge("test-model", {"max_retries": 2, "retry_base_delay": 0}, client=client) as judge:
+                return await judge.evaluate("query", make_documents(1)[0], ["relevance"])
+        
+        result = asyncio.run(run())
+        # Retried, then reported as a failed judgment
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(result["error"], "API error: 500")
+        self.assertEqual(result["scores"], {"relevance": 0.0})
+    
+    def test_shared_judge_lifecycle(self):
+        async def run():
+            judge = llm_judge.get_llm_judge()
+            self.assertIs(llm_judge.get_llm_judge(), judge)
+            client = judge.client
+            self.assertIs(judge.client, client)
+            await llm_judge.close_llm_judge()
+            self.assertTrue(client.is_closed)
+            self.assertIsNot(llm_judge.get_llm_judge(), judge)
+            await llm_judge.close_llm_judge()
+        
+        asyncio.run(run())
+
+class TestJudgmentCache(unittest.TestCase):
+    
+    def setUp(self):
+        self.calls = 0
+        
+        def handler(request):
+            self.calls += 1
+            return completion()
+        
+        self.handler = handler
+    
+    def judge(self, cache):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        return LLMJudge("test-model", {"temperature": 0.1}, client=client, cache=cache)
+    
+    def test_repeated_judgments_are_cached(self):
+        cache = JudgmentCache()
+        documents = make_documents(4)
+        
+        async def run():
+            judge = self.judge(cache)
+            first = await evaluate_search_results("query", documents, ["relevance"], judge=judge)
+            second = await evaluate_search_results("query", documents, ["relevance"], judge=judge)
+            # A different query is a different judgment
+            await evaluate_search_results("other query", documents[:1], ["relevance"], judge=judge)
+            return first, second
+        
+        first, second = asyncio.run(run())
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 5)
+        stats = cache.stats()
+        self.assertEqual((stats["memory_hits"], stats["misses"]), (4, 5))
+        self.assertAlmostEqual(stats["hit_rate"], 4 / 9)
+    
+    def test_key_inputs(self):
+        document = make_documents(1)[0]
+        key = judgment_key("m", 0.1, PROMPT_VERSION, "q", document, ["relevance"])
+        # Document IDs and fields the prompt does not use are not part of the key
+        self.assertEqual(key, judgment_key("m", 0.1, PROMPT_VERSION, "q", dict(document, doc_id="x", score=3), ["relevance"]))
+        for changed in (
+            judgment_key("m2", 0.1, PROMPT_VERSION, "q", document, ["relevance"]),
+            judgment_key("m", 0.7, PROMPT_VERSION, "q", document, ["relevance"]),
+            judgment_key("m", 0.1, PROMPT_VERSION + "-next", "q", document, ["relevance"]),
+            judgment_key("m", 0.1, PROMPT_VERSION, "q", dict(document, title="Other"), ["relevance"]),
+            judgment_key("m", 0.1, PROMPT_VERSION, "q", document, ["relevance", "factuality"]),
+        ):
+            self.assertNotEqual(key, changed)
+    
+    def test_persistent_cache_and_cache_only(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "judgments.db")
+            documents = make_documents(3)
+            
+            cache = JudgmentCache(path)
+            asyncio.run(evaluate_search_results("query", documents[:2], ["relevance"], judge=self.judge(cache)))
+            cache.close()
+            self.assertEqual(self.calls, 2)
+            
+            # A new process reads the judgments back from disk
+            reopened = JudgmentCache(path)
+            results = asyncio.run(evaluate_search_results(
+                "query", documents, ["relevance"], judge=self.judge(reopened), cache_only=True
+            ))
+            self.assertEqual(self.calls, 2)
+            self.assertEqual([r["overall_score"] for r in results[:2]], [4.0, 4.0])
+            self.assertEqual(results[2]["error"], "Not cached")
+            self.assertEqual(results[2]["doc_id"], "doc2")
+            self.assertEqual(reopened.stats()["disk_hits"], 2)
+            self.assertEqual(len(reopened), 2)
+            reopened.close()
+    
+    def test_errors_are_not_cached(self):
+        cache = JudgmentCache()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: completion(status_code=500)))
+        judge = LLMJudge("test-model", {"max_retries": 0}, client=client, cache=cache)
+        asyncio.run(judge.evaluate("query", make_documents(1)[0], ["relevance"]))
+        self.assertEqual(len(cache), 0)
+    
+    def test_invalid_responses_are_retried_and_not_cached(self):
+        cache = JudgmentCache()
+        replies = [{}, {"scores": {"other": 1.0}}, JUDGMENT]
+        
+        def handler(request):
+            self.calls += 1
+            return completion(replies.pop(0))
+        
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        judge = LLMJudge("test-model", {"max_retries": 1, "retry_base_delay": 0}, client=client, cache=cache)
+        document = make_documents(1)[0]
+        failed = asyncio.run(judge.evaluate("query", document, ["relevance"]))
+        self.assertEqual(failed["error"], "Failed to parse LLM response")
+        self.assertEqual(len(cache), 0)
+        
+        # The next request calls the LLM again and caches the valid judgment
+        judgment = asyncio.run(judge.evaluate("query", document, ["relevance"]))
+        self.assertEqual(judgment["overall_score"], 4.0)
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(len(cache), 1)
+
+    def test_sqlite_stays_off_the_event_loop(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = JudgmentCache(os.path.join(directory, "judgments.db"))
+            cache._db = SlowConnection(cache._db, delay=0.1)
+            documents = make_documents(3)
+            ticks = []
+            
+            async def run():
+                judge = self.judge(cache)
+                loop_thread = threading.get_ident()
+                
+                async def ticker():
+                    while True:
+                        ticks.append(time.monotonic())
+                        await asyncio.sleep(0.005)
+                
+                task = asyncio.create_task(ticker())
+                await evaluate_search_results("query", documents, ["relevance"], judge=judge)
+                await asyncio.get_running_loop().run_in_executor(None, cache.flush)
+                cache.memory.clear()
+                await evaluate_search_results("query", documents, ["relevance"], judge=judge)
+                await evaluate_search_results("query", documents, ["relevance"], judge=judge, listwise=True)
+                task.cancel()
+                return loop_thread
+            
+            loop_thread = asyncio.run(run())
+            self.assertNotIn(loop_thread, cache._db.threads)
+            # One call per document, then one listwise call
+            self.assertEqual(self.calls, 4)
+            self.assertEqual(len(cache), 6)
+            self.assertEqual(cache.stats()["disk_hits"], 3)
+            # Every SQLite statement took 100ms, yet the loop kept ticking
+            self.assertLess(max(b - a for a, b in zip(ticks, ticks[1:])), 0.08)
+            cache.close()
+
+class SlowConnection:
+    """Wrap an SQLite connection, recording the threads that use it and delaying each statement"""
+    
+    def __init__(self, connection, delay):
+        self.connection = connection
+        self.delay = delay
+        self.threads = set()
+    
+    def _slow(self):
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+    
+    def execute(self, *args):
+        self._slow()
+        return self.connection.execute(*args)
+    
+    def executemany(self, *args):
+        self._slow()
+        return self.connection.executemany(*args)
+    
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+def listwise_handler(calls, drop=()):
+    """Answer listwise prompts with one judgment per numbered result, omitting positions in drop"""
+    def handler(request):
+        prompt = json.loads(request.content)["messages"][1]["content"]
+        calls.append(prompt)
+        indices = [int(i) for i in re.findall(r"\[(\d+)\] Title:", prompt)]
+        if not indices:
+            return completion()
+        return completion({"judgments": [
+            {"index": i, "scores": {"relevance": float(i)}, "overall_score": float(i), "explanation": "ok"}
+            for i in indices if i not in drop
+        ]})
+    return handler
+
+class TestListwiseJudging(unittest.TestCase):
+    
+    def run_batch(self, handler, documents, **config):
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            judge = LLMJudge("test-model", dict({"batch_max_documents": 10}, **config), client=client)
+            return await evaluate_search_results("query", documents, ["relevance"], judge=judge, listwise=True)
+        return asyncio.run(run())
+    
+    def test_batches_reduce_calls(self):
+        calls = []
+        results = self.run_batch(listwise_handler(calls), make_documents(20))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual([r["doc_id"] for r in results], [f"doc{i}" for i in range(20)])
+        # Scores come back to the right documents within each batch
+        self.assertEqual([r["overall_score"] for r in results[:3]], [1.0, 2.0, 3.0])
+        self.assertEqual(results[10]["overall_score"], 1.0)
+    
+    def test_token_budget_limits_batches(self):
+        calls = []
+        documents = [dict(doc, snippet="word " * 400) for doc in make_documents(6)]
+        self.run_batch(listwise_handler(calls), documents, batch_token_budget=1500)
+        self.assertGreater(len(calls), 1)
+        self.assertTrue(all(estimate_tokens(prompt) <= 1500 for prompt in calls))
+    
+    def test_unparsed_documents_fall_back_to_single_calls(self):
+        calls = []
+        results = self.run_batch(listwise_handler(calls, drop={2, 4}), make_documents(5))
+        # One batch call plus two single-document calls
+        self.assertEqual(len(calls), 3)
+        self.assertEqual([r["overall_score"] for r in results], [1.0, 4.0, 3.0, 4.0, 5.0])
+        self.assertFalse(any("error" in r for r in results))
+    
+    def test_batch_judgments_are_cached(self):
+        calls = []
+        cache = JudgmentCache()
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(listwise_handler(calls)))
+            judge = LLMJudge("test-model", {}, client=client, cache=cache)
+            await evaluate_search_results("query", make_documents(4), ["relevance"], judge=judge, listwise=True)
+            return await evaluate_search_results("query", make_documents(5), ["relevance"], judge=judge, listwise=True)
+        
+        results = asyncio.run(run())
+        # Only the fifth document is new, and a batch of one is a single-document call
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(results), 5)
+    
+    def test_parse_listwise_response(self):
+        criteria = ["relevance"]
+        item = lambda i, score: {"index": i, "scores": {"relevance": score}, "overall_score": score}
+        
+        fenced = "Here you go:\n```json\n" + json.dumps({"judgments": [item(1, 3), item(2, 4)]}) + "\n```"
+        self.assertEqual(sorted(parse_listwise_response(fenced, 2, criteria)), [0, 1])
+        
+        # Keyed by result number, scores as strings
+        keyed = json.dumps({"1": {"scores": {"relevance": "2.5"}, "overall_score": "2.5"}, "2": item(2, 1)})
+        self.assertEqual(parse_listwise_response(keyed, 2, criteria)[0]["overall_score"], 2.5)
+        
+        # 0-based indices, out of order
+        self.assertEqual(parse_listwise_response(json.dumps([item(1, 2), item(0, 1)]), 2, criteria)[0]["overall_score"], 1)
+        
+        # No indices: positional only when the count matches
+        unindexed = [{"scores": {"relevance": 1}}, {"scores": {"relevance": 2}}]
+        self.assertEqual(parse_listwise_response(json.dumps(unindexed), 2, criteria)[1]["overall_score"], 2)
+        self.assertEqual(parse_listwise_response(json.dumps(unindexed), 3, criteria), {})
+        
+        # Missing criterion, out-of-range index and garbage are dropped
+        bad = json.dumps({"judgments": [{"index": 1, "scores": {"other": 1}}, item(7, 1), "x", item(2, 5)]})
+        self.assertEqual(list(parse_listwise_response(bad, 2, criteria)), [1])
+        self.assertEqual(parse_listwise_response("not json", 2, criteria), {})
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class TestRateLimiting(unittest.TestCase):
+    
+    def test_token_bucket(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock)
+        self.assertEqual(bucket.time_until(60), 0)
+        bucket.take(60)
+        self.assertAlmostEqual(bucket.time_until(1), 1.0)
+        clock.now = 30
+        self.assertAlmostEqual(bucket.time_until(30), 0)
+        # Never more than the capacity
+        clock.now = 1000
+        self.assertAlmostEqual(bucket.time_until(61), 0)
+        self.assertEqual(bucket.level, 60)
+    
+    def test_usage_corrects_reservation(self):
+        clock = FakeClock()
+        limiter = LLMRateLimiter(tokens_per_minute=1000, clock=clock)
+        asyncio.run(limiter.acquire(800))
+        limiter.record_usage(reserved=800, used=300)
+        self.assertAlmostEqual(limiter.tokens.level, 700)
+        limiter.record_usage(reserved=100, used=900)
+        self.assertAlmostEqual(limiter.tokens.level, -100)
+    
+    def test_interactive_lane_goes_first(self):
+        order = []
+        
+        async def run():
+            # One request per 50 ms, no burst beyond the first
+            limiter = LLMRateLimiter(requests_per_minute=1200)
+            limiter.requests.capacity = limiter.requests.level = 1
+            await limiter.acquire(0)
+            
+            async def request(name, priority):
+                await limiter.acquire(0, priority)
+                order.append(name)
+            
+            bulk = [asyncio.create_task(request(f"bulk{i}", Priority.BULK)) for i in range(3)]
+            await asyncio.sleep(0)
+            interactive = asyncio.create_task(request("interactive", Priority.INTERACTIVE))
+            await asyncio.gather(*bulk, interactive)
+        
+        asyncio.run(run())
+        self.assertEqual(order[0], "interactive")
+        self.assertEqual(order[1:], ["bulk0", "bulk1", "bulk2"])
+    
+    def test_retry_after_is_honoured(self):
+        calls = []
+        
+        def handler(request):
+            calls.append(asyncio.get_event_loop().time())
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "0.2"}, json={"error": "rate limited"})
+            return completion()
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            limiter = LLMRateLimiter(requests_per_minute=6000)
+            judge = LLMJudge("test-model", {"retry_base_delay": 10}, client=client, rate_limiter=limiter)
+            result = await judge.evaluate("query", make_documents(1)[0], ["relevance"])
+            return result, limiter
+        
+        result, limiter = asyncio.run(run())
+        self.assertNotIn("error", result)
+        self.assertEqual(len(calls), 2)
+        # Waited for Retry-After rather than the (much longer) backoff
+        self.assertGreaterEqual(calls[1] - calls[0], 0.2)
+        self.assertLess(calls[1] - calls[0], 2)
+        self.assertGreater(limiter.paused_until, 0)
+    
+    def test_retry_after_is_capped(self):
+        calls = []
+        
+        def handler(request):
+            calls.append(asyncio.get_event_loop().time())
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "3600"}, json={"error": "rate limited"})
+            return completion()
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            limiter = LLMRateLimiter(requests_per_minute=6000)
+            judge = LLMJudge("test-model", {"retry_max_delay": 0.1}, client=client, rate_limiter=limiter)
+            return await asyncio.wait_for(judge.evaluate("query", make_documents(1)[0], ["relevance"]), 5)
+        
+        self.assertNotIn("error", asyncio.run(run()))
+        self.assertLess(calls[1] - calls[0], 1)
+    
+    def test_failed_attempts_refund_tokens(self):
+        def tokens_left(failures):
+            responses = failures + [completion]
+            
+            def handler(request):
+                return responses.pop(0)()
+            
+            async def run():
+                client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+                limiter = LLMRateLimiter(tokens_per_minute=100000, clock=FakeClock())
+                judge = LLMJudge("test-model", {"max_retries": 3, "retry_base_delay": 0},
+                                 client=client, rate_limiter=limiter)
+                await judge.evaluate("query", make_documents(1)[0], ["relevance"])
+                return limiter.tokens.level
+            
+            return asyncio.run(run())
+        
+        def refused():
+            raise httpx.ConnectError("connection refused")
+        
+        def timed_out():
+            raise httpx.ReadTimeout("no response")
+        
+        succeeded = tokens_left([])
+        self.assertLess(succeeded, 100000)
+        # Error responses and unmade connections use no tokens
+        failures = [lambda: httpx.Response(429, json={"error": "rate limited"}), lambda: completion(status_code=503), refused]
+        self.assertEqual(tokens_left(failures), succeeded)
+        # The provider may have generated a completion before a read timed out
+        self.assertLess(tokens_left([timed_out]), succeeded)
+    
+    def test_client_errors_are_not_retried(self):
+        calls = []
+        
+        def handler(request):
+            calls.append(request)
+            return completion(status_code=400)
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            judge = LLMJudge("test-model", {"retry_base_delay": 0}, client=client)
+            return await judge.evaluate("query", make_documents(1)[0], ["relevance"])
+        
+        self.assertEqual(asyncio.run(run())["error"], "API error: 400")
+        self.assertEqual(len(calls), 1)
+    
+    def test_transport_errors_are_retried(self):
+        calls = []
+        
+        def handler(request):
+            calls.append(request)
+            if len(calls) < 3:
+                raise httpx.ConnectError("connection refused")
+            return completion()
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            judge = LLMJudge("test-model", {"max_retries": 3, "retry_base_delay": 0}, client=client)
+            return await judge.evaluate("query", make_documents(1)[0], ["relevance"])
+        
+        self.assertEqual(asyncio.run(run())["overall_score"], 4.0)
+        self.assertEqual(len(calls), 3)
+    
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+class KeywordEmbeddingModel(EmbeddingModel):
+    """Two-dimensional embeddings: (mentions python, does not mention python)"""
+    
+    def __init__(self):
+        super().__init__("keyword", 2)
+    
+    def embed(self, text):
+        return [[1.0, 0.0] if "python" in t.lower() else [0.0, 1.0] for t in text]
+
+class TestCascadeJudging(unittest.TestCase):
+    
+    documents = [
+        {"doc_id": "hit", "title": "Python tutorial", "snippet": "Learn python step by step"},
+        {"doc_id": "partial", "title": "Tutorial index", "snippet": "Guides for many languages"},
+        {"doc_id": "miss", "title": "Gardening tips", "snippet": "Roses in spring"}
+    ]
+    
+    def run_cascade(self, cascade_config, handler=None, listwise=False):
+        calls = []
+        
+        def default_handler(request):
+            calls.append(json.loads(request.content)["messages"][-1]["content"])
+            return completion()
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler or default_handler))
+            cascade = CascadeJudge(LLMJudge("test-model", {}, client=client), **cascade_config)
+            return cascade, await cascade.evaluate("python tutorial", self.documents, ["relevance"], listwise=listwise)
+        
+        cascade, results = asyncio.run(run())
+        return cascade, results, calls
+    
+    def test_lexical_overlap(self):
+        self.assertEqual(lexical_overlap("python tutorial", self.documents[0]), 1.0)
+        self.assertEqual(lexical_overlap("the python tutorial", self.documents[1]), 0.5)
+        self.assertEqual(lexical_overlap("python tutorial", self.documents[2]), 0.0)
+        self.assertEqual(lexical_overlap("the", self.documents[0]), 0.0)
+    
+    def test_only_uncertain_documents_reach_the_llm(self):
+        cascade, results, calls = self.run_cascade({})
+        self.assertEqual(len(calls), 1)
+        self.assertIn("Tutorial index", calls[0])
+        self.assertEqual([r["doc_id"] for r in results], ["hit", "partial", "miss"])
+        self.assertEqual([r.get("source") for r in results], ["cascade", None, "cascade"])
+        self.assertEqual(results[0]["overall_score"], 5.0)
+        self.assertEqual(results[1]["overall_score"], 4.0)
+        self.assertEqual(results[2]["overall_score"], 0.0)
+        
+        stats = cascade.stats.to_dict()
+        self.assertEqual((stats["accepted"], stats["rejected"], stats["llm_judged"]), (1, 1, 1))
+        self.assertAlmostEqual(stats["fraction_saved"], 2 / 3)
+        self.assertIsNone(stats["agreement"])
+    
+    def test_audits_measure_agreement(self):
+        # The LLM scores every document 4: it agrees with the accepted hit but not the rejected miss
+        cascade, results, calls = self.run_cascade({"audit_rate": 1.0})
+        self.assertEqual(len(calls), 3)
+        # Audits never replace the local judgment
+        self.assertEqual(results[2]["source"], "cascade")
+        self.assertEqual(cascade.stats.llm_judged, 1)
+        stats = cascade.stats.to_dict()
+        self.assertEqual(stats["audited"], 2)
+        self.assertEqual(stats["agreement"], 0.5)
+        self.assertAlmostEqual(stats["audit_mean_abs_error"], 2.5)
+    
+    def test_listwise_band_and_audits_share_calls(self):
+        calls = []
+        _, results, _ = self.run_cascade({"audit_rate": 1.0}, handler=listwise_handler(calls), listwise=True)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results[1]["overall_score"], 1.0)
+    
+    def test_embedding_scores(self):
+        cascade, results, calls = self.run_cascade({"embedding_model": KeywordEmbeddingModel()})
+        # Orthogonal or parallel embeddings leave nothing uncertain
+        self.assertEqual(calls, [])
+        self.assertEqual([r["source"] for r in results], ["cascade"] * 3)
+        self.assertEqual([r["overall_score"] for r in results], [5.0, 0.0, 0.0])
+        self.assertEqual(cascade.stats.fraction_saved, 1.0)
+    
+    def test_invalid_thresholds(self):
+        with self.assertRaises(ValueError):
+            CascadeJudge(low=0.8, high=0.2)
+
+class TestStubLLM(unittest.TestCase):
+    
+    def test_judgments_are_deterministic(self):
+        documents = make_documents(6)
+        
+        async def run(listwise, seed):
+            async with MockLLMJudge(stub=StubLLM(latency=0.0, seed=seed)) as judge:
+                return await evaluate_search_results("query", documents, ["relevance", "factuality"],
+                                                     judge=judge, listwise=listwise)
+        
+        pointwise = asyncio.run(run(False, 1))
+        # Same scores on another run, and when judged listwise
+        self.assertEqual(pointwise, asyncio.run(run(False, 2)))
+        listwise = asyncio.run(run(True, 1))
+        self.assertEqual([r["scores"] for r in pointwise], [r["scores"] for r in listwise])
+        self.assertGreater(len({r["overall_score"] for r in pointwise}), 1)
+        self.assertTrue(all(0 <= r["scores"]["factuality"] <= 5 for r in pointwise))
+    
+    def test_injected_failures_are_retried(self):
+        stub = StubLLM(latency=0.0, error_rate=0.3, rate_limit_rate=0.2, retry_after=0, seed=3)
+        
+        async def run():
+            async with MockLLMJudge(stub=stub, config={"max_retries": 10, "retry_base_delay": 0}) as judge:
+                return await evaluate_search_results("query", make_documents(40), ["relevance"], judge=judge)
+        
+        results = asyncio.run(run())
+        self.assertFalse(any("error" in r for r in results))
+        self.assertGreater(stub.errors, 0)
+        self.assertGreater(stub.rate_limited, 0)
+        self.assertEqual(stub.requests, 40 + stub.errors + stub.rate_limited)
+    
+    def test_concurrency_and_cache_are_exercised(self):
+        stub = StubLLM(latency=0.01, distribution="exponential", seed=0)
+        
+        async def run():
+            async with MockLLMJudge(stub=stub, config={"max_concurrency": 4}, cache=JudgmentCache()) as judge:
+                await evaluate_search_results("query", make_documents(30), ["relevance"], judge=judge)
+                return await evaluate_search_results("query", make_documents(30), ["relevance"], judge=judge)
+        
+        self.assertEqual(len(asyncio.run(run())), 30)
+        self.assertEqual(stub.peak_in_flight, 4)
+        self.assertEqual(stub.requests, 30)
+    
+    def test_requests_per_minute_limit(self):
+        stub = StubLLM(latency=0.0, requests_per_minute=2)
+        
+        async def run():
+            async with MockLLMJudge(stub=stub, config={"max_retries": 0}) as judge:
+                return await evaluate_search_results("query", make_documents(3), ["relevance"], judge=judge)
+        
+        results = asyncio.run(run())
+        self.assertEqual(["error" in r for r in results], [False, False, True])
+        self.assertEqual(results[2]["error"], "API error: 429")
+    
+    def test_latency_distributions(self):
+        for distribution in ("fixed", "uniform", "exponential", "lognormal"):
+            stub = StubLLM(latency=0.1, distribution=distribution, seed=0)
+            samples = [stub.sample_latency() for _ in range(5000)]
+            self.assertAlmostEqual(sum(samples) / len(samples), 0.1, delta=0.01, msg=distribution)
+        with self.assertRaises(ValueError):
+            StubLLM(distribution="normal")
+    
+    def test_http_server(self):
+        from fastapi.testclient import TestClient
+        
+        client = TestClient(create_stub_llm_app(StubLLM(latency=0.0)))
+        prompt = "QUERY: q\nTitle: A\n  Snippet: s\n  URL: u\nbased on the following criteria: relevance"
+        response = client.post("/v1/chat/completions", json={"model": "m", "messages": [{"role": "user", "content": prompt}]})
+        self.assertEqual(response.status_code, 200)
+        content = json.loads(response.json()["choices"][0]["message"]["content"])
+        self.assertEqual(list(content["scores"]), ["relevance"])
+        self.assertEqual(client.get("/stats").json()["requests"], 1)
+
+class TestPromptsAndUsage(unittest.TestCase):
+    
+    def test_prompt_templates(self):
+        judge = LLMJudge("test-model", {})
+        document = {"title": "Title", "snippet": "Snippet", "url": "https://example.com"}
+        llm_judge._instructions.cache_clear()
+        first = judge._construct_evaluation_prompt("query one", document, ["relevance", "factuality"])
+        second = judge._construct_evaluation_prompt("query two", document, ["relevance", "factuality"])
+        listwise = judge._construct_listwise_prompt("query", [document] * 2, ["relevance", "factuality"])
+        # The static preamble is built once per criteria set and pass, and leads the prompt
+        self.assertEqual(llm_judge._instructions.cache_info().misses, 2)
+        preamble = first[:first.index("QUERY:")]
+        self.assertTrue(second.startswith(preamble))
+        self.assertIn('"scores": {"relevance": score, "factuality": score}', preamble)
+        for prompt in (first, listwise):
+            self.assertEqual(prompt, prompt.strip())
+            self.assertFalse(any(line.startswith(" ") for line in prompt.splitlines()))
+        self.assertIn("[2] Title: Title\nSnippet: Snippet", listwise)
+    
+    def test_usage_per_model_and_experiment(self):
+        tracker = UsageTracker()
+        stub = StubLLM(latency=0.0, error_rate=0.3, retry_after=0, seed=5)
+        config = {"prompt_cost_per_1k": 0.01, "completion_cost_per_1k": 0.03, "max_retries": 10, "retry_base_delay": 0}
+        
+        async def run():
+            async with MockLLMJudge("mock-a", config, stub=stub, usage=tracker) as judge:
+                with usage_scope("exp1"):
+                    await evaluate_search_results("query", make_documents(10), ["relevance"], judge=judge)
+                await evaluate_search_results("query", make_documents(2), ["relevance"], judge=judge, listwise=True)
+        
+        asyncio.run(run())
+        rows = {row["experiment_id"]: row for row in tracker.summary()}
+        self.assertEqual(set(rows), {"exp1", None})
+        exp1 = rows["exp1"]
+        self.assertEqual(exp1["model"], "mock-a")
+        self.assertEqual(exp1["calls"], 10)
+        self.assertEqual(exp1["calls"] + exp1["failed_calls"] + rows[None]["calls"] + rows[None]["failed_calls"],
+                         stub.requests)
+        self.assertGreater(exp1["prompt_tokens"], 0)
+        self.assertAlmostEqual(
+            exp1["cost"], (exp1["prompt_tokens"] * 0.01 + exp1["completion_tokens"] * 0.03) / 1000
+        )
+        self.assertEqual(rows[None]["calls"], 1)
+        self.assertEqual(tracker.totals()["calls"], 11)
+        self.assertEqual(tracker.summary(experiment_id="exp1"), [exp1])
+    
+    def test_cached_prompt_tokens(self):
+        tracker = UsageTracker()
+        
+        def handler(request):
+            response = completion()
+            body = json.loads(response.content)
+            body["usage"]["prompt_tokens_details"] = {"cached_tokens": 64}
+            return httpx.Response(200, json=body)
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            judge = LLMJudge("test-model", {}, client=client, usage=tracker)
+            await evaluate_search_results("query", make_documents(3), ["relevance"], judge=judge)
+        
+        asyncio.run(run())
+        totals = tracker.totals()
+        self.assertEqual((totals["prompt_tokens"], totals["cached_prompt_tokens"], totals["completion_tokens"]), (300, 192, 60))
+
+class TestStreaming(unittest.TestCase):
+    
+    def slow_first_handler(self, cancelled):
+        """Document 0 takes 0.3s, the others 10ms"""
+        async def handler(request):
+            prompt = json.loads(request.content)["messages"][1]["content"]
+            try:
+                await asyncio.sleep(0.3 if "Title: Document 0\n" in prompt else 0.01)
+            except asyncio.CancelledError:
+                cancelled.append(prompt)
+                raise
+            return completion()
+        return handler
+    
+    def test_judgments_arrive_in_completion_order(self):
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(self.slow_first_handler([])))
+            judge = LLMJudge("test-model", {}, client=client)
+            items = []
+            async for item in stream_search_results("query", make_documents(4), ["relevance"], judge=judge,
+                                                    heartbeat=0.1):
+                items.append(item)
+            return items
+        
+        items = asyncio.run(run())
+        judged = [item for item in items if item is not None]
+        self.assertEqual(sorted(i for i, _ in judged), [0, 1, 2, 3])
+        # The slow document comes last, after heartbeats while it was outstanding
+        self.assertEqual(judged[-1][0], 0)
+        self.assertEqual(judged[-1][1]["doc_id"], "doc0")
+        self.assertIn(None, items[3:])
+    
+    def test_closing_the_stream_cancels_outstanding_calls(self):
+        cancelled = []
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(self.slow_first_handler(cancelled)))
+            judge = LLMJudge("test-model", {}, client=client)
+            stream = stream_search_results("query", make_documents(3), ["relevance"], judge=judge)
+            first = await stream.__anext__()
+            await stream.aclose()
+            await asyncio.sleep(0)
+            return first
+        
+        self.assertNotEqual(asyncio.run(run())[0], 0)
+        self.assertEqual(len(cancelled), 1)
+    
+    def test_listwise_batches_stream_with_cached_first(self):
+        calls = []
+        cache = JudgmentCache()
+        
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(listwise_handler(calls)))
+            judge = LLMJudge("test-model", {"batch_max_documents": 2}, client=client, cache=cache)
+            await judge.evaluate_batch("query", make_documents(5)[4:], ["relevance"])
+            return [item async for item in stream_search_results(
+                "query", make_documents(5), ["relevance"], judge=judge, listwise=True
+            )]
+        
+        items = asyncio.run(run())
+        self.assertEqual(items[0][0], 4)
+        self.assertEqual(sorted(i for i, _ in items), [0, 1, 2, 3, 4])
+        # One single-document call to fill the cache, then two batches of two
+        self.assertEqual(len(calls), 3)
+
+def preference_handler(calls, tie=()):
+    """Prefer the lower-numbered document ("Document 2" beats "Document 5")"""
+    def handler(request):
+        prompt = json.loads(request.content)["messages"][1]["content"]
+        calls.append(prompt)
+        a, b = (int(n) for n in re.findall(r"Title: Document (\d+)", prompt))
+        preferred = "tie" if {a, b} <= set(tie) else "A" if a < b else "B"
+        return completion({"preferred": preferred, "explanation": "ok"})
+    return handler
+
+class TestPairwiseJudging(unittest.TestCase):
+    
+    def rank(self, handler, documents, cache=None, **kwargs):
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            judge = LLMJudge("test-model", {"max_retries": 0}, client=client, cache=cache)
+            return await PairwiseJudge(judge, **kwargs).rank("query", documents, ["relevance"])
+        return asyncio.run(run())
+    
+    def test_merge_sort_ranking(self):
+        calls = []
+        documents = make_documents(32)[::-1]
+        result = self.rank(preference_handler(calls), documents)
+        self.assertEqual(result["ranking"], [f"doc{i}" for i in range(32)])
+        self.assertEqual(result["order"], list(range(31, -1, -1)))
+        # At most n log2 n comparisons, against 496 for all pairs
+        self.assertLessEqual(result["comparisons"], 32 * 5)
+        self.assertEqual(result["llm_calls"], len(calls))
+        self.assertEqual(len(calls), result["comparisons"])
+    
+    def test_symmetric_pairs_share_a_cache_entry(self):
+        calls = []
+        cache = JudgmentCache()
+        documents = make_documents(6)
+        forward = self.rank(preference_handler(calls), documents, cache=cache)
+        # The same documents in reverse order ask for (b, a) where (a, b) was cached
+        calls.clear()
+        backward = self.rank(preference_handler(calls), documents[::-1], cache=cache)
+        self.assertEqual(backward["ranking"], forward["ranking"])
+        self.assertLess(len(calls), backward["comparisons"])
+        self.assertEqual(backward["cache_hits"] + backward["llm_calls"], backward["comparisons"])
+        
+        # Both orders get the same prompt
+        prompts = set()
+        for pair in ([documents[0], documents[1]], [documents[1], documents[0]]):
+            calls.clear()
+            self.rank(preference_handler(calls), pair)
+            prompts.update(calls)
+        self.assertEqual(len(prompts), 1)
+    
+    def test_ties_and_failures_keep_input_order(self):
+        documents = make_documents(4)[::-1]
+        result = self.rank(preference_handler([], tie=(0, 1, 2, 3)), documents)
+        self.assertEqual(result["ranking"], ["doc3", "doc2", "doc1", "doc0"])
+        
+        result = self.rank(lambda request: completion(status_code=500), documents)
+        self.assertEqual(result["ranking"], ["doc3", "doc2", "doc1", "doc0"])
+        self.assertEqual(result["failures"], result["comparisons"])
+    
+    def test_failed_sibling_does_not_block_caching(self):
+        cache = JudgmentCache()
+        
+        async def handler(request):
+            prompt = json.loads(request.content)["messages"][1]["content"]
+            if "Document 3" in prompt:
+                return completion(status_code=500)
+            # Finishes after the concurrent comparison with document 3 has failed
+            await asyncio.sleep(0.05)
+            return preference_handler([])(request)
+        
+        result = self.rank(handler, make_documents(4), cache=cache)
+        self.assertEqual(result["failures"], 1)
+        calls = []
+        result = self.rank(preference_handler(calls), make_documents(2), cache=cache)
+        self.assertEqual((result["cache_hits"], len(calls)), (1, 0))
+    
+    def test_both_orders(self):
+        calls = []
+        
+        def position_biased(request):
+            calls.append(request)
+            return completion({"preferred": "A"})
+        
+        result = self.rank(position_biased, make_documents(2), both_orders=True)
+        # A model that always picks the first result disagrees with itself, so it is a tie
+        self.assertEqual(result["ranking"], ["doc0", "doc1"])
+        self.assertEqual(len(calls), 2)
+        
+        calls.clear()
+        result = self.rank(preference_handler(calls), make_documents(8)[::-1], both_orders=True)
+        self.assertEqual(result["ranking"], [f"doc{i}" for i in range(8)])
+        self.assertEqual(len(calls), 2 * result["comparisons"])
+    
+    def test_stub_ranks_by_its_scores(self):
+        judge = MockLLMJudge()
+        documents = make_documents(12)
+        
+        async def run():
+            ranked = await PairwiseJudge(judge).rank("query", documents, ["relevance"])
+            scores = await judge.evaluate_batch("query", documents, ["relevance"])
+            return ranked, scores
+        
+        ranked, scores = asyncio.run(run())
+        ranked_scores = [scores[i]["overall_score"] for i in ranked["order"]]
+        self.assertEqual(ranked_scores, sorted(ranked_scores, reverse=True))
+    
+    def test_parse_preference(self):
+        self.assertEqual(parse_preference('{"preferred": "A"}'), 1)
+        self.assertEqual(parse_preference('{"preferred": "Result B"}'), -1)
+        self.assertEqual(parse_preference('{"preferred": "tie"}'), 0)
+        self.assertIsNone(parse_preference('{"preferred": "C"}'))
+        self.assertIsNone(parse_preference("not json"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,8 @@ import numpy as np
 from opensearcheval.core.metrics import (
     mean_reciprocal_rank, precision_at_k, ndcg_at_k, click_through_rate,
     time_to_first_click, abandoned_search_rate, diversity_metric,
-    reciprocal_rank_fusion, normalized_discounted_cumulative_gain
+    reciprocal_rank_fusion, normalized_discounted_cumulative_gain,
+    average_dwell_time, batch_search_metrics, RunningMetricAggregates
 )
 
 class TestMetrics(unittest.TestCase):
@@ -167,5 +168,65 @@ class TestMetrics(unittest.TestCase):
         self.assertGreater(ndcg, 0.0)
         self.assertLessEqual(ndcg, 1.0)
 
+    def test_batch_search_metrics(self):
+        evaluations = [
+            {
+                "query": self.query,
+                "results": self.results,
+                "relevance_judgments": self.relevance_judgments,
+                "user_interactions": self.user_interactions
+            },
+            {
+                "query": "other query",
+                "results": self.results[:2],
+                "relevance_judgments": {},
+                "user_interactions": []
+            },
+            {"query": "empty", "results": [], "relevance_judgments": {}, "user_interactions": []}
+        ]
+        batch = batch_search_metrics(evaluations, k=3)
+        
+        singles = {
+            "mean_reciprocal_rank": lambda e: mean_reciprocal_rank(e["query"], e["results"], e["relevance_judgments"]),
+            "precision_at_k": lambda e: precision_at_k(e["query"], e["results"], e["relevance_judgments"], k=3),
+            "ndcg_at_k": lambda e: ndcg_at_k(e["query"], e["results"], e["relevance_judgments"], k=3),
+            "click_through_rate": lambda e: click_through_rate(e["query"], e["results"], e["user_interactions"]),
+            "time_to_first_click": lambda e: time_to_first_click(e["query"], e["results"], e["user_interactions"]),
+            "abandoned_search_rate": lambda e: abandoned_search_rate(e["query"], e["results"], e["user_interactions"]),
+            "average_dwell_time": lambda e: average_dwell_time(e["query"], e["results"], e["user_interactions"])
+        }
+        for name, metric in singles.items():
+            expected = [metric(e) for e in evaluations]
+            np.testing.assert_allclose(batch[name], expected, err_msg=name)
+    
+    def test_batch_ndcg_matches_ndcg_at_k(self):
+        rng = np.random.default_rng(0)
+        evaluations = []
+        for i in range(300):
+            results = [{"doc_id": f"d{j}"} for j in range(rng.integers(0, 12))]
+            # Few grades, so ties are common
+            judgments = {r["doc_id"]: int(rng.integers(0, 4)) for r in results if rng.random() < 0.7}
+            evaluations.append({"query": f"q{i}", "results": results, "relevance_judgments": judgments})
+        
+        for k in (1, 3, 10):
+            batch = batch_search_metrics(evaluations, k=k)["ndcg_at_k"]
+            expected = [ndcg_at_k(e["query"], e["results"], e["relevance_judgments"], k=k) for e in evaluations]
+            np.testing.assert_allclose(batch, expected, err_msg=f"k={k}")
+    
+    def test_ndcg_single_result(self):
+        self.assertEqual(ndcg_at_k(self.query, self.results[:1], self.relevance_judgments, k=3), 1.0)
+        self.assertEqual(ndcg_at_k(self.query, self.results[1:2], self.relevance_judgments, k=3), 0.0)
+    
+    def test_running_metric_aggregates(self):
+        values = np.array([0.2, 0.4, 0.9, 0.1, 0.5])
+        aggregates = RunningMetricAggregates()
+        aggregates.update({"ctr": values[:2]})
+        aggregates.update({"ctr": values[2:]})
+        summary = aggregates.summary()["ctr"]
+        self.assertEqual(aggregates.count, 5)
+        self.assertAlmostEqual(summary["mean"], values.mean())
+        self.assertAlmostEqual(summary["std"], values.std())
+        self.assertEqual((summary["min"], summary["max"]), (0.1, 0.9))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
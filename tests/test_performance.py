@@ -0,0 +1,245 @@
+"""
+Throughput benchmarks for the evaluation API
+
+The benchmarks assert on wall-clock timings, so the default run deselects
+them. Run with: pytest -m performance -s tests/test_performance.py
+"""
+
+import asyncio
+import importlib.util
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+import httpx
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from opensearcheval.api import main as api
+from opensearcheval.api.main import app
+from opensearcheval.api.serialization import FastJSONResponse
+from opensearcheval.ml import llm_judge
+from opensearcheval.ml.llm_judge import LLMJudge, evaluate_search_results
+from opensearcheval.ml.stub_llm import MockLLMJudge, StubLLM, create_stub_llm_app
+from test_api import make_evaluation
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+@pytest.mark.performance
+def test_bulk_vs_single_throughput(client):
+    """Bulk evaluation should beat one request per query on items/second"""
+    items = [make_evaluation(i) for i in range(1000)]
+    
+    start = time.perf_counter()
+    for item in items[:200]:
+        client.post("/api/v1/evaluate", json=item)
+    single_rate = 200 / (time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    response = client.post("/api/v1/evaluate/bulk", json={"items": items})
+    bulk_rate = len(items) / (time.perf_counter() - start)
+    
+    assert response.status_code == 200
+    print(f"\nsingle: {single_rate:.0f} items/s, bulk: {bulk_rate:.0f} items/s "
+          f"({bulk_rate / single_rate:.1f}x)")
+    assert bulk_rate > single_rate
+
+@pytest.mark.performance
+def test_evaluate_latency_and_allocations(client):
+    """Per-request handler latency and peak allocation for both evaluation modes"""
+    requests = [api.SearchEvaluationRequest(**make_evaluation(i, 20)) for i in range(300)]
+    agent = api.agent_manager.agents["search_evaluator"]
+    
+    async def measure(mode):
+        start = time.perf_counter()
+        for request in requests:
+            await api.evaluate_search(request, mode=mode)
+        latency = (time.perf_counter() - start) / len(requests)
+        agent.tasks.clear()
+        
+        tracemalloc.start()
+        peaks = []
+        for request in requests[:100]:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            await api.evaluate_search(request, mode=mode)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            agent.tasks.clear()
+        tracemalloc.stop()
+        return latency, sum(peaks) / len(peaks)
+    
+    for mode in api.EvaluationMode:
+        latency, peak = asyncio.run(measure(mode))
+        print(f"\n{mode.value}: {latency * 1e6:.0f} us/request, {peak / 1024:.1f} KiB peak/request")
+        assert latency < 0.05
+
+@pytest.mark.performance
+def test_serialization_throughput():
+    """FastJSONResponse against jsonable_encoder + JSONResponse for typical payloads"""
+    experiment = api.experiment_manager.create_experiment(name="bench", description="serialization")
+    row = {name: experiment.to_dict().get(name) for name in api.ExperimentResponse.__fields__}
+    payloads = {
+        "experiment list": [dict(row, id=f"exp_{i}") for i in range(1000)],
+        "llm judgments": {
+            "query": "query",
+            "judgments": [
+                {
+                    "doc_id": f"doc{i}",
+                    "scores": {"relevance": 0.8, "factuality": 0.7, "completeness": 0.6},
+                    "overall_score": 0.7,
+                    "explanation": "The document answers the query directly. " * 4
+                }
+                for i in range(500)
+            ],
+            "average_score": 0.7
+        },
+        "bulk results": {
+            "count": 2000,
+            "results": [
+                {"id": f"eval_{i}", "metrics": {f"metric_{m}": 0.5 + m / 10 for m in range(7)}, "status": "complete"}
+                for i in range(2000)
+            ]
+        }
+    }
+    api.experiment_manager.delete_experiment(experiment.id)
+    
+    def rate(render, payload, repeat=20):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            body = render(payload)
+        return repeat * len(body) / (time.perf_counter() - start) / 1e6
+    
+    for name, payload in payloads.items():
+        baseline = rate(lambda p: JSONResponse(jsonable_encoder(p)).body, payload)
+        fast = rate(lambda p: FastJSONResponse(p).body, payload)
+        print(f"\n{name}: stdlib {baseline:.1f} MB/s, fast {fast:.1f} MB/s ({fast / baseline:.1f}x)")
+        assert fast > baseline
+
+def load_harness():
+    """Import scripts/load_test.py, which is not part of the package"""
+    path = Path(__file__).resolve().parent.parent / "scripts" / "load_test.py"
+    spec = importlib.util.spec_from_file_location("load_test", path)
+    load_test = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(load_test)
+    return load_test
+
+@pytest.mark.performance
+def test_load_harness_evaluate_slo(client):
+    """Short in-process run of scripts/load_test.py against the sync evaluate endpoint"""
+    load_test = load_harness()
+    
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+            return await load_test.run_scenario(
+                http, load_test.SCENARIOS["evaluate"], "inprocess", concurrency=8, duration=2.0, max_requests=400
+            )
+    
+    result = asyncio.run(run())
+    print(f"\nevaluate: {result.requests_per_s:.0f} req/s, p50 {result.p50_ms:.2f} ms, "
+          f"p95 {result.p95_ms:.2f} ms, p99 {result.p99_ms:.2f} ms")
+    assert result.errors == 0
+    assert result.p95_ms < 250
+
+def test_load_harness_evaluate_without_errors(client):
+    """Concurrent load through scripts/load_test.py leaves the evaluate endpoints error-free"""
+    load_test = load_harness()
+    
+    async def run(name):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+            return await load_test.run_scenario(
+                http, load_test.SCENARIOS[name], "inprocess", concurrency=8, duration=10.0, max_requests=40
+            )
+    
+    for name in ("evaluate", "evaluate_async"):
+        result = asyncio.run(run(name))
+        assert result.requests == 40
+        assert (result.errors, result.shed) == (0, 0)
+
+def test_load_harness_judges_with_in_process_stub(monkeypatch):
+    """In-process load runs answer every LLM call from the stub, without uvicorn or the configured endpoint"""
+    load_test = load_harness()
+    prompts = []
+    handle = StubLLM.handle
+    
+    async def recorded(self, body):
+        prompts.append(body)
+        return await handle(self, body)
+    
+    monkeypatch.setattr(StubLLM, "handle", recorded)
+    monkeypatch.setitem(sys.modules, "uvicorn", None)
+    monkeypatch.setattr(llm_judge.settings, "LLM_ENDPOINT", "http://127.0.0.1:9/v1/chat/completions")
+    monkeypatch.setattr(llm_judge, "_judgment_cache", None)
+    monkeypatch.setattr(llm_judge.settings, "LLM_CACHE_ENABLED", False)
+    
+    results = asyncio.run(load_test.run_load_test(
+        ["llm_judge"], duration=1.0, max_requests=4, warmup=1, llm_latency=0.0
+    ))
+    assert results[0].requests == 4
+    assert results[0].errors == 0
+    # Five requests of five documents each
+    assert len(prompts) == 25
+
+@pytest.mark.performance
+def test_llm_judge_connection_pooling():
+    """Pooled LLMJudge client against a client per request, on a local stub LLM server"""
+    # Pooling only shows over real sockets, so this needs the stub served by uvicorn
+    pytest.importorskip("uvicorn")
+    load_test = load_harness()
+    documents = [{"doc_id": f"doc{i}", "title": f"Document {i}", "snippet": "snippet"} for i in range(200)]
+    
+    with load_test.UvicornThread(create_stub_llm_app(StubLLM(latency=0.0)), load_test.free_port()) as stub:
+        endpoint = f"http://127.0.0.1:{stub.port}/v1/chat/completions"
+        
+        async def client_per_request():
+            # What the judge used to do for every document
+            async def post(doc):
+                async with httpx.AsyncClient() as http:
+                    return await http.post(endpoint, json={"model": "stub", "messages": [{"role": "user", "content": doc["title"]}]})
+            started = time.perf_counter()
+            semaphore = asyncio.Semaphore(16)
+            async def bounded(doc):
+                async with semaphore:
+                    return await post(doc)
+            await asyncio.gather(*(bounded(doc) for doc in documents))
+            return time.perf_counter() - started
+        
+        async def pooled():
+            async with LLMJudge("stub", {"endpoint": endpoint, "max_concurrency": 16}) as judge:
+                started = time.perf_counter()
+                results = await evaluate_search_results("query", documents, ["relevance"], judge=judge)
+                elapsed = time.perf_counter() - started
+            assert not any("error" in r for r in results)
+            return elapsed
+        
+        baseline = asyncio.run(client_per_request())
+        fast = asyncio.run(pooled())
+    
+    print(f"\n{len(documents)} judgments: client per request {baseline * 1000:.0f} ms, "
+          f"pooled {fast * 1000:.0f} ms ({baseline / fast:.1f}x)")
+    assert fast < baseline
+
+@pytest.mark.performance
+def test_mock_judge_throughput_under_failures():
+    """Judging pipeline throughput against a slow, flaky, throttled in-process model"""
+    documents = [{"doc_id": f"doc{i}", "title": f"Document {i}", "snippet": "snippet"} for i in range(500)]
+    stub = StubLLM(latency=0.02, distribution="lognormal", error_rate=0.02, rate_limit_rate=0.02,
+                   retry_after=0.05, seed=0)
+    
+    async def run():
+        config = {"max_concurrency": 32, "max_retries": 5, "retry_base_delay": 0.05}
+        async with MockLLMJudge(stub=stub, config=config) as judge:
+            started = time.perf_counter()
+            results = await evaluate_search_results("query", documents, ["relevance"], judge=judge)
+            return results, time.perf_counter() - started
+    
+    results, elapsed = asyncio.run(run())
+    print(f"\n{len(documents)} judgments in {elapsed * 1000:.0f} ms ({len(documents) / elapsed:.0f}/s), "
+          f"{stub.errors} errors and {stub.rate_limited} 429s retried, peak {stub.peak_in_flight} in flight")
+    assert not any("error" in r for r in results)
+    assert stub.peak_in_flight <= 32
@@ -0,0 +1,199 @@
+import asyncio
+import unittest
+import numpy as np
+from scipy import stats
+from opensearcheval.utils.stats import (
+    adjust_p_values, multi_arm_analysis, bootstrap_test, permutation_test,
+    _resampled_mean_differences, sample_size_grid, ratio_metric_std, _sample_size_grid
+)
+from opensearcheval.core.agent import ABTestAgent
+
+class TestMultipleTestingCorrection(unittest.TestCase):
+    
+    def setUp(self):
+        self.p_values = np.array([0.01, 0.04, 0.03, 0.2])
+    
+    def test_holm(self):
+        adjusted = adjust_p_values(self.p_values, method="holm")
+        np.testing.assert_allclose(adjusted, [0.04, 0.09, 0.09, 0.2])
+    
+    def test_benjamini_hochberg(self):
+        adjusted = adjust_p_values(self.p_values, method="bh")
+        np.testing.assert_allclose(adjusted, [0.04, 0.16 / 3, 0.16 / 3, 0.2])
+    
+    def test_nan_entries_are_ignored(self):
+        adjusted = adjust_p_values([0.01, np.nan, 0.02], method="bonferroni")
+        self.assertTrue(np.isnan(adjusted[1]))
+        np.testing.assert_allclose(adjusted[[0, 2]], [0.02, 0.04])
+    
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            adjust_p_values(self.p_values, method="unknown")
+
+class TestMultiArmAnalysis(unittest.TestCase):
+    
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.groups = {
+            arm: {f"metric_{i}": rng.normal(i + shift, 1.0, 200).tolist() for i in range(4)}
+            for arm, shift in [("control", 0.0), ("treatment_a", 0.0), ("treatment_b", 0.5)]
+        }
+    
+    def test_matches_scipy_welch(self):
+        analysis = multi_arm_analysis(self.groups, correction="none")
+        for metric_name, arm_results in analysis["results"].items():
+            for arm, result in arm_results.items():
+                expected = stats.ttest_ind(self.groups[arm][metric_name],
+                                           self.groups["control"][metric_name],
+                                           equal_var=False)
+                self.assertAlmostEqual(result["t_statistic"], expected.statistic)
+                self.assertAlmostEqual(result["p_value"], expected.pvalue)
+    
+    def test_correction_applied_across_grid(self):
+        analysis = multi_arm_analysis(self.groups, correction="holm")
+        self.assertEqual(analysis["num_comparisons"], 8)
+        raw = [r["p_value"] for m in analysis["results"].values() for r in m.values()]
+        adjusted = [r["p_value_adjusted"] for m in analysis["results"].values() for r in m.values()]
+        np.testing.assert_allclose(adjusted, adjust_p_values(raw, method="holm"))
+        self.assertTrue(all(r["significant"] for r in
+                            (analysis["results"][m]["treatment_b"] for m in analysis["metrics"])))
+    
+    def test_insufficient_data(self):
+        self.groups["treatment_a"]["metric_0"] = [1.0]
+        analysis = multi_arm_analysis(self.groups)
+        self.assertIn("error", analysis["results"]["metric_0"]["treatment_a"])
+        self.assertEqual(analysis["num_comparisons"], 7)
+    
+    def test_missing_control(self):
+        analysis = multi_arm_analysis(self.groups, control="missing")
+        self.assertIn("error", analysis)
+    
+    def test_agent_multi_arm(self):
+        agent = ABTestAgent("ab_tester", {"confidence_level": 0.95}, statistical_tests=[])
+        data = {
+            "experiment_id": "exp_1",
+            "control_group": {"group_id": "control", "metrics": self.groups["control"]},
+            "treatment_group": {"group_id": "treatment_a", "metrics": self.groups["treatment_a"]},
+            "treatment_groups": [{"group_id": "treatment_b", "metrics": self.groups["treatment_b"]}]
+        }
+        results = asyncio.run(agent.process(data))
+        self.assertEqual(results["arms"], ["treatment_a", "treatment_b"])
+        self.assertIs(agent.experiment_results["exp_1"], results)
+        
+        # Arms sharing a group_id are rejected rather than overwriting each other
+        data["treatment_groups"] = [{"group_id": "treatment_a", "metrics": self.groups["treatment_b"]}]
+        self.assertEqual(asyncio.run(agent.process(data)), {"error": "Duplicate group_id: treatment_a"})
+
+class TestResamplingTests(unittest.TestCase):
+    
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.control = rng.normal(0.0, 1.0, 150)
+        self.treatment = rng.normal(0.5, 1.0, 150)
+        self.null_treatment = rng.normal(0.0, 1.0, 150)
+    
+    def test_permutation_matches_scipy(self):
+        result = permutation_test(self.control, self.null_treatment, n_resamples=4999, random_state=0)
+        expected = stats.permutation_test(
+            (self.null_treatment, self.control),
+            lambda x, y, axis: np.mean(x, axis=axis) - np.mean(y, axis=axis),
+            n_resamples=4999, random_state=0
+        )
+        self.assertAlmostEqual(result["p_value"], expected.pvalue, delta=0.03)
+    
+    def test_permutation_detects_shift(self):
+        result = permutation_test(self.control, self.treatment, random_state=0)
+        self.assertTrue(result["significant"])
+        self.assertGreater(result["p_value"], 0.0)
+    
+    def test_stratified_permutation(self):
+        control_strata = ["head"] * 100 + ["tail"] * 50
+        treatment_strata = ["head"] * 50 + ["tail"] * 100
+        result = permutation_test(self.control, self.null_treatment,
+                                  control_strata=control_strata,
+                                  treatment_strata=treatment_strata,
+                                  random_state=0)
+        self.assertTrue(result["stratified"])
+        self.assertFalse(result["significant"])
+    
+    def test_strata_length_mismatch(self):
+        result = permutation_test(self.control, self.treatment, control_strata=["a"], treatment_strata=["a"])
+        self.assertIn("error", result)
+    
+    def test_blocks_are_reproducible(self):
+        small_blocks = _resampled_mean_differences(self.control, self.treatment, 1000, replace=False,
+                                                   random_state=3, block_bytes=8 * 300 * 7)
+        self.assertEqual(small_blocks.shape, (1000,))
+        again = _resampled_mean_differences(self.control, self.treatment, 1000, replace=False,
+                                            random_state=3, block_bytes=8 * 300 * 7)
+        np.testing.assert_array_equal(small_blocks, again)
+    
+    def test_process_pool(self):
+        diffs = _resampled_mean_differences(self.control, self.treatment, 2000, replace=True,
+                                            random_state=0, n_jobs=2, parallel_threshold=1)
+        self.assertEqual(diffs.shape, (2000,))
+        self.assertLess(abs(diffs.mean()), 0.05)
+    
+    def test_bootstrap_seeded(self):
+        first = bootstrap_test(self.control, self.treatment, n_resamples=2000, random_state=0)
+        second = bootstrap_test(self.control, self.treatment, n_resamples=2000, random_state=0)
+        self.assertEqual(first["confidence_interval"], second["confidence_interval"])
+        self.assertTrue(first["significant"])
+
+class TestSampleSizeGrid(unittest.TestCase):
+    
+    def test_grid_shape(self):
+        plan = sample_size_grid([0.3, 0.5], [0.46, 0.5], [1, 2, 5], alpha=[0.01, 0.05], power=[0.8, 0.9])
+        grid = np.array(plan["arms"]["treatment"]["control_sample_size"])
+        self.assertEqual(grid.shape, (2, 3, 2, 2))
+        # Larger effects and looser alpha need fewer samples
+        self.assertTrue(np.all(np.diff(grid, axis=1) < 0))
+        self.assertTrue(np.all(np.diff(grid, axis=3) < 0))
+    
+    def test_matches_closed_form(self):
+        plan = sample_size_grid(0.3, 0.46, 5)
+        delta = 0.3 * 0.05
+        z = stats.norm.ppf(0.975) + stats.norm.ppf(0.8)
+        expected = np.ceil(2 * z ** 2 * 0.46 ** 2 / delta ** 2)
+        self.assertEqual(plan["arms"]["treatment"]["control_sample_size"][0][0][0][0], expected)
+        self.assertEqual(plan["total_sample_size"][0][0][0][0], 2 * expected)
+    
+    def test_unequal_split(self):
+        plan = sample_size_grid(0.3, 0.46, 5, traffic_split={"control": 0.5, "treatment_a": 0.25, "treatment_b": 0.25})
+        arm = plan["arms"]["treatment_a"]
+        self.assertEqual(arm["allocation_ratio"], 0.5)
+        balanced = sample_size_grid(0.3, 0.46, 5)["arms"]["treatment"]["control_sample_size"][0][0][0][0]
+        self.assertGreater(arm["control_sample_size"][0][0][0][0], balanced)
+    
+    def test_memoized(self):
+        _sample_size_grid.cache_clear()
+        sample_size_grid([0.3, 0.4], 0.5, [1, 2])
+        sample_size_grid(np.array([0.3, 0.4]), 0.5, (1, 2))
+        self.assertEqual(_sample_size_grid.cache_info().hits, 1)
+    
+    def test_ratio_metric_std(self):
+        ratio, std = ratio_metric_std(1.0, 0.0, 2.0, 0.0)
+        self.assertEqual((ratio, std), (0.5, 0.0))
+        _, independent = ratio_metric_std(1.2, 1.5, 2.0, 1.0)
+        _, correlated = ratio_metric_std(1.2, 1.5, 2.0, 1.0, covariance=0.5)
+        self.assertLess(correlated, independent)
+    
+    def test_invalid_split(self):
+        self.assertIn("error", sample_size_grid(0.3, 0.46, 5, traffic_split={"control": 1.0}))
+        # A misnamed control arm is an error, not a silent switch to the first arm
+        self.assertIn("error", sample_size_grid(0.3, 0.46, 5, traffic_split={"a": 0.5, "b": 0.5}))
+        self.assertNotIn("error", sample_size_grid(0.3, 0.46, 5, traffic_split={"a": 0.5, "b": 0.5}, control="a"))
+        self.assertIn("error", sample_size_grid(0.3, 0.46, 5, traffic_split={"control": 0.5, "treatment": 0.0}))
+    
+    def test_zero_delta(self):
+        # These would need infinitely many samples, which JSON cannot carry
+        self.assertIn("error", sample_size_grid([0.3, 0.0], 0.46, 5))
+        self.assertIn("error", sample_size_grid(0.3, 0.46, [0, 5]))
+    
+    def test_power_and_alpha_bounds(self):
+        for value in (0.0, 1.0, 1.5):
+            self.assertIn("error", sample_size_grid(0.3, 0.46, 5, power=[0.8, value]))
+            self.assertIn("error", sample_size_grid(0.3, 0.46, 5, alpha=[0.05, value]))
+
+if __name__ == '__main__':
+    unittest.main()